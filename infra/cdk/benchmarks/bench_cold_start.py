@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Measure the init (cold start) cost of each Lambda handler module.
+
+Every sample imports one handler module in a fresh Python interpreter, like
+the init phase of a new Lambda execution environment, and reports:
+
+- init_ms: wall time of the handler import (module code, clients, models).
+- rss_mb: peak resident memory of the interpreter after the import.
+
+Imports only; no AWS calls are made. Use `--json` to emit one JSON object per
+handler, e.g. to track cold starts as a metric over time.
+
+    python benchmarks/bench_cold_start.py
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from common import LAMBDA_DIR, PLACEHOLDER_ENV, print_table
+
+HANDLER_MODULES = [
+    "api.health.get.index",
+    "api.audio.get.index",
+    "api.next_actions.post.index",
+    "jobs.prerender.index",
+]
+
+# Runs in the fresh interpreter
+_PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+init_ms = (time.perf_counter() - start) * 1000
+rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"init_ms": init_ms, "rss_mb": rss_kb / 1024}))
+"""
+
+
+def measure(module: str) -> dict[str, float]:
+    env = {**PLACEHOLDER_ENV, **os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE, module],
+        cwd=LAMBDA_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="emit JSON lines")
+    args = parser.parse_args()
+
+    rows = []
+    for module in HANDLER_MODULES:
+        samples = [measure(module) for _ in range(args.repeat)]
+        init_ms = sorted(s["init_ms"] for s in samples)
+        rows.append(
+            {
+                "handler": module,
+                "init_p50_ms": statistics.median(init_ms),
+                "init_max_ms": init_ms[-1],
+                "rss_mb": max(s["rss_mb"] for s in samples),
+            }
+        )
+
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Compare the two ways of turning a WeatherAPI forecast payload into a
+`ForecastDescription`:
+
+- model: validate the full `GetForecastResponse` tree, then transform it
+  (`weather_api_forecast_response_to_forecast_description`).
+- fast path: pick the needed fields from the decoded JSON and validate once
+  (`weather_api_forecast_data_to_forecast_description`).
+
+Both variants include JSON decoding of the recorded payload. Reported times
+are CPU times (`time.process_time`) per call, which is what the Lambda is
+billed for; run on an ARM machine for numbers close to the deployed function.
+
+    python benchmarks/bench_forecast_parsing.py
+"""
+
+import argparse
+import json
+import time
+
+from common import FIXTURES_DIR, print_table, setup_lambda_env
+
+setup_lambda_env()
+
+from api.next_actions.post.models import (  # noqa: E402
+    weather_api_forecast_data_to_forecast_description,
+    weather_api_forecast_response_to_forecast_description,
+)
+from utils.weather_api_client_models import GetForecastResponse  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fixture", default="weather_api_forecast.json")
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    raw = (FIXTURES_DIR / args.fixture).read_bytes()
+
+    def model() -> object:
+        return weather_api_forecast_response_to_forecast_description(
+            GetForecastResponse.model_validate(json.loads(raw))
+        )
+
+    def fast_path() -> object:
+        return weather_api_forecast_data_to_forecast_description(json.loads(raw))
+
+    if model() != fast_path():
+        raise SystemExit("Fast path result differs from the model-based result")
+
+    rows = []
+    for name, fn in {"model": model, "fast path": fast_path}.items():
+        fn()  # warm-up
+        samples = []
+        for _ in range(args.repeat):
+            start = time.process_time()
+            fn()
+            samples.append((time.process_time() - start) * 1000)
+        samples.sort()
+        rows.append(
+            {
+                "variant": name,
+                "cpu_mean_ms": sum(samples) / len(samples),
+                "cpu_p50_ms": samples[len(samples) // 2],
+                "cpu_p95_ms": samples[int(len(samples) * 0.95)],
+            }
+        )
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Compare the full and the compact forecast serialization used in the
+next-actions prompt.
+
+Reports size, estimated input tokens and serialization time for the recorded
+WeatherAPI payload in `fixtures/`. With `--bedrock-model-id`, each variant is
+additionally sent to Bedrock once (AWS credentials required) to measure the
+exact input tokens and the end-to-end latency.
+
+    python benchmarks/bench_forecast_serialization.py
+    python benchmarks/bench_forecast_serialization.py --bedrock-model-id eu.anthropic.claude-sonnet-4-20250514-v1:0
+"""
+
+import argparse
+import time
+
+from common import load_fixture, print_table, setup_lambda_env, time_call
+
+setup_lambda_env()
+
+from api.next_actions.post.models import (  # noqa: E402
+    estimate_tokens,
+    forecast_description_to_compact_json,
+    weather_api_forecast_response_to_forecast_description,
+)
+from utils.weather_api_client_models import GetForecastResponse  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fixture", default="weather_api_forecast.json")
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--bedrock-model-id")
+    parser.add_argument("--bedrock-region", default="eu-central-1")
+    args = parser.parse_args()
+
+    forecast = weather_api_forecast_response_to_forecast_description(
+        GetForecastResponse.model_validate(load_fixture(args.fixture))
+    )
+
+    variants = {
+        "model_dump_json": lambda: forecast.model_dump_json(),
+        "compact": lambda: forecast_description_to_compact_json(forecast),
+        "compact@400": lambda: forecast_description_to_compact_json(
+            forecast, token_budget=400
+        ),
+        "compact@250": lambda: forecast_description_to_compact_json(
+            forecast, token_budget=250
+        ),
+    }
+
+    rows = []
+    for name, serialize in variants.items():
+        text = serialize()
+        timing = time_call(serialize, repeat=args.repeat)
+        rows.append(
+            {
+                "variant": name,
+                "chars": len(text),
+                "est_tokens": estimate_tokens(text),
+                "serialize_p50_ms": timing["p50_ms"],
+            }
+        )
+
+    if args.bedrock_model_id:
+        import boto3
+
+        client = boto3.client("bedrock-runtime", region_name=args.bedrock_region)
+        for row, serialize in zip(rows, variants.values()):
+            start = time.perf_counter()
+            resp = client.converse(
+                modelId=args.bedrock_model_id,
+                messages=[{"role": "user", "content": [{"text": serialize()}]}],
+                system=[{"text": "Fasse das Wetter in einem Satz zusammen."}],
+                inferenceConfig={"maxTokens": 60, "temperature": 0},
+            )
+            row["input_tokens"] = resp["usage"]["inputTokens"]
+            row["bedrock_ms"] = (time.perf_counter() - start) * 1000
+
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Shared helpers for the offline benchmarks.
+
+The Lambda code reads its configuration from environment variables at import
+time. These helpers set harmless placeholder values (unless already set) and
+put the `lambda/` directory on the import path, so that the handler modules
+can be imported without AWS access.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+CDK_DIR = Path(__file__).resolve().parent.parent
+LAMBDA_DIR = CDK_DIR / "lambda"
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+PLACEHOLDER_ENV = {
+    "AWS_DEFAULT_REGION": "eu-central-1",
+    "WEATHER_API_BASE_URL": "https://api.weatherapi.com/v1",
+    "WEATHER_API_KEY": "benchmark",
+    "WEATHER_API_LANG": "de",
+    "WEATHER_API_LOCATION": "52.5205407,13.4090758",
+    "BEDROCK_REGION": "eu-central-1",
+    "BEDROCK_MODEL_ID": "eu.anthropic.claude-sonnet-4-20250514-v1:0",
+    "CONTENTFUL_SPACE_ID": "benchmark",
+    "CONTENTFUL_ACCESS_TOKEN": "benchmark",
+    "INCLUDE_BIRTHDAY_CALENDAR": "True",
+    "BUCKET_NAME": "benchmark",
+    "TTS_VOICE_ID": "Daniel",
+    "TTS_ENGINE": "generative",
+    "TTS_OUTPUT_FORMAT": "mp3",
+    "TTS_SAMPLE_RATE": "24000",
+}
+
+
+def setup_lambda_env() -> None:
+    for key, value in PLACEHOLDER_ENV.items():
+        os.environ.setdefault(key, value)
+    if str(LAMBDA_DIR) not in sys.path:
+        sys.path.insert(0, str(LAMBDA_DIR))
+
+
+def load_fixture(name: str) -> Any:
+    with open(FIXTURES_DIR / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def time_call(fn: Callable[[], Any], *, repeat: int = 200) -> dict[str, float]:
+    """
+    Call `fn` repeatedly and return timing statistics in milliseconds.
+    """
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": statistics.fmean(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+def print_table(rows: list[dict[str, Any]]) -> None:
+    columns = list(rows[0].keys())
+    formatted = [
+        [f"{row[c]:.3f}" if isinstance(row[c], float) else str(row[c]) for c in columns]
+        for row in rows
+    ]
+    widths = [
+        max(len(c), *(len(r[i]) for r in formatted)) for i, c in enumerate(columns)
+    ]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in formatted:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)))
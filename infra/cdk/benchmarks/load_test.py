@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Run the API handlers under concurrent load, locally and without AWS access.
+
+Each worker process stands in for one warm Lambda execution environment: it
+imports the handlers once and then handles one request at a time, with its
+own in-memory caches. All workers share one in-memory S3 bucket. WeatherAPI,
+Contentful and Bedrock are replayed from the fixtures (see `replay.py`); S3,
+Polly, Bedrock and the upstream APIs get configurable latencies.
+
+A press of a device is one `POST /next-actions` request followed by one
+`GET /audio` request per sentence, or a single request with `--inline-audio`
+(audio attached to the actions). Presses are spread over `--devices` device
+IDs and sent by `--concurrency` clients at once. With `--locations`, the
+devices are spread over that many device profiles in different locations
+(see `utils/device_profiles.py`); otherwise all use the default profile.
+
+Reports throughput, latency percentiles per route, peak RSS of the workers,
+the cache hit ratios and the number of upstream calls (WeatherAPI,
+Contentful, Bedrock, Polly) from the handlers' EMF records.
+
+    python benchmarks/load_test.py --presses 200 --concurrency 8
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+import io
+import json
+import multiprocessing
+import resource
+import time
+from typing import Any
+
+from common import print_table, setup_lambda_env
+
+# EMF metrics that count one call to an upstream service each
+UPSTREAM_METRICS = ("WeatherFetch", "Contentful", "Bedrock", "Polly")
+
+_handlers: dict[str, Any] = {}
+
+
+def init_worker(objects: Any, latencies: dict[str, float]) -> None:
+    setup_lambda_env()
+
+    from api.audio.get import index as audio_index
+    from api.next_actions.post import index as next_actions_index
+    from replay import FakePolly, InMemoryS3, install_replay
+
+    install_replay(
+        s3=InMemoryS3(latencies["s3"], objects=objects),
+        polly=FakePolly(latencies["polly"]),
+        weather_latency_seconds=latencies["weather"],
+        contentful_latency_seconds=latencies["contentful"],
+        bedrock_latency_seconds=latencies["bedrock"],
+    )
+    _handlers["/next-actions"] = next_actions_index.handler
+    _handlers["/audio"] = audio_index.handler
+
+
+def api_gateway_event(
+    method: str, path: str, device_id: str, query: dict[str, str] | None = None
+) -> dict[str, Any]:
+    """
+    Build a (reduced) API Gateway REST proxy event.
+    """
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": {
+            "Accept": (
+                "application/x-ndjson" if path == "/next-actions" else "audio/mpeg"
+            ),
+            "x-device-id": device_id,
+            "x-deadline-ms": "20000",
+        },
+        "queryStringParameters": query,
+        "requestContext": {"identity": {"apiKeyId": "load-test"}},
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+
+def device_profiles(device_ids: list[str], locations: int) -> dict[str, Any]:
+    """
+    Build a device profiles file that spreads the devices over `locations`
+    profiles, about 50 km apart.
+    """
+    calendar = {"contentful_space_id": "load-test", "contentful_access_token": "-"}
+    return {
+        "profiles": {
+            f"location-{i}": {
+                "location": f"{47.5 + i % 10 * 0.5:.2f},{6.0 + i // 10 * 0.5:.2f}",
+                "birthday_calendar": calendar,
+            }
+            for i in range(locations)
+        },
+        "devices": {
+            device_id: f"location-{i % locations}"
+            for i, device_id in enumerate(sorted(set(device_ids)))
+        },
+    }
+
+
+def press(device_id: str, inline_audio: bool) -> dict[str, Any]:
+    """
+    Handle one press of a device and return the latencies, the metrics of
+    the EMF records and the peak RSS of the worker.
+    """
+    latencies: list[tuple[str, float, int]] = []
+    output = io.StringIO()
+
+    def call(path: str, event: dict[str, Any]) -> dict[str, Any]:
+        started_at = time.perf_counter()
+        with redirect_stdout(output):
+            response = _handlers[path](event, None)
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        latencies.append((path, elapsed_ms, response["statusCode"]))
+        return response
+
+    started_at = time.perf_counter()
+    query = {"audio": "inline"} if inline_audio else None
+    response = call(
+        "/next-actions",
+        api_gateway_event("POST", "/next-actions", device_id, query),
+    )
+    if response["statusCode"] == 200 and not inline_audio:
+        for line in response["body"].splitlines():
+            action = json.loads(line)
+            query = {"text": action["text"]}
+            call("/audio", api_gateway_event("GET", "/audio", device_id, query))
+    press_ms = (time.perf_counter() - started_at) * 1000
+
+    return {
+        "latencies": latencies + [("press", press_ms, 200)],
+        "metrics": _emf_metrics(output.getvalue()),
+        "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def _emf_metrics(output: str) -> dict[str, list[float]]:
+    values_by_name: dict[str, list[float]] = {}
+    for line in output.splitlines():
+        if not line.startswith('{"_aws"'):
+            continue
+        record = json.loads(line)
+        for metric in record["_aws"]["CloudWatchMetrics"][0]["Metrics"]:
+            value = record[metric["Name"]]
+            values = value if isinstance(value, list) else [value]
+            values_by_name.setdefault(metric["Name"], []).extend(values)
+    return values_by_name
+
+
+def percentile(samples: list[float], percent: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * percent / 100))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--presses", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--devices", type=int, default=50)
+    parser.add_argument("--locations", type=int, default=0)
+    parser.add_argument("--inline-audio", action="store_true")
+    parser.add_argument("--s3-ms", type=float, default=20)
+    parser.add_argument("--polly-ms", type=float, default=150)
+    parser.add_argument("--bedrock-ms", type=float, default=3000)
+    parser.add_argument("--weather-ms", type=float, default=300)
+    parser.add_argument("--contentful-ms", type=float, default=200)
+    parser.add_argument("--json", action="store_true", help="emit JSON")
+    args = parser.parse_args()
+
+    latencies = {
+        "s3": args.s3_ms / 1000,
+        "polly": args.polly_ms / 1000,
+        "bedrock": args.bedrock_ms / 1000,
+        "weather": args.weather_ms / 1000,
+        "contentful": args.contentful_ms / 1000,
+    }
+    device_ids = [f"device-{i % args.devices:03d}" for i in range(args.presses)]
+
+    with multiprocessing.Manager() as manager:
+        objects = manager.dict()
+        if args.locations:
+            profiles = device_profiles(device_ids, args.locations)
+            objects["profiles/devices.json"] = json.dumps(profiles).encode()
+        with ProcessPoolExecutor(
+            max_workers=args.concurrency,
+            initializer=init_worker,
+            initargs=(objects, latencies),
+        ) as executor:
+            started_at = time.perf_counter()
+            results = list(
+                executor.map(press, device_ids, [args.inline_audio] * len(device_ids))
+            )
+            elapsed = time.perf_counter() - started_at
+
+    by_route: dict[str, list[float]] = {}
+    errors = 0
+    emf_metrics: dict[str, list[float]] = {}
+    for result in results:
+        for route, latency_ms, status in result["latencies"]:
+            by_route.setdefault(route, []).append(latency_ms)
+            errors += status != 200
+        for name, values in result["metrics"].items():
+            emf_metrics.setdefault(name, []).extend(values)
+
+    rows = [
+        {
+            "route": route,
+            "requests": len(samples),
+            "per_second": len(samples) / elapsed,
+            "p50_ms": percentile(samples, 50),
+            "p90_ms": percentile(samples, 90),
+            "p99_ms": percentile(samples, 99),
+            "max_ms": max(samples),
+        }
+        for route, samples in by_route.items()
+    ]
+    summary = {
+        "elapsed_s": round(elapsed, 2),
+        "errors": errors,
+        "peak_rss_mb": round(max(result["rss_mb"] for result in results), 1),
+        "cache_hit_ratios": {
+            name: round(sum(values) / len(values), 3)
+            for name, values in sorted(emf_metrics.items())
+            if name.endswith("Hit")
+        },
+        "upstream_calls": {
+            name: len(emf_metrics.get(name, [])) for name in UPSTREAM_METRICS
+        },
+    }
+
+    if args.json:
+        print(json.dumps({"routes": rows, **summary}))
+        return
+
+    print_table(rows)
+    print()
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Record the WeatherAPI, Contentful and Bedrock responses of one briefing as
+fixtures for the offline benchmarks (see `replay.py`).
+
+Needs the real configuration (`.env` of the CDK app: WeatherAPI and
+Contentful credentials) and AWS credentials with Bedrock access. S3 is not
+used. The recorded fixtures replace the ones in `benchmarks/fixtures/`.
+
+    python benchmarks/record_fixtures.py
+"""
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from dotenv import load_dotenv
+
+from common import CDK_DIR, FIXTURES_DIR, setup_lambda_env
+
+load_dotenv(CDK_DIR / ".env")
+setup_lambda_env()
+
+from api.next_actions.post.briefing import generate_sentences  # noqa: E402
+from replay import install_recorder  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--fixtures-dir", default=str(FIXTURES_DIR))
+    args = parser.parse_args()
+
+    install_recorder(Path(args.fixtures_dir))
+    now = datetime.now(ZoneInfo("Europe/Berlin"))
+    for sentence in generate_sentences(now, fallback=False):
+        print(sentence)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Record/replay stand-ins for the external services of the next-actions
+pipeline, so that it can be run and measured without network access.
+
+- WeatherAPI: the decoded forecast JSON (`weather_api_forecast.json`).
+- Contentful: the fields of the birthday calendar entries
+  (`contentful_birthdays.json`).
+- Bedrock: the events of a ConverseStream response
+  (`bedrock_converse_stream.json`).
+- S3 and Polly: in-memory stand-ins (nothing is recorded).
+
+`install_replay` injects the fixtures into the Lambda modules;
+`install_recorder` wraps the real clients and writes the fixtures (see
+`record_fixtures.py`). Both expect `common.setup_lambda_env()` to have run.
+"""
+
+import copy
+import hashlib
+import io
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator, MutableMapping
+
+from common import FIXTURES_DIR, load_fixture
+
+WEATHER_FIXTURE = "weather_api_forecast.json"
+CONTENTFUL_FIXTURE = "contentful_birthdays.json"
+BEDROCK_FIXTURE = "bedrock_converse_stream.json"
+
+# Empty ID3v2.4 tag and a 144-byte MPEG 2 Layer III frame (48 kbit/s, 24 kHz)
+_ID3_TAG = b"ID3\x04\x00\x00\x00\x00\x00\x00"
+_SILENT_FRAME = b"\xff\xf3\x64\xc4" + bytes(140)
+
+
+def _etag(body: bytes | None) -> str | None:
+    return None if body is None else '"' + hashlib.md5(body).hexdigest() + '"'
+
+
+class InMemoryS3:
+    """
+    The subset of the S3 client used by the Lambda code, backed by a dict.
+    Each call sleeps for `latency_seconds` to simulate the round-trip.
+
+    Pass a `multiprocessing.Manager().dict()` as `objects` to share the bucket
+    between processes.
+    """
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.0,
+        objects: MutableMapping[str, bytes] | None = None,
+    ):
+        from botocore.exceptions import ClientError
+
+        self._client_error = ClientError
+        self.latency_seconds = latency_seconds
+        self.objects = {} if objects is None else objects
+        self._lock = threading.Lock()
+
+    def get_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        self._sleep()
+        with self._lock:
+            body = self.objects.get(Key)
+        if body is None:
+            raise self._error("NoSuchKey", "GetObject")
+        return {"Body": io.BytesIO(body), "ETag": _etag(body)}
+
+    def head_object(self, Bucket: str, Key: str) -> dict[str, Any]:
+        self._sleep()
+        with self._lock:
+            if Key not in self.objects:
+                raise self._error("404", "HeadObject")
+        return {}
+
+    def put_object(self, Bucket: str, Key: str, Body: Any, **kwargs: Any) -> dict:
+        self._sleep()
+        body = Body if isinstance(Body, bytes) else Body.encode()
+        with self._lock:
+            # Conditional writes (IfMatch / IfNoneMatch="*")
+            current = self.objects.get(Key)
+            if ("IfMatch" in kwargs and kwargs["IfMatch"] != _etag(current)) or (
+                kwargs.get("IfNoneMatch") == "*" and current is not None
+            ):
+                raise self._error("PreconditionFailed", "PutObject")
+            self.objects[Key] = body
+        return {"ETag": _etag(body)}
+
+    def get_paginator(self, operation_name: str) -> "InMemoryS3":
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str) -> Iterator[dict[str, Any]]:
+        with self._lock:
+            keys = sorted(key for key in self.objects.keys() if key.startswith(Prefix))
+        yield {"Contents": [{"Key": key} for key in keys]}
+
+    def generate_presigned_url(self, operation_name: str, **kwargs: Any) -> str:
+        return f"https://s3.invalid/{kwargs['Params']['Key']}"
+
+    def _sleep(self) -> None:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def _error(self, code: str, operation_name: str) -> Exception:
+        return self._client_error({"Error": {"Code": code}}, operation_name)
+
+
+class FakePolly:
+    """
+    Returns an MP3-shaped response per call after `latency_seconds`: an ID3
+    tag and one silent frame per 10 characters (MPEG 2 Layer III, 24 kHz),
+    so that the frames of several responses can be concatenated.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def synthesize_speech(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        frames = _SILENT_FRAME * (1 + len(kwargs["Text"]) // 10)
+        return {"AudioStream": io.BytesIO(_ID3_TAG + frames)}
+
+
+class ReplayBedrockClient:
+    """
+    Replays a recorded ConverseStream response. The events are spread over
+    `latency_seconds` to simulate the generation time.
+    """
+
+    def __init__(self, events: list[dict[str, Any]], latency_seconds: float = 0.0):
+        self.events = events
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def converse_stream(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        return {"stream": self._stream()}
+
+    def _stream(self) -> Iterator[dict[str, Any]]:
+        delay = self.latency_seconds / max(1, len(self.events))
+        for event in copy.deepcopy(self.events):
+            if delay:
+                time.sleep(delay)
+            yield event
+
+
+class RecordingBedrockClient:
+    """
+    Passes calls through to a real Bedrock runtime client and writes the
+    events of the last ConverseStream response to `path`.
+    """
+
+    def __init__(self, client: Any, path: Path):
+        self._client = client
+        self._path = path
+
+    def converse_stream(self, **kwargs: Any) -> dict[str, Any]:
+        resp = self._client.converse_stream(**kwargs)
+        return {**resp, "stream": self._record(resp["stream"])}
+
+    def _record(self, stream: Any) -> Iterator[dict[str, Any]]:
+        events = []
+        for event in stream:
+            events.append(event)
+            yield event
+        _write_fixture(self._path, events)
+
+
+class ContentfulEntry:
+    """
+    Stands in for a Contentful entry; only `fields()` is used.
+    """
+
+    def __init__(self, fields: dict[str, Any]):
+        self._fields = fields
+
+    def fields(self) -> dict[str, Any]:
+        return self._fields
+
+
+def contentful_entries(fixture: str = CONTENTFUL_FIXTURE) -> list[ContentfulEntry]:
+    return [ContentfulEntry(fields) for fields in load_fixture(fixture)]
+
+
+def install_replay(
+    s3: InMemoryS3 | None = None,
+    polly: FakePolly | None = None,
+    weather_latency_seconds: float = 0.0,
+    contentful_latency_seconds: float = 0.0,
+    bedrock_latency_seconds: float = 0.0,
+) -> dict[str, Any]:
+    """
+    Replace WeatherAPI, Contentful, Bedrock, S3 and Polly in the Lambda
+    modules with the replay stand-ins and return them by name.
+    """
+    from api.next_actions.post import briefing
+    from api.next_actions.post.models import map_contentful_birthday_items
+    from utils import speech
+    from utils.metrics import metrics
+
+    s3 = s3 or InMemoryS3()
+    polly = polly or FakePolly()
+    bedrock = ReplayBedrockClient(
+        load_fixture(BEDROCK_FIXTURE), latency_seconds=bedrock_latency_seconds
+    )
+    forecast_data = load_fixture(WEATHER_FIXTURE)
+    entries = contentful_entries()
+
+    def get_forecast_data(**kwargs: Any) -> dict[str, Any]:
+        if weather_latency_seconds:
+            time.sleep(weather_latency_seconds)
+        return copy.deepcopy(forecast_data)
+
+    def get_birthday_calendar(calendar: Any, tz_name: str) -> list[Any]:
+        with metrics.timer("Contentful"):
+            if contentful_latency_seconds:
+                time.sleep(contentful_latency_seconds)
+        return map_contentful_birthday_items(entries, tz_name=tz_name)
+
+    briefing.weather_api_client.get_forecast_data = get_forecast_data
+    briefing._get_birthday_calendar = get_birthday_calendar
+    briefing.bedrock_client.use(bedrock)
+    briefing.s3_client.use(s3)
+    speech.s3.use(s3)
+    speech.polly.use(polly)
+    return {"s3": s3, "polly": polly, "bedrock": bedrock}
+
+
+def install_recorder(fixtures_dir: Path = FIXTURES_DIR) -> InMemoryS3:
+    """
+    Record the responses of the real WeatherAPI, Contentful and Bedrock
+    services as fixtures in `fixtures_dir`. S3 is replaced by `InMemoryS3`,
+    so that no bucket is needed; the in-memory S3 is returned.
+    """
+    from api.next_actions.post import briefing
+
+    get_forecast_data = briefing.weather_api_client.get_forecast_data
+    get_birthday_calendar_entries = _contentful_entries_loader()
+
+    def record_forecast_data(**kwargs: Any) -> dict[str, Any]:
+        data = get_forecast_data(**kwargs)
+        _write_fixture(fixtures_dir / WEATHER_FIXTURE, data)
+        return data
+
+    def record_birthday_calendar(calendar: Any, tz_name: str) -> list[Any]:
+        from api.next_actions.post.models import map_contentful_birthday_items
+
+        entries = get_birthday_calendar_entries(calendar)
+        _write_fixture(
+            fixtures_dir / CONTENTFUL_FIXTURE, [entry.fields() for entry in entries]
+        )
+        return map_contentful_birthday_items(entries, tz_name=tz_name)
+
+    s3 = InMemoryS3()
+    briefing.weather_api_client.get_forecast_data = record_forecast_data
+    briefing._get_birthday_calendar = record_birthday_calendar
+    import boto3
+
+    bedrock = boto3.client("bedrock-runtime", region_name=briefing.BEDROCK_REGION)
+    briefing.bedrock_client.use(
+        RecordingBedrockClient(bedrock, fixtures_dir / BEDROCK_FIXTURE)
+    )
+    briefing.s3_client.use(s3)
+    return s3
+
+
+def _contentful_entries_loader() -> Any:
+    def load(calendar: Any) -> list[Any]:
+        import contentful
+
+        client = contentful.Client(
+            calendar.contentful_space_id, calendar.contentful_access_token
+        )
+        return list(client.entries({"content_type": "birthdayCalendarItem"}))
+
+    return load
+
+
+def _write_fixture(path: Path, data: Any) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        f.write("\n")
+    print(f"recorded {path.name}")
@@ -1,86 +1,88 @@
 import base64
+from datetime import datetime
 import json
-import os
-import re
+import threading
 from typing import Any
+from zoneinfo import ZoneInfo
 
-import boto3
 from botocore.exceptions import ClientError
 
-s3 = boto3.client("s3")
-polly = boto3.client("polly")
+from utils.device_config import DeviceConfig
+from utils.speech import BUCKET_NAME, TTS_ENGINE, get_audio, s3
+from utils.metrics import metrics
+from utils.usage_histogram import (
+    api_key_id_from_event,
+    device_id_from_event,
+    is_press_event,
+    record_press_async,
+)
+from utils.warmup import is_warmup_event, warmup_response
 
-BUCKET_NAME = os.environ["BUCKET_NAME"]
-TTS_VOICE_ID = os.environ["TTS_VOICE_ID"]
-TTS_ENGINE = os.environ["TTS_ENGINE"]
-TTS_OUTPUT_FORMAT = os.environ["TTS_OUTPUT_FORMAT"]
-TTS_SAMPLE_RATE = os.environ["TTS_SAMPLE_RATE"]
+# Profile IDs and timezones of the devices, for their usage histograms
+device_config = DeviceConfig(s3, BUCKET_NAME)
 
 
 def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+    if is_warmup_event(event):
+        return warmup_response()
+
+    metrics.start("Audio")
+    press = None
+    try:
+        # Only the time announcement is a press of its own; the audio of
+        # briefing sentences belongs to a press that next-actions recorded
+        if is_press_event(event):
+            press = _record_press(event)
+        with metrics.timer("Total"):
+            return _handle(event)
+    finally:
+        if press is not None:
+            press.join(timeout=1.0)
+        metrics.flush()
+
+
+def _record_press(event: dict[str, Any]) -> threading.Thread | None:
+    # Press times are recorded in the local time of the device
+    device_id = device_id_from_event(event)
+    profile_id = device_config.profile_id(device_id, api_key_id_from_event(event))
+    now = datetime.now(ZoneInfo(device_config.timezone(profile_id)))
+    return record_press_async(s3, BUCKET_NAME, device_id, now, profile_id)
+
+
+def _handle(event: dict[str, Any]) -> dict[str, Any]:
     qs = (event or {}).get("queryStringParameters") or {}
     text = qs.get("text")
     if not text:
         return _bad_request("Missing required query parameter: text")
 
-    should_cache_audio = len(text) < 100
-
-    # Try to serve from cache
-    if should_cache_audio:
-        cleaned_text = re.sub(r"[^a-zA-Z0-9]", "_", text)
-        cache_key = f"polly/{TTS_VOICE_ID}/{cleaned_text}.{TTS_OUTPUT_FORMAT}"
-
-        try:
-            obj = s3.get_object(Bucket=BUCKET_NAME, Key=cache_key)
-            body = obj["Body"].read()
-            return _audio_response(body)
-        except ClientError as e:
-            if e.response["Error"]["Code"] != "NoSuchKey":
-                # For other S3 errors, bubble up as 500
-                return _server_error(f"S3 error: {e}")
-
-    # Not cached -> synthesize with Polly, store, return
+    # Served from the audio cache (long texts may have been pre-rendered), or
+    # assembled from the cached or synthesized audio of its sentences
     try:
-        res = polly.synthesize_speech(
-            Text=text,
-            TextType="text",
-            OutputFormat=TTS_OUTPUT_FORMAT,
-            SampleRate=TTS_SAMPLE_RATE,
-            VoiceId=TTS_VOICE_ID,
-            Engine=TTS_ENGINE,
-        )
-        audio_stream = res.get("AudioStream")
-        if audio_stream is None:
-            return _server_error("No audio stream from Polly.")
-
-        audio_bytes = audio_stream.read()
-
-        # Cache to S3
-        if should_cache_audio:
-            s3.put_object(
-                Bucket=BUCKET_NAME,
-                Key=cache_key,
-                Body=audio_bytes,
-                ContentType="audio/mpeg",
-                CacheControl="public, max-age=31536000, immutable",
-            )
-
-        return _audio_response(audio_bytes)
-
+        audio_bytes, engine = get_audio(text)
     except ClientError as e:
-        return _server_error(f"Polly error: {e}")
+        # S3 or Polly error -> 500
+        return _server_error(f"AWS error: {e}")
+    except RuntimeError as e:
+        return _server_error(str(e))
+    return _audio_response(audio_bytes, engine)
 
 
-def _audio_response(audio_bytes: bytes) -> dict[str, Any]:
+def _audio_response(audio_bytes: bytes, engine: str) -> dict[str, Any]:
     # API Gateway (Lambda proxy) needs base64 body + isBase64Encoded for binary media.
     b64 = base64.b64encode(audio_bytes).decode("ascii")
+    # Audio of a faster engine is upgraded later, so it must not be kept forever
+    cache_control = (
+        "public, max-age=31536000, immutable"
+        if engine == TTS_ENGINE
+        else "public, max-age=86400"
+    )
     return {
         "statusCode": 200,
         "isBase64Encoded": True,
         "headers": {
             "Content-Type": "audio/mpeg",
             "Content-Length": str(len(audio_bytes)),
-            "Cache-Control": "public, max-age=31536000, immutable",
+            "Cache-Control": cache_control,
             "Content-Disposition": 'attachment; filename="audio.mp3"',
         },
         "body": b64,
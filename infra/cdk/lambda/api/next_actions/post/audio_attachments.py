@@ -0,0 +1,151 @@
+import base64
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+import threading
+from typing import Any
+
+from api.next_actions.post.message_cache import render_time
+from utils.deadline import Deadline
+from utils.speech import (
+    BUCKET_NAME,
+    audio_cache_key,
+    find_cached_audio_engine,
+    get_audio,
+    put_cached_audio,
+    s3,
+    synthesize_routed,
+)
+
+# `?audio=` modes of POST /next-actions
+AUDIO_MODES = ("inline", "url")
+
+PRESIGNED_URL_EXPIRES_SECONDS = 300
+
+# Polly calls per request (Polly throttles concurrent synthesis per account)
+audio_executor = ThreadPoolExecutor(max_workers=4)
+
+
+class AudioPrefetch:
+    """
+    Starts the audio of sentences while the briefing is still being generated
+    (see `on_sentence` of `generate_sentences`), so that synthesis overlaps
+    with the rest of the model output. `attach_audio` then uses the audio of
+    actions with the same text.
+
+    Sentences of a model call that is not used (e.g. a hedged call that lost)
+    are synthesized in vain; `close` cancels those still queued.
+    """
+
+    def __init__(self, mode: str, now: datetime):
+        self.mode = mode
+        self._now = now
+        self._futures: dict[str, Future] = {}
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def add(self, sentence: str) -> None:
+        """
+        Start the audio of a sentence (with time placeholder).
+        """
+        (text,) = render_time([sentence], self._now)
+        with self._lock:
+            if self._closed or text in self._futures:
+                return
+            self._futures[text] = audio_executor.submit(_get_audio, text, self.mode)
+
+    def pop(self, text: str) -> Future | None:
+        with self._lock:
+            return self._futures.pop(text, None)
+
+    def close(self) -> None:
+        """
+        Cancel the audio that was not used, and ignore further sentences (e.g.
+        of a model call that continues after the request gave up on it).
+        """
+        with self._lock:
+            self._closed = True
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+
+def attach_audio(
+    actions: list[dict[str, Any]],
+    mode: str,
+    deadline: Deadline,
+    prefetch: AudioPrefetch | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Add the synthesized audio to the "say" actions, so that the device does
+    not need a separate `GET /audio` request per action.
+
+    The audio of all actions is synthesized in parallel (or read from the
+    audio cache). With `prefetch`, the audio of sentences that were started
+    while the briefing was generated is used; the rest starts now. Actions
+    whose audio is not ready before the deadline are returned without audio;
+    the device then requests it from `/audio` as before.
+
+    Args:
+        actions: The actions of the response.
+        mode: "inline" adds the base64-encoded MP3 as `audio`, "url" adds a
+            presigned S3 URL of the cached MP3 as `audio_url`.
+        deadline: The deadline of the request.
+        prefetch: Audio started for the sentences of the briefing, if any.
+
+    Returns:
+        list[dict]: The actions, with audio where available.
+    """
+    futures = {}
+    for index, action in enumerate(actions):
+        if action["action_type"] != "say":
+            continue
+        future = prefetch.pop(action["text"]) if prefetch is not None else None
+        futures[index] = future or audio_executor.submit(
+            _get_audio, action["text"], mode
+        )
+    _, not_done = wait(futures.values(), timeout=deadline.remaining())
+    if not_done:
+        # Do not let queued synthesis delay the next request
+        for future in not_done:
+            future.cancel()
+        print(f"[ERROR] AUDIO_ATTACHMENT_TIMEOUT: {len(not_done)} actions")
+
+    result = []
+    for index, action in enumerate(actions):
+        future = futures.get(index)
+        if future is None or future in not_done:
+            result.append(action)
+        elif future.exception() is not None:
+            print(f"[ERROR] AUDIO_ATTACHMENT_FAILED: {repr(future.exception())}")
+            result.append(action)
+        elif mode == "url":
+            result.append({**action, "audio_url": future.result()})
+        else:
+            result.append(
+                {
+                    **action,
+                    "audio": base64.b64encode(future.result()).decode("ascii"),
+                    "audio_content_type": "audio/mpeg",
+                }
+            )
+    return result
+
+
+def _get_audio(text: str, mode: str) -> bytes | str:
+    """
+    Return the MP3 audio of a text ("inline") or a presigned URL to it ("url").
+    """
+    if mode == "url":
+        # The URL points into the audio cache, so the audio is always stored
+        engine = find_cached_audio_engine(text)
+        if engine is None:
+            audio_bytes, engine = synthesize_routed(text)
+            put_cached_audio(text, audio_bytes, engine)
+        return s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": BUCKET_NAME, "Key": audio_cache_key(text, engine)},
+            ExpiresIn=PRESIGNED_URL_EXPIRES_SECONDS,
+        )
+
+    audio_bytes, _ = get_audio(text)
+    return audio_bytes
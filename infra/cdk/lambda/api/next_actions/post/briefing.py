@@ -0,0 +1,766 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from datetime import datetime, timedelta
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Iterator
+from botocore.exceptions import ClientError
+
+from api.next_actions.post.briefing_templates import render_briefing_sentences
+from api.next_actions.post.forecast_cache import ForecastCache, location_cell
+from api.next_actions.post.message_cache import (
+    MessageCache,
+    has_time_placeholder,
+    message_fingerprint,
+    time_bucket,
+)
+from api.next_actions.post.model_router import ModelRouter
+from api.next_actions.post.models import (
+    BirthdayCalendarItem,
+    DatetimeHints,
+    ForecastDescription,
+    forecast_description_to_compact_json,
+    map_contentful_birthday_items,
+    weather_api_forecast_data_to_forecast_description,
+)
+from utils.aws_clients import LazyClient
+from utils.deadline import Deadline
+from utils.device_profiles import (
+    DEFAULT_PROFILE_ID,
+    BirthdayCalendarSource,
+    DeviceProfile,
+    DeviceProfiles,
+)
+from utils.metrics import metrics
+from utils.sentences import pop_sentences
+from utils.ttl_cache import TtlCache
+from utils.weather_api_client import WeatherApiClient
+
+
+WEATHER_API_KEY = os.environ["WEATHER_API_KEY"]
+# Location, language and birthday calendar of the default device profile
+WEATHER_API_LANG = os.environ["WEATHER_API_LANG"]
+WEATHER_API_LOCATION = os.environ["WEATHER_API_LOCATION"]
+BEDROCK_REGION = os.environ["BEDROCK_REGION"]
+BEDROCK_MODEL_ID = os.environ["BEDROCK_MODEL_ID"]
+# Faster model for hedged requests and as route while the primary model is
+# slow or failing (optional)
+BEDROCK_FALLBACK_MODEL_ID = os.environ.get("BEDROCK_FALLBACK_MODEL_ID") or None
+CONTENTFUL_SPACE_ID = os.environ["CONTENTFUL_SPACE_ID"]
+CONTENTFUL_ACCESS_TOKEN = os.environ["CONTENTFUL_ACCESS_TOKEN"]
+INCLUDE_BIRTHDAY_CALENDAR = os.environ["INCLUDE_BIRTHDAY_CALENDAR"] == "True"
+FORECAST_TOKEN_BUDGET = int(os.environ.get("FORECAST_TOKEN_BUDGET", "1200"))
+FORECAST_CACHE_TTL_SECONDS = int(os.environ.get("FORECAST_CACHE_TTL_SECONDS", "300"))
+# Devices within the same grid cell share one forecast ("lat,lon" locations)
+FORECAST_GRID_DEGREES = float(os.environ.get("FORECAST_GRID_DEGREES", "0.05"))
+BIRTHDAY_CALENDAR_CACHE_TTL_SECONDS = int(
+    os.environ.get("BIRTHDAY_CALENDAR_CACHE_TTL_SECONDS", "3600")
+)
+MESSAGE_CACHE_BUCKET_MINUTES = int(os.environ.get("MESSAGE_CACHE_BUCKET_MINUTES", "30"))
+BUCKET_NAME = os.environ["BUCKET_NAME"]
+PRERENDER_PREFIX = "next-actions/prerender"
+# 'llm': generate the briefing with Bedrock; 'template': fixed sentence templates
+BRIEFING_MODE = os.environ.get("BRIEFING_MODE", "llm")
+# Fall back to the template briefing if the LLM takes longer than this
+LLM_LATENCY_BUDGET_SECONDS = float(os.environ.get("LLM_LATENCY_BUDGET_SECONDS", "12"))
+# Cached forecasts up to this age are used if WeatherAPI is slow or unavailable
+STALE_FORECAST_MAX_AGE_SECONDS = int(
+    os.environ.get("STALE_FORECAST_MAX_AGE_SECONDS", "10800")
+)
+WEATHER_API_TIMEOUT_SECONDS = 20
+LLM_MAX_TOKENS = 400
+# Send a hedged request to the next model after this latency percentile
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "90"))
+LLM_HEDGE_DEFAULT_DELAY_SECONDS = float(
+    os.environ.get("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "6")
+)
+
+# Degradation as the request deadline approaches (remaining seconds):
+# below these budgets, birthdays are not loaded, the forecast in the prompt is
+# reduced (no AQI details, no hourly values) and no LLM call is started.
+DEADLINE_BIRTHDAYS_MIN_SECONDS = 8.0
+DEADLINE_FULL_FORECAST_MIN_SECONDS = 10.0
+DEADLINE_LLM_MIN_SECONDS = 3.0
+FORECAST_TOKEN_BUDGET_REDUCED = 250
+# Caps maxTokens, so that the output can be generated in the remaining time
+LLM_OUTPUT_TOKENS_PER_SECOND = 50
+# Kept back for rendering the template briefing after an LLM timeout
+TEMPLATE_RESERVE_SECONDS = 0.5
+
+SYSTEM_PROMPT = "Du bist die Stimme einer Sprachuhr, die nur einen Knopf als Eingabe und einen Lautsprecher als Ausgabe besitzt. Hauptnutzer sind seh-eingeschränkte Personen, die einen einfachen Zugang zu Informationen und Daten wünschen. Die Ausgaben sollen freundlich und leicht verständlich sein und in ganzen Sätzen formuliert werden. Sprich ausschliesslich deutsch."
+
+INSTRUCTIONS_BASE = """Erstelle basierend auf den Wetter- und Zeitdaten in der Nachricht des Nutzers eine kurze, freundliche Nachricht gemäß der folgenden Vorgaben und Hinweise. Informiere den Nutzer über die Zeit, den Wochentag, das Datum, und zusätzlich einen kompakten Wetterbericht mit kurzer Vorhersage. Die Nachricht sollte kompakt gehalten werden und verschiedene Informationen müssen priorisiert werden. Die Nachricht sollte zwischen 50 und 80 Wörtern lang sein und neben den Informationen auch freundliche Worte enthalten.
+
+Guidelines:
+* Für den aktuellen Tag, ist die Wetterentwicklung relevant, speziell Niederschläge sind zu erwähnen. Eine Tendenz für die kommenden Tage kann optional gegeben werden. Außerdem sollten extreme Wetterbedingung hervorgehoben werden. Relevante Warnungen für den aktuelle Tag bzw. die kommenden Tage haben eine hohe Priorität.
+* Sollte es aktuell schon dunkel sein, speziell aber mitten in der Nacht, kann die Zeit des Sonnenaufgangs am selben oder nächsten erwähnt werden. Der Zeitpunkt des Sonnenuntergangs ist nicht relevant.
+* Vor besonders heißen Temperaturen sollte gewarnt werden; ein Hinweis viel zu trinken kann passend sein. Vor starken Stürmen oder Regenfällen sollte ebenfalls gewarnt werden. Genau so kann eine schlechte Luftqualität erwähnt werden. Besonders kalte Temperaturen sind ebenfalls erwähnenswert.
+* Bei Wetterbedingungen, die für Personen mit Kreislaufbeschwerden schwierig sind, sollte hingewiesen werden.
+* Uhrzeiten sollten im Format "12:34" (ohne "Uhr") angegeben werden.
+* Schreibe für die aktuelle Uhrzeit immer den Platzhalter {{uhrzeit}} statt der Uhrzeit selbst (z. B. "Es ist jetzt {{uhrzeit}}."). Er wird beim Vorlesen durch die genaue Uhrzeit ersetzt.
+* Nutzer sollen geduzt werden.
+
+Die Wetterdaten sind kompakt als JSON kodiert: Stündliche Werte und die Tagesübersicht sind Tabellen aus "columns" (Spaltennamen) und "rows" (Zeilen). Stündliche Werte sind zu Zeitblöcken (z. B. "14:00-16:00") mit Höchstwerten für Temperatur, Regenwahrscheinlichkeit und Wind sowie der Niederschlagssumme zusammengefasst.
+
+Hier sind ein paar Beispielnachrichten:
+"Guten Tag! Heute ist der 9. August. Es ist jetzt {{uhrzeit}}. Aktuell ist es überwiegend sonnig bei etwa 27 Grad Celsius. Im Nachmittag steigen die Temperaturen weiter bis auf rund 30 Grad. Auch am frühen Abend bleibt es weiterhin sonnig und angenehm – ein perfekter Spätsommertag!"
+"Guten Abend! Heute ist Samstag, der 29. November. Es ist jetzt {{uhrzeit}}. Aktuell ist es bedeckt bei 7 Grad, gefühlt sind es 5 Grad. Der Wind weht mit 13 Stundenkilometern aus Süden. Morgen erwarten dich ähnliche Temperaturen mit gelegentlichen Regenschauern. Am Montag wird es dann etwas kälter mit nur noch 6 Grad. Die Sonne geht morgen um 7:53 auf."
+"""
+
+INSTRUCTIONS_BIRTHDAY_EXTENSION = """
+
+---
+
+ZUSÄTZLICHE ANWEISUNGEN FÜR GEBURTSTAGSINFORMATIONEN
+
+Erweitere die Nachricht nach dem Wetterteil um eine kurze Information zu kommenden Geburtstagen, falls welche in den nächsten 14 Tagen im Kalender eingetragen sind. Die Geburtstagsinformationen sollen klar, ruhig und gut verständlich sein.
+
+Guidelines für Geburtstagsinformationen:
+* Die Wetter- und Zeitinformation kommt immer zuerst. Erst danach folgt ein kurzer Übergang zu den Geburtstagen.
+* Die Geburtstagsinformationen sind ein separater Absatz. Absätze sollen durch Zeilenumbrüche voneinander getrennt werden.
+* Wenn es einen oder mehrere Geburtstage innerhalb der nächsten 14 Tage gibt, fasse sie kurz zusammen.
+* Verwende vorzugsweise Formulierungen mit relativer Zeit UND Datum. Formulierungslogik für relative Zeit: immer relativ zu heute, basierend auf days_until_birthday. Beispiele:
+  - "In drei Tagen, am 12. März, wird deine Tochter Anna 75 Jahre alt."
+  - "Morgen, am 3. April, wird dein Enkel Paul 12 Jahre alt."
+  - "Heute, am 5. Mai, wird deine Enkelin Lisa 10 Jahre alt."
+* Wenn das Alter der Person bekannt ist, nenne es zusätzlich. Wenn kein Alter vorliegt, nenne nur den Geburtstag:
+  - "In sechs Tagen, am 15. März, hat deine Freundin Maria Geburtstag."
+* Verwende einfache, gut strukturierte Sätze und sprich den Nutzer mit "du" an.
+* Nenne die Beziehung (z. B. Tochter, Sohn, Enkel, Enkelin, Freund, Nachbar) zusammen mit dem Vornamen/Kurznamen, wenn diese Information vorhanden ist.
+* Runde Geburtstage sollen speziell hervorgehoben werden.
+
+Beispiele für Übergänge vom Wetterteil zu den Geburtstagen:
+* "Und jetzt noch ein kurzer Überblick über die nächsten Geburtstage. In den nächsten zwei Wochen stehen gleich drei Geburtstage an."
+* "Zum Schluss noch ein Blick auf die drei anstehenden Geburtstage in den nächsten zwei Wochen."
+* "Außer dem Wetter gibt es noch etwas Wichtiges: die nächsten Geburtstage. Es gibt zwei in den nächsten zwei Wochen."
+* "Das war der Wetterbericht. In den nächsten zwei Wochen steht kein Geburtstag an."
+* "Außerdem gibt es demnächst zwei Geburtstage, an die du denken kannst."
+
+Wenn es KEINE Geburtstage innerhalb der nächsten 14 Tage gibt, füge nach dem Wetter einen kurzen Satz hinzu, zum Beispiel:
+* "In den nächsten zwei Wochen steht kein Geburtstag an."
+* "In den kommenden zwei Wochen hat niemand Geburtstag."
+* "Es gibt keine Geburtstage in den nächsten zwei Wochen."
+
+Achte weiterhin darauf, dass die gesamte Nachricht kompakt bleibt. Die Geburtstagsinformationen sollen sich in den vorhandenen Rahmen einfügen und die Nachricht nicht unnötig verlängern. Wenn nötig, kann der Wetterteil etwas knapper gehalten werden, damit die Gesamtlänge in einem ähnlichen Umfang bleibt.
+
+---
+
+GEBURTSTAGSMETADATEN (JSON)
+
+Die Geburtstagsdaten in der Nachricht des Nutzers stehen dir als JSON-Array zur Verfügung. Jeder Eintrag kann u. a. folgende Felder enthalten:
+* "name": Vorname/Kurzname/Name der Person (z. B. "Anna")
+* "relation": Beziehung zum Nutzer (z. B. "Tochter", "Sohn", "Enkel", "Enkelin", "Freund", "Nachbar")
+* "date": Datum des nächsten Geburtstags im ISO-Format (z. B. "2025-03-12")
+* "days_until_birthday": Anzahl der Tage bis zum nächsten Geburtstag (Ganzzahl)
+* "age": Alter, das die Person an diesem Geburtstag erreicht (Ganzzahl, optional)
+
+Nutze diese Daten, um die oben beschriebenen Geburtstagsinformationen zu formulieren.
+"""
+
+# Only the per-request data goes into the user message. Everything above is
+# static and sent as cacheable system prompt prefix (see `_build_system_prompt`).
+USER_PROMPT_BASE = """WOCHENTAG, DATUM UND ZEIT
+{{local_datetime_hints}}
+
+---
+
+WETTER- UND VORHERSAGEDATEN
+{{weather_forecast_json}}
+"""
+
+USER_PROMPT_BIRTHDAY_EXTENSION = """
+---
+
+GEBURTSTAGSDATEN
+{{birthday_calendar_json}}
+"""
+
+# Sent instead of the birthday data if it was dropped to meet the deadline
+BIRTHDAY_CALENDAR_UNAVAILABLE = (
+    "Nicht verfügbar. Erwähne in dieser Nachricht keine Geburtstage."
+)
+
+weather_api_client = WeatherApiClient(api_key=WEATHER_API_KEY, lang=WEATHER_API_LANG)
+# Clients and the Contentful SDK are loaded on first use (see `LazyClient`)
+bedrock_client = LazyClient("bedrock-runtime", region_name=BEDROCK_REGION)
+s3_client = LazyClient("s3")
+
+default_profile = DeviceProfile(
+    location=WEATHER_API_LOCATION,
+    language=WEATHER_API_LANG,
+    birthday_calendar=(
+        BirthdayCalendarSource(
+            contentful_space_id=CONTENTFUL_SPACE_ID,
+            contentful_access_token=CONTENTFUL_ACCESS_TOKEN,
+        )
+        if INCLUDE_BIRTHDAY_CALENDAR
+        else None
+    ),
+)
+device_profiles = DeviceProfiles(s3_client, BUCKET_NAME, default_profile)
+
+forecast_cache = ForecastCache(
+    s3_client,
+    BUCKET_NAME,
+    ttl_seconds=FORECAST_CACHE_TTL_SECONDS,
+    max_age_seconds=STALE_FORECAST_MAX_AGE_SECONDS,
+)
+birthday_calendar_cache = TtlCache(ttl_seconds=BIRTHDAY_CALENDAR_CACHE_TTL_SECONDS)
+message_cache = MessageCache(
+    s3_client, BUCKET_NAME, ttl_seconds=MESSAGE_CACHE_BUCKET_MINUTES * 60
+)
+model_router = ModelRouter(
+    BEDROCK_MODEL_ID,
+    BEDROCK_FALLBACK_MODEL_ID,
+    hedge_percentile=LLM_HEDGE_PERCENTILE,
+    default_hedge_delay_seconds=LLM_HEDGE_DEFAULT_DELAY_SECONDS,
+)
+# Runs the LLM calls, so that a request can stop waiting for a slow call
+llm_executor = ThreadPoolExecutor(max_workers=2)
+
+
+class BriefingError(Exception):
+    """
+    A briefing could not be generated. `code` is the error code reported to
+    the client (e.g. "WEATHER_FETCH_FAILED").
+    """
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def generate_sentences(
+    now: datetime,
+    mode: str = BRIEFING_MODE,
+    fallback: bool = True,
+    deadline: Deadline | None = None,
+    profile: DeviceProfile | None = None,
+    on_sentence: Callable[[str], None] | None = None,
+) -> list[str]:
+    """
+    Generate the briefing for `now` as a list of sentences.
+
+    The sentences contain the time placeholder (see `render_time`) instead of
+    the current clock time. A message generated earlier from the same inputs
+    (forecast, birthdays, time bucket) is reused without calling Bedrock, also
+    for other devices whose profiles lead to the same inputs.
+
+    With a deadline, each stage only gets the remaining time. As the deadline
+    approaches, a cached (possibly stale) forecast is used, optional data is
+    dropped, `maxTokens` is capped and finally the template briefing is used.
+    Messages generated from reduced data are not cached.
+
+    Args:
+        now: The current local time.
+        mode: 'llm' or 'template' (rule-based, without Bedrock).
+        fallback: Use the template briefing if the LLM call fails or does not
+            finish within `LLM_LATENCY_BUDGET_SECONDS` (or the deadline).
+            Without fallback, the LLM call is awaited without time limit.
+        deadline: The time budget of the request, if any.
+        profile: The profile of the device (location, timezone, language and
+            birthday calendar); the default profile if None.
+        on_sentence: Called with each sentence of the model output as soon as
+            it is complete (e.g. to start its audio, see `AudioPrefetch`),
+            from the thread of the model call. Not called for cached or
+            template briefings, and the returned sentences may differ (e.g.
+            after a fallback).
+
+    Raises:
+        BriefingError: If fetching data or generating the message failed.
+    """
+    deadline = deadline or Deadline(None)
+    profile = profile or default_profile
+    include_birthdays = profile.birthday_calendar is not None
+    datetime_hints = _get_local_datetime_hints(now)
+
+    # 1) Fetch + normalize forecast (cached for a few minutes, shared by all
+    # devices in the same location cell)
+    try:
+        forecast = _get_forecast_within(profile, deadline)
+    except Exception as e:
+        raise BriefingError("WEATHER_FETCH_FAILED", repr(e)) from e
+
+    # None if the birthdays were dropped for lack of time
+    birthday_calendar_items = _get_birthday_calendar_items(
+        now, deadline, profile.birthday_calendar, profile.timezone
+    )
+
+    if mode == "template":
+        return _render_template_sentences(
+            forecast, datetime_hints, birthday_calendar_items, include_birthdays
+        )
+
+    # 2) Reuse a message generated from the same inputs, if available
+    fingerprint = None
+    if birthday_calendar_items is not None:
+        fingerprint = message_fingerprint(
+            forecast,
+            birthday_calendar_items,
+            time_bucket(now, MESSAGE_CACHE_BUCKET_MINUTES),
+            variant=f"{profile.timezone}|birthdays={include_birthdays}",
+        )
+        sentences = message_cache.get(fingerprint)
+        metrics.put_cache_lookup("MessageCacheHit", sentences is not None)
+        if sentences is not None:
+            return sentences
+
+    llm_timeout = None
+    max_tokens = LLM_MAX_TOKENS
+    if fallback:
+        remaining = deadline.remaining() - TEMPLATE_RESERVE_SECONDS
+        if remaining < DEADLINE_LLM_MIN_SECONDS:
+            print(f"[DEBUG] deadline: {deadline.remaining():.1f}s left, no LLM call")
+            return _render_template_sentences(
+                forecast, datetime_hints, birthday_calendar_items, include_birthdays
+            )
+        llm_timeout = min(LLM_LATENCY_BUDGET_SECONDS, remaining)
+        max_tokens = min(
+            LLM_MAX_TOKENS, int(llm_timeout * LLM_OUTPUT_TOKENS_PER_SECOND)
+        )
+
+    # 3) Build prompts
+    forecast_token_budget = FORECAST_TOKEN_BUDGET
+    if deadline.remaining() < DEADLINE_FULL_FORECAST_MIN_SECONDS:
+        forecast_token_budget = min(
+            FORECAST_TOKEN_BUDGET, FORECAST_TOKEN_BUDGET_REDUCED
+        )
+    with metrics.timer("PromptBuild"):
+        system = _build_system_prompt(include_birthdays)
+        messages = _build_messages(
+            datetime_hints,
+            forecast,
+            birthday_calendar_items,
+            forecast_token_budget,
+            include_birthdays,
+        )
+
+    metrics.log_verbose("system prompt", system)
+    metrics.log_verbose("messages", messages)
+
+    # Only messages from the full inputs are reused
+    if max_tokens < LLM_MAX_TOKENS or forecast_token_budget < FORECAST_TOKEN_BUDGET:
+        print(f"[DEBUG] deadline: degraded (maxTokens={max_tokens})")
+        fingerprint = None
+
+    # 4) Call Bedrock ConverseStream (within the latency budget)
+    abandoned = threading.Event()
+    future = llm_executor.submit(
+        _generate_llm_sentences,
+        system,
+        messages,
+        max_tokens,
+        fingerprint,
+        llm_timeout,
+        on_sentence,
+        abandoned,
+    )
+    try:
+        return future.result(timeout=llm_timeout)
+    except TimeoutError:
+        # Stop the call, so that it neither occupies `llm_executor` nor
+        # records metrics or caches a message after the request moved on
+        abandoned.set()
+        error = BriefingError(
+            "LLM_TIMEOUT", f"No model output within {llm_timeout:.1f}s"
+        )
+    except BriefingError as e:
+        if not fallback:
+            raise
+        error = e
+
+    print(f"[ERROR] {error.code}: {error} (falling back to template)")
+    metrics.put("TemplateFallback", 1)
+    return _render_template_sentences(
+        forecast, datetime_hints, birthday_calendar_items, include_birthdays
+    )
+
+
+def save_prerender(sentences: list[str], profile_id: str = DEFAULT_PROFILE_ID) -> None:
+    """
+    Store pre-rendered sentences (with time placeholder) as the latest briefing
+    of a device profile.
+    """
+    with metrics.timer("S3Put"):
+        s3_client.put_object(
+            Bucket=BUCKET_NAME,
+            Key=_prerender_key(profile_id),
+            Body=json.dumps(
+                {"generated_at": time.time(), "sentences": sentences},
+                ensure_ascii=False,
+            ).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+def load_prerender(
+    max_age_seconds: float, profile_id: str = DEFAULT_PROFILE_ID
+) -> list[str] | None:
+    """
+    Return the latest pre-rendered sentences of a device profile, or None if
+    there is no pre-render or it is older than `max_age_seconds`.
+    """
+    try:
+        with metrics.timer("S3Get"):
+            obj = s3_client.get_object(
+                Bucket=BUCKET_NAME, Key=_prerender_key(profile_id)
+            )
+            prerender = json.loads(obj["Body"].read())
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            print(f"[ERROR] PRERENDER_READ_FAILED: {repr(e)}")
+        metrics.put_cache_lookup("PrerenderHit", False)
+        return None
+
+    age_seconds = time.time() - prerender["generated_at"]
+    print(f"[DEBUG] prerender age: {age_seconds:.0f}s")
+    fresh = age_seconds <= max_age_seconds
+    metrics.put_cache_lookup("PrerenderHit", fresh)
+    return prerender["sentences"] if fresh else None
+
+
+def _prerender_key(profile_id: str) -> str:
+    return f"{PRERENDER_PREFIX}/{profile_id}.json"
+
+
+def _generate_llm_sentences(
+    system: list[dict[str, Any]],
+    messages: list[dict[str, Any]],
+    max_tokens: int,
+    fingerprint: str | None,
+    budget_seconds: float | None = None,
+    on_sentence: Callable[[str], None] | None = None,
+    abandoned: threading.Event | None = None,
+) -> list[str]:
+    abandoned = abandoned or threading.Event()
+    # A hedged call runs on after the other one won. Only the call whose
+    # sentences are used reports its metrics (after the router returned), and
+    # only one call at a time forwards its sentences to `on_sentence`: the
+    # first one that generated a sentence, until it fails or the other wins.
+    forwarding: dict[str, Any] = {"model_id": None, "count": 0}
+    forwarding_lock = threading.Lock()
+
+    def forward(model_id: str, sentences: list[str]) -> None:
+        with forwarding_lock:
+            if abandoned.is_set() or forwarding["model_id"] not in (None, model_id):
+                return
+            forwarding["model_id"] = model_id
+            new_sentences = sentences[forwarding["count"] :]
+            forwarding["count"] = len(sentences)
+        for sentence in new_sentences:
+            on_sentence(sentence)
+
+    def call_model(model_id: str) -> tuple[str, list[str], dict[str, Any]]:
+        # The sentences are collected until the output is complete: the
+        # response is returned as a whole (API Gateway does not stream it), so
+        # streaming only frames it as one NDJSON line per sentence. Only
+        # `on_sentence` sees the sentences as they are generated.
+        sentences = []
+        report: dict[str, Any] = {}
+        started_at = time.perf_counter()
+        try:
+            for sentence in _stream_llm_sentences(
+                system, messages, max_tokens, model_id, abandoned, report
+            ):
+                sentences.append(sentence)
+                if on_sentence is not None:
+                    forward(model_id, sentences)
+            if not sentences:
+                raise BriefingError("LLM_EMPTY_OUTPUT", "Empty model output")
+        except Exception:
+            # Let the other call forward its sentences
+            with forwarding_lock:
+                if forwarding["model_id"] == model_id:
+                    forwarding.update(model_id=None, count=0)
+            raise
+        report["bedrock_ms"] = round((time.perf_counter() - started_at) * 1000, 1)
+        return model_id, sentences, report
+
+    try:
+        model_id, sentences, report = model_router.call(
+            call_model, budget_seconds, abandoned
+        )
+    except BriefingError:
+        raise
+    except ClientError as e:
+        raise BriefingError("BEDROCK_CLIENT_ERROR", repr(e)) from e
+    except Exception as e:
+        raise BriefingError("BEDROCK_CALL_FAILED", repr(e)) from e
+
+    with forwarding_lock:
+        # The call that lost stops forwarding
+        forwarding["model_id"] = model_id
+
+    if abandoned.is_set():
+        return sentences
+
+    # Like `metrics.timer`, but only for the call whose sentences are used
+    metrics.put_property("ModelId", model_id)
+    metrics.put("Bedrock", report["bedrock_ms"], "Milliseconds")
+    if "first_sentence_ms" in report:
+        metrics.put("BedrockFirstSentence", report["first_sentence_ms"], "Milliseconds")
+    _put_token_metrics(report.get("usage") or {})
+    metrics.log_verbose("llm_sentences", sentences)
+
+    # Messages without the time placeholder contain a fixed clock time
+    # and must not be reused.
+    if fingerprint is not None and has_time_placeholder(sentences):
+        message_cache.put(fingerprint, sentences)
+
+    return sentences
+
+
+def _render_template_sentences(
+    forecast: ForecastDescription,
+    datetime_hints: DatetimeHints,
+    birthday_calendar_items: list[BirthdayCalendarItem] | None,
+    include_birthdays: bool,
+) -> list[str]:
+    # Template briefings are cheap to render and are never cached
+    sentences = render_briefing_sentences(
+        forecast,
+        datetime_hints,
+        birthday_calendar_items if include_birthdays else None,
+    )
+    metrics.log_verbose("template_sentences", sentences)
+    return sentences
+
+
+def _get_forecast_within(
+    profile: DeviceProfile, deadline: Deadline
+) -> ForecastDescription:
+    cell = location_cell(profile.location, FORECAST_GRID_DEGREES)
+    cached = forecast_cache.get(cell, profile.language)
+    fresh = cached is not None and cached[1] <= FORECAST_CACHE_TTL_SECONDS
+    metrics.put_cache_lookup("ForecastCacheHit", fresh)
+    if fresh:
+        return cached[0]
+
+    stale_forecast = cached[0] if cached is not None else None
+    # Leave time for the message: with a stale forecast to fall back to, enough
+    # for an LLM call, otherwise at least for the template briefing
+    reserve = (
+        DEADLINE_LLM_MIN_SECONDS
+        if stale_forecast is not None
+        else TEMPLATE_RESERVE_SECONDS
+    )
+    timeout = min(WEATHER_API_TIMEOUT_SECONDS, deadline.remaining() - reserve)
+    if timeout > 0:
+        try:
+            forecast = _get_forecast(cell, profile.language, timeout)
+            forecast_cache.put(cell, profile.language, forecast)
+            return forecast
+        except Exception as e:
+            if stale_forecast is None:
+                raise
+            print(f"[ERROR] WEATHER_FETCH_FAILED: {repr(e)} (using cached forecast)")
+
+    if stale_forecast is None:
+        raise TimeoutError("No time left to fetch the forecast")
+    print("[DEBUG] forecast: using stale cached forecast")
+    return stale_forecast
+
+
+def _get_forecast(
+    location: str, language: str, timeout: float = WEATHER_API_TIMEOUT_SECONDS
+) -> ForecastDescription:
+    forecast_days = 3
+    with metrics.timer("WeatherFetch"):
+        wa_forecast = weather_api_client.get_forecast_data(
+            q=location,
+            days=forecast_days,
+            include_aqi=True,
+            include_alerts=True,
+            timeout=timeout,
+            lang=language,
+        )
+    return weather_api_forecast_data_to_forecast_description(wa_forecast)
+
+
+def _get_birthday_calendar_items(
+    now: datetime,
+    deadline: Deadline,
+    calendar: BirthdayCalendarSource | None,
+    tz_name: str,
+) -> list[BirthdayCalendarItem] | None:
+    if calendar is None:
+        return []
+
+    key = f"{calendar.contentful_space_id}/{tz_name}/{now.date().isoformat()}"
+    all_birthday_calendar_items = birthday_calendar_cache.get(key)
+    metrics.put_cache_lookup(
+        "BirthdayCacheHit", all_birthday_calendar_items is not None
+    )
+    if all_birthday_calendar_items is None:
+        if deadline.remaining() < DEADLINE_BIRTHDAYS_MIN_SECONDS:
+            print("[DEBUG] deadline: birthdays dropped")
+            return None
+        all_birthday_calendar_items = _get_birthday_calendar(calendar, tz_name)
+        birthday_calendar_cache.put(key, all_birthday_calendar_items)
+
+    return [
+        item
+        for item in all_birthday_calendar_items
+        if 0 <= item.days_until_birthday <= 14
+    ]
+
+
+def _get_birthday_calendar(
+    calendar: BirthdayCalendarSource, tz_name: str
+) -> list[BirthdayCalendarItem]:
+    import contentful
+
+    with metrics.timer("Contentful"):
+        client = contentful.Client(
+            calendar.contentful_space_id, calendar.contentful_access_token
+        )
+        cf_birthday_calendar_items = client.entries(
+            {"content_type": "birthdayCalendarItem"}
+        )
+
+    return map_contentful_birthday_items(cf_birthday_calendar_items, tz_name=tz_name)
+
+
+def _get_local_datetime_hints(now: datetime) -> DatetimeHints:
+    tomorrow = now + timedelta(days=1)
+    day_after_tomorrow = now + timedelta(days=2)
+
+    return DatetimeHints(
+        now=now.strftime("%A, %Y-%m-%d %H:%M:%S"),
+        tomorrow=tomorrow.strftime("%A, %Y-%m-%d"),
+        day_after_tomorrow=day_after_tomorrow.strftime("%A, %Y-%m-%d"),
+    )
+
+
+def _build_system_prompt(include_birthdays: bool = True) -> list[dict[str, Any]]:
+    """
+    Build the static system prompt, followed by a Bedrock cache point.
+
+    The system prompt and the instructions (guidelines and examples) are the
+    same on every call (one variant with and one without birthdays), so
+    Bedrock can reuse the processed prefix up to the cache point and only the
+    per-request data in the user message is new. Prompts below the model's
+    minimum cacheable length are simply not cached.
+    """
+    instructions = INSTRUCTIONS_BASE
+    if include_birthdays:
+        instructions += INSTRUCTIONS_BIRTHDAY_EXTENSION
+    return [
+        {"text": SYSTEM_PROMPT},
+        {"text": instructions},
+        {"cachePoint": {"type": "default"}},
+    ]
+
+
+def _build_messages(
+    datetime_hints: DatetimeHints,
+    forecast: ForecastDescription,
+    birthday_calendar_items: list[BirthdayCalendarItem] | None,
+    forecast_token_budget: int = FORECAST_TOKEN_BUDGET,
+    include_birthdays: bool = True,
+) -> list[dict[str, Any]]:
+    user_prompt = USER_PROMPT_BASE
+    if include_birthdays:
+        user_prompt += USER_PROMPT_BIRTHDAY_EXTENSION
+    birthday_calendar_json = (
+        BIRTHDAY_CALENDAR_UNAVAILABLE
+        if birthday_calendar_items is None
+        else json.dumps(
+            [item.model_dump_json() for item in birthday_calendar_items],
+            ensure_ascii=False,
+        )
+    )
+    user_prompt_filled = (
+        user_prompt.replace(
+            "{{local_datetime_hints}}", datetime_hints.model_dump_json()
+        )
+        .replace(
+            "{{weather_forecast_json}}",
+            forecast_description_to_compact_json(
+                forecast, token_budget=forecast_token_budget
+            ),
+        )
+        .replace("{{birthday_calendar_json}}", birthday_calendar_json)
+    )
+    return [{"role": "user", "content": [{"text": user_prompt_filled}]}]
+
+
+def _stream_llm_sentences(
+    system: list[dict[str, Any]],
+    messages: list[dict[str, Any]],
+    max_tokens: int = LLM_MAX_TOKENS,
+    model_id: str = BEDROCK_MODEL_ID,
+    abandoned: threading.Event | None = None,
+    report: dict[str, Any] | None = None,
+) -> Iterator[str]:
+    """
+    Call Bedrock ConverseStream and yield complete sentences as they are generated.
+
+    If the output was cut off at `max_tokens`, the incomplete last sentence is
+    dropped. The token usage ("usage") and the time to the first sentence
+    ("first_sentence_ms") are stored in `report`, for the caller to put into
+    the metrics if the output is used.
+
+    Raises:
+        BriefingError: "LLM_ABANDONED" if `abandoned` is set while the output
+            is being read (the stream is closed).
+    """
+    resp = bedrock_client.converse_stream(
+        modelId=model_id,
+        system=system,
+        messages=messages,
+        inferenceConfig={
+            "maxTokens": max_tokens,
+            "temperature": 0.4,
+            "topP": 0.9,
+        },
+    )
+
+    report = report if report is not None else {}
+    started_at = time.perf_counter()
+    first_sentence = True
+    buffer = ""
+    stop_reason = None
+    stream = resp["stream"]
+    for stream_event in stream:
+        if abandoned is not None and abandoned.is_set():
+            if hasattr(stream, "close"):
+                stream.close()
+            raise BriefingError("LLM_ABANDONED", "The request stopped waiting")
+        if "messageStop" in stream_event:
+            stop_reason = stream_event["messageStop"].get("stopReason")
+            continue
+        if "metadata" in stream_event:
+            report["usage"] = stream_event["metadata"].get("usage") or {}
+            continue
+        delta = stream_event.get("contentBlockDelta", {}).get("delta", {})
+        text = delta.get("text")
+        if not text:
+            continue
+        buffer += text
+        sentences, buffer = pop_sentences(buffer)
+        if sentences and first_sentence:
+            first_sentence = False
+            report["first_sentence_ms"] = round(
+                (time.perf_counter() - started_at) * 1000, 1
+            )
+        yield from sentences
+
+    if stop_reason == "max_tokens":
+        print("[DEBUG] llm output cut off at maxTokens:", buffer)
+        return
+    sentences, _ = pop_sentences(buffer, final=True)
+    yield from sentences
+
+
+def _put_token_metrics(usage: dict[str, int]) -> None:
+    # Token counts drive the Bedrock cost; cache reads are billed at a discount
+    for key, name in (
+        ("inputTokens", "InputTokens"),
+        ("outputTokens", "OutputTokens"),
+        ("cacheReadInputTokens", "CacheReadInputTokens"),
+        ("cacheWriteInputTokens", "CacheWriteInputTokens"),
+    ):
+        if key in usage:
+            metrics.put(name, usage[key])
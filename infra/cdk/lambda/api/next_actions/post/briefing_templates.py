@@ -0,0 +1,277 @@
+from datetime import datetime
+
+from api.next_actions.post.message_cache import TIME_PLACEHOLDER
+from api.next_actions.post.models import (
+    Astro,
+    BirthdayCalendarItem,
+    DatetimeHints,
+    ForecastDescription,
+)
+
+_DE_WEEKDAYS = [
+    "Montag",
+    "Dienstag",
+    "Mittwoch",
+    "Donnerstag",
+    "Freitag",
+    "Samstag",
+    "Sonntag",
+]
+
+_DE_MONTHS = [
+    "Januar",
+    "Februar",
+    "März",
+    "April",
+    "Mai",
+    "Juni",
+    "Juli",
+    "August",
+    "September",
+    "Oktober",
+    "November",
+    "Dezember",
+]
+
+_DE_NUMBER_WORDS = [
+    "null",
+    "einem",
+    "zwei",
+    "drei",
+    "vier",
+    "fünf",
+    "sechs",
+    "sieben",
+    "acht",
+    "neun",
+    "zehn",
+    "elf",
+    "zwölf",
+    "dreizehn",
+    "vierzehn",
+]
+
+# Relations that take the feminine possessive ("deine Tochter")
+_FEMININE_RELATIONS = {
+    "tochter",
+    "enkelin",
+    "freundin",
+    "nachbarin",
+    "schwester",
+    "mutter",
+    "oma",
+    "tante",
+    "nichte",
+    "cousine",
+    "frau",
+    "schwiegertochter",
+    "urenkelin",
+}
+
+HOT_TEMP_C = 30
+COLD_TEMP_C = -5
+STORM_GUST_KPH = 60
+RAIN_CHANCE_PERCENT = 50
+
+
+def render_briefing_sentences(
+    forecast: ForecastDescription,
+    datetime_hints: DatetimeHints,
+    birthday_calendar_items: list[BirthdayCalendarItem] | None,
+) -> list[str]:
+    """
+    Render a briefing from fixed German sentence templates, without an LLM.
+
+    Covers the same topics as the generated briefing in a fixed order: greeting,
+    date and time, current conditions, the rest of the day, warnings, tomorrow,
+    the sunrise (when it is dark) and upcoming birthdays. Like the generated
+    briefing, the current time is written as time placeholder.
+
+    Args:
+        forecast: The normalized forecast.
+        datetime_hints: Local date/time hints (`now` as "%A, %Y-%m-%d %H:%M:%S").
+        birthday_calendar_items: Birthdays within the next 14 days, or None if
+            the birthday calendar is not included.
+
+    Returns:
+        list[str]: The sentences of the briefing.
+    """
+    now = datetime.strptime(datetime_hints.now.split(", ", 1)[1], "%Y-%m-%d %H:%M:%S")
+
+    sentences = [
+        _greeting(now),
+        f"Heute ist {_DE_WEEKDAYS[now.weekday()]}, der {_date(now)}.",
+        f"Es ist jetzt {TIME_PLACEHOLDER}.",
+    ]
+    sentences += _current_sentences(forecast)
+    sentences += _rest_of_day_sentences(forecast)
+    sentences += _warning_sentences(forecast)
+    sentences += _tomorrow_sentences(forecast)
+    sentences += _sunrise_sentences(forecast, now)
+    if birthday_calendar_items is not None:
+        sentences += _birthday_sentences(birthday_calendar_items)
+
+    return sentences
+
+
+def _greeting(now: datetime) -> str:
+    if 5 <= now.hour < 11:
+        return "Guten Morgen!"
+    if 11 <= now.hour < 18:
+        return "Guten Tag!"
+    if 18 <= now.hour < 23:
+        return "Guten Abend!"
+    return "Hallo!"
+
+
+def _date(value: datetime) -> str:
+    return f"{value.day}. {_DE_MONTHS[value.month - 1]}"
+
+
+def _degrees(value: float) -> str:
+    return f"{round(value)} Grad"
+
+
+def _current_sentences(forecast: ForecastDescription) -> list[str]:
+    current = forecast.current
+    sentence = (
+        f"Aktuell: {current.condition.text.strip()} bei {_degrees(current.temp_c)}"
+    )
+    if abs(current.feelslike_c - current.temp_c) >= 3:
+        sentence += f", gefühlt sind es {_degrees(current.feelslike_c)}"
+    return [sentence + "."]
+
+
+def _rest_of_day_sentences(forecast: ForecastDescription) -> list[str]:
+    hours = forecast.hours_today
+    if not hours:
+        return []
+
+    sentences = []
+    current_temp = forecast.current.temp_c
+    max_temp = max(h.temp_c for h in hours)
+    min_temp = min(h.temp_c for h in hours)
+    if max_temp >= current_temp + 2:
+        sentences.append(
+            f"Im Tagesverlauf steigen die Temperaturen auf bis zu {_degrees(max_temp)}."
+        )
+    elif min_temp <= current_temp - 2:
+        sentences.append(f"Bis zum Abend kühlt es auf etwa {_degrees(min_temp)} ab.")
+
+    rainy_hour = next(
+        (h for h in hours if h.chance_of_rain >= RAIN_CHANCE_PERCENT or h.will_it_rain),
+        None,
+    )
+    if rainy_hour is not None:
+        sentences.append(
+            f"Ab etwa {_clock_time(rainy_hour.time[-5:])} kann es regnen, denk an einen Schirm."
+        )
+    else:
+        sentences.append("Für den Rest des Tages ist kein Regen zu erwarten.")
+
+    return sentences
+
+
+def _warning_sentences(forecast: ForecastDescription) -> list[str]:
+    sentences = [
+        f"Achtung: {alert.headline.strip().rstrip('.')}."
+        for alert in forecast.alerts[:2]
+    ]
+
+    temps = [forecast.current.temp_c] + [h.temp_c for h in forecast.hours_today]
+    gusts = [forecast.current.gust_kph] + [h.gust_kph for h in forecast.hours_today]
+    if max(temps) >= HOT_TEMP_C:
+        sentences.append("Es wird heiß, denk bitte daran, viel zu trinken.")
+    elif min(temps) <= COLD_TEMP_C:
+        sentences.append("Es ist sehr kalt, zieh dich warm an.")
+    if max(gusts) >= STORM_GUST_KPH:
+        sentences.append(
+            f"Es gibt stürmische Böen bis {round(max(gusts))} Stundenkilometer, sei draußen bitte vorsichtig."
+        )
+
+    aq = forecast.current.air_quality
+    if aq is not None and aq.us_epa_index >= 4:
+        sentences.append("Die Luftqualität ist heute schlecht.")
+
+    return sentences
+
+
+def _tomorrow_sentences(forecast: ForecastDescription) -> list[str]:
+    if len(forecast.days_overview) < 2:
+        return []
+
+    tomorrow = forecast.days_overview[1].summary
+    sentence = (
+        f"Morgen: {tomorrow.condition.text.strip()}, "
+        f"{round(tomorrow.mintemp_c)} bis {_degrees(tomorrow.maxtemp_c)}"
+    )
+    if tomorrow.daily_chance_of_rain >= RAIN_CHANCE_PERCENT:
+        sentence += f", die Regenwahrscheinlichkeit liegt bei {tomorrow.daily_chance_of_rain} Prozent"
+    return [sentence + "."]
+
+
+def _sunrise_sentences(forecast: ForecastDescription, now: datetime) -> list[str]:
+    if forecast.current.is_day:
+        return []
+
+    # Before noon the next sunrise is today's, in the evening it is tomorrow's
+    if now.hour < 12 and forecast.astro_today is not None:
+        return [f"Die Sonne geht heute um {_sunrise(forecast.astro_today)} auf."]
+    if now.hour >= 12 and forecast.astro_tomorrow is not None:
+        return [f"Die Sonne geht morgen um {_sunrise(forecast.astro_tomorrow)} auf."]
+    return []
+
+
+def _sunrise(astro: Astro) -> str:
+    # WeatherAPI uses "05:51 AM"
+    return _clock_time(datetime.strptime(astro.sunrise, "%I:%M %p").strftime("%H:%M"))
+
+
+def _clock_time(hh_mm: str) -> str:
+    # "07:53" -> "7:53"
+    return hh_mm.lstrip("0") if not hh_mm.startswith("00") else hh_mm[1:]
+
+
+def _birthday_sentences(items: list[BirthdayCalendarItem]) -> list[str]:
+    if not items:
+        return ["In den nächsten zwei Wochen steht kein Geburtstag an."]
+
+    items = sorted(items, key=lambda item: item.days_until_birthday)
+    if len(items) == 1:
+        sentences = ["In den nächsten zwei Wochen steht ein Geburtstag an."]
+    else:
+        sentences = [
+            f"In den nächsten zwei Wochen stehen {_DE_NUMBER_WORDS[min(len(items), 14)]} Geburtstage an."
+        ]
+
+    for item in items:
+        birthday = datetime.strptime(item.date, "%Y-%m-%d")
+        when = f"{_relative_day(item.days_until_birthday)}, am {_date(birthday)}"
+        who = item.name
+        if item.relation:
+            possessive = (
+                "deine" if item.relation.lower() in _FEMININE_RELATIONS else "dein"
+            )
+            who = f"{possessive} {item.relation} {item.name}"
+
+        if item.age is not None:
+            sentence = f"{when}, wird {who} {item.age} Jahre alt."
+            if item.age % 10 == 0:
+                sentence += " Ein runder Geburtstag!"
+        else:
+            sentence = f"{when}, hat {who} Geburtstag."
+        sentences.append(sentence)
+
+    return sentences
+
+
+def _relative_day(days: int) -> str:
+    if days == 0:
+        return "Heute"
+    if days == 1:
+        return "Morgen"
+    if days == 2:
+        return "Übermorgen"
+    return (
+        f"In {_DE_NUMBER_WORDS[days] if days < len(_DE_NUMBER_WORDS) else days} Tagen"
+    )
@@ -0,0 +1,122 @@
+import json
+import re
+import time
+from typing import Any
+from urllib.parse import quote
+
+from botocore.exceptions import ClientError
+
+from api.next_actions.post.models import ForecastDescription
+from utils.metrics import metrics
+from utils.ttl_cache import TtlCache
+
+_LAT_LON = re.compile(r"\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*")
+
+
+def location_cell(location: str, grid_degrees: float) -> str:
+    """
+    Normalize a WeatherAPI location query, so that nearby devices share one
+    forecast.
+
+    "lat,lon" coordinates are snapped to a grid of `grid_degrees` (0.05
+    degrees is about 5 km); the returned cell is also the query sent to
+    WeatherAPI. Other queries (city names, postcodes) are only lowercased.
+    """
+    match = _LAT_LON.fullmatch(location)
+    if match is None or grid_degrees <= 0:
+        return " ".join(location.lower().split())
+    lat, lon = (
+        round(round(float(value) / grid_degrees) * grid_degrees, 4)
+        for value in match.groups()
+    )
+    return f"{lat:g},{lon:g}"
+
+
+class ForecastCache:
+    """
+    Cache for normalized forecasts per location cell and language.
+
+    Looks up the in-memory cache of the warm Lambda environment first and falls
+    back to S3, which is shared by all environments (and the prerender job).
+    A forecast fetched by one environment is thus used by all devices in the
+    same cell, and each cell is fetched from WeatherAPI about once per TTL,
+    independent of the number of devices.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket_name: str,
+        ttl_seconds: float,
+        max_age_seconds: float,
+        prefix: str = "next-actions/forecasts",
+    ):
+        self.ttl_seconds = ttl_seconds
+        self._s3 = s3_client
+        self._bucket_name = bucket_name
+        self._prefix = prefix
+        self._memory = TtlCache(ttl_seconds=max_age_seconds, max_entries=256)
+
+    def get(self, cell: str, language: str) -> tuple[ForecastDescription, float] | None:
+        """
+        Return the newest known forecast of the cell and its age in seconds,
+        or None if there is none within `max_age_seconds`. The forecast is
+        fresh if its age is within `ttl_seconds`; older ones are stale but
+        can be used while WeatherAPI is slow or unavailable.
+        """
+        key = self._key(cell, language)
+        entry = self._memory.get(key)
+        if entry is not None and time.time() - entry[0] <= self.ttl_seconds:
+            return entry[1], time.time() - entry[0]
+
+        # Another environment may have fetched a newer forecast
+        stored = self._read(key)
+        if stored is not None and (entry is None or stored[0] > entry[0]):
+            self._memory.put(key, stored)
+            entry = stored
+        if entry is None:
+            return None
+        age_seconds = time.time() - entry[0]
+        if age_seconds > self._memory.ttl_seconds:
+            return None
+        return entry[1], age_seconds
+
+    def put(self, cell: str, language: str, forecast: ForecastDescription) -> None:
+        key = self._key(cell, language)
+        fetched_at = time.time()
+        self._memory.put(key, (fetched_at, forecast))
+        try:
+            with metrics.timer("S3Put"):
+                self._s3.put_object(
+                    Bucket=self._bucket_name,
+                    Key=key,
+                    Body=json.dumps(
+                        {
+                            "fetched_at": fetched_at,
+                            "forecast": forecast.model_dump(mode="json"),
+                        },
+                        ensure_ascii=False,
+                    ).encode("utf-8"),
+                    ContentType="application/json",
+                )
+        except ClientError as e:
+            print(f"[ERROR] FORECAST_CACHE_WRITE_FAILED: {repr(e)}")
+
+    def _read(self, key: str) -> tuple[float, ForecastDescription] | None:
+        try:
+            with metrics.timer("S3Get"):
+                obj = self._s3.get_object(Bucket=self._bucket_name, Key=key)
+                stored = json.loads(obj["Body"].read())
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchKey":
+                print(f"[ERROR] FORECAST_CACHE_READ_FAILED: {repr(e)}")
+            return None
+        return (
+            stored["fetched_at"],
+            ForecastDescription.model_validate(stored["forecast"]),
+        )
+
+    def _key(self, cell: str, language: str) -> str:
+        # City names may contain spaces and umlauts
+        language, cell = quote(language, safe=""), quote(cell, safe=",.-")
+        return f"{self._prefix}/{language}/{cell}.json"
@@ -0,0 +1,130 @@
+from datetime import datetime
+import hashlib
+import json
+from typing import Any
+
+from botocore.exceptions import ClientError
+
+from api.next_actions.post.models import BirthdayCalendarItem, ForecastDescription
+from utils.metrics import metrics
+from utils.ttl_cache import TtlCache
+
+
+# The model writes this placeholder instead of the current clock time, so that a
+# generated message can be reused and only the time is filled in on each press.
+TIME_PLACEHOLDER = "{{uhrzeit}}"
+
+
+def time_bucket(now: datetime, minutes: int) -> str:
+    """
+    Return the start of the `minutes`-wide time bucket that contains `now`.
+    """
+    minute = (now.hour * 60 + now.minute) // minutes * minutes
+    return f"{now:%Y-%m-%d}T{minute // 60:02d}:{minute % 60:02d}"
+
+
+def message_fingerprint(
+    forecast: ForecastDescription,
+    birthdays: list[BirthdayCalendarItem],
+    bucket: str,
+    variant: str = "",
+) -> str:
+    """
+    Fingerprint the inputs of a generated message.
+
+    The forecast is normalized first: the exact local time is dropped and all
+    numbers are rounded, so that small changes between two WeatherAPI updates
+    (e.g. 26.8 -> 26.9 degrees) do not invalidate the cached message.
+    `variant` covers the remaining inputs of the device profile (e.g. the
+    timezone and whether birthdays are mentioned).
+    """
+    normalized = {
+        "forecast": _round_numbers(
+            forecast.model_dump(exclude={"localtime": {"local_datetime"}})
+        ),
+        "birthdays": [item.model_dump() for item in birthdays],
+        "bucket": bucket,
+        "variant": variant,
+    }
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def has_time_placeholder(sentences: list[str]) -> bool:
+    return any(TIME_PLACEHOLDER in sentence for sentence in sentences)
+
+
+def render_time(sentences: list[str], now: datetime) -> list[str]:
+    """
+    Replace the time placeholder with the current clock time (e.g. "13:33").
+    """
+    clock_time = f"{now:%H:%M}"
+    return [sentence.replace(TIME_PLACEHOLDER, clock_time) for sentence in sentences]
+
+
+class MessageCache:
+    """
+    Cache for generated messages (as sentences with time placeholder).
+
+    Looks up the in-memory cache of the warm Lambda environment first and falls
+    back to S3, which is shared by all environments of the function.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket_name: str,
+        ttl_seconds: float,
+        prefix: str = "next-actions/messages",
+    ):
+        self._s3 = s3_client
+        self._bucket_name = bucket_name
+        self._prefix = prefix
+        self._memory = TtlCache(ttl_seconds=ttl_seconds)
+
+    def get(self, fingerprint: str) -> list[str] | None:
+        sentences = self._memory.get(fingerprint)
+        if sentences is not None:
+            return sentences
+
+        try:
+            with metrics.timer("S3Get"):
+                obj = self._s3.get_object(
+                    Bucket=self._bucket_name, Key=self._key(fingerprint)
+                )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "NoSuchKey":
+                print(f"[ERROR] MESSAGE_CACHE_READ_FAILED: {repr(e)}")
+            return None
+
+        sentences = json.loads(obj["Body"].read())["sentences"]
+        self._memory.put(fingerprint, sentences)
+        return sentences
+
+    def put(self, fingerprint: str, sentences: list[str]) -> None:
+        self._memory.put(fingerprint, sentences)
+        try:
+            with metrics.timer("S3Put"):
+                self._s3.put_object(
+                    Bucket=self._bucket_name,
+                    Key=self._key(fingerprint),
+                    Body=json.dumps(
+                        {"sentences": sentences}, ensure_ascii=False
+                    ).encode("utf-8"),
+                    ContentType="application/json",
+                )
+        except ClientError as e:
+            print(f"[ERROR] MESSAGE_CACHE_WRITE_FAILED: {repr(e)}")
+
+    def _key(self, fingerprint: str) -> str:
+        return f"{self._prefix}/{fingerprint}.json"
+
+
+def _round_numbers(value: Any) -> Any:
+    if isinstance(value, float):
+        return round(value)
+    if isinstance(value, dict):
+        return {k: _round_numbers(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_round_numbers(v) for v in value]
+    return value
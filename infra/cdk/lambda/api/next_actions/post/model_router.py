@@ -0,0 +1,205 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyStats:
+    """
+    Latencies and outcomes of the most recent calls to one model.
+    """
+
+    def __init__(self, window: int = 50):
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._outcomes: deque[tuple[float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_seconds: float | None) -> None:
+        """
+        Record a successful call with its latency, or a failed call (None).
+        """
+        with self._lock:
+            self._outcomes.append((time.monotonic(), latency_seconds is not None))
+            if latency_seconds is not None:
+                self._latencies.append(latency_seconds)
+
+    def percentile(self, percent: float) -> float | None:
+        with self._lock:
+            if not self._latencies:
+                return None
+            latencies = sorted(self._latencies)
+        index = min(len(latencies) - 1, int(len(latencies) * percent / 100))
+        return latencies[index]
+
+    def failure_rate(self, max_age_seconds: float | None = None) -> float:
+        """
+        Return the share of failed calls (within the last `max_age_seconds`).
+        """
+        since = None if max_age_seconds is None else time.monotonic() - max_age_seconds
+        with self._lock:
+            outcomes = [ok for at, ok in self._outcomes if since is None or at >= since]
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "n": self.count(),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "failure_rate": round(self.failure_rate(), 2),
+        }
+
+
+class ModelRouter:
+    """
+    Routes LLM calls to a primary and a (faster) fallback model.
+
+    The route is chosen from in-memory latency statistics of the warm Lambda
+    environment: the primary model is preferred, unless its calls failed
+    within the last `failure_window_seconds` or its median latency does not fit
+    the time budget of the call while the fallback model's does.
+
+    Calls are hedged: if the first model has not answered within its
+    `hedge_percentile` latency (or `default_hedge_delay_seconds` while there
+    are too few samples), or if it fails, the same request is sent to the
+    next model and the first successful answer is used. The slower call is
+    not cancelled; it finishes in the background and still counts for the
+    statistics.
+    """
+
+    def __init__(
+        self,
+        primary_model_id: str,
+        fallback_model_id: str | None = None,
+        hedge_percentile: float = 90,
+        default_hedge_delay_seconds: float = 6.0,
+        min_samples: int = 5,
+        max_failure_rate: float = 0.5,
+        failure_window_seconds: float = 300,
+    ):
+        self.model_ids = [primary_model_id] + (
+            [fallback_model_id] if fallback_model_id else []
+        )
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay_seconds = default_hedge_delay_seconds
+        self.min_samples = min_samples
+        self.max_failure_rate = max_failure_rate
+        self.failure_window_seconds = failure_window_seconds
+        self.stats = {model_id: LatencyStats() for model_id in self.model_ids}
+        self._executor = ThreadPoolExecutor(max_workers=2 * len(self.model_ids))
+
+    def route(self, budget_seconds: float | None = None) -> list[str]:
+        """
+        Return the model IDs in the order in which they are tried.
+        """
+        if len(self.model_ids) < 2:
+            return list(self.model_ids)
+
+        primary, fallback = self.model_ids
+        primary_stats = self.stats[primary]
+        failure_rate = primary_stats.failure_rate(self.failure_window_seconds)
+        if failure_rate >= self.max_failure_rate:
+            return [fallback, primary]
+
+        if budget_seconds is not None:
+            primary_p50 = self._p50(primary)
+            fallback_p50 = self._p50(fallback)
+            if (
+                primary_p50 is not None
+                and fallback_p50 is not None
+                and primary_p50 > budget_seconds >= fallback_p50
+            ):
+                return [fallback, primary]
+
+        return [primary, fallback]
+
+    def hedge_delay(self, model_id: str) -> float:
+        """
+        Return how long to wait for `model_id` before sending a hedged request.
+        """
+        stats = self.stats[model_id]
+        if stats.count() < self.min_samples:
+            return self.default_hedge_delay_seconds
+        return stats.percentile(self.hedge_percentile)
+
+    def call(
+        self,
+        fn: Callable[[str], T],
+        budget_seconds: float | None = None,
+        cancelled: threading.Event | None = None,
+    ) -> T:
+        """
+        Call `fn(model_id)` along the route and return the first successful
+        result. Once `cancelled` is set, no further model is called.
+
+        Raises:
+            Exception: The error of the last model if all models failed.
+        """
+        route = self.route(budget_seconds)
+        print("[DEBUG] model_router:", route, self.summary())
+
+        futures: dict[Future, str] = {}
+        last_error: Exception | None = None
+
+        def has_next() -> bool:
+            return bool(route) and not (cancelled is not None and cancelled.is_set())
+
+        def start_next() -> None:
+            model_id = route.pop(0)
+            futures[self._executor.submit(self._timed_call, fn, model_id)] = model_id
+
+        start_next()
+        hedge_delay = self.hedge_delay(next(iter(futures.values())))
+        while futures:
+            done, _ = wait(
+                futures,
+                timeout=hedge_delay if has_next() else None,
+                return_when=FIRST_COMPLETED,
+            )
+            if not done:
+                if has_next():
+                    print(f"[DEBUG] model_router: hedging after {hedge_delay:.1f}s")
+                    start_next()
+                continue
+
+            for future in done:
+                model_id = futures.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    print(f"[ERROR] LLM_MODEL_FAILED: {model_id}: {repr(e)}")
+                    last_error = e
+
+            # Try the next model right away if no call is running anymore
+            if not futures and has_next():
+                start_next()
+
+        assert last_error is not None
+        raise last_error
+
+    def summary(self) -> dict[str, Any]:
+        return {model_id: stats.summary() for model_id, stats in self.stats.items()}
+
+    def _p50(self, model_id: str) -> float | None:
+        stats = self.stats[model_id]
+        if stats.count() < self.min_samples:
+            return None
+        return stats.percentile(50)
+
+    def _timed_call(self, fn: Callable[[str], T], model_id: str) -> T:
+        started_at = time.monotonic()
+        try:
+            result = fn(model_id)
+        except Exception:
+            self.stats[model_id].record(None)
+            raise
+        self.stats[model_id].record(time.monotonic() - started_at)
+        return result
@@ -1,4 +1,6 @@
 from collections.abc import Iterable
+import json
+from typing import Any
 from pydantic import BaseModel
 from datetime import datetime
 from zoneinfo import ZoneInfo
@@ -273,7 +275,8 @@ def weather_api_forecast_response_to_forecast_description(
         localtime=LocalTime(
             tz_id=src.location.tz_id,
             local_datetime=src.location.localtime,
-            local_weekday="",  # TODO
+            # Like the date hints of the prompt (e.g. "Saturday")
+            local_weekday=local_now.strftime("%A"),
         ),
         alerts=alerts,
         astro_today=astro_today,
@@ -284,6 +287,323 @@ def weather_api_forecast_response_to_forecast_description(
     )
 
 
+_HOUR_FIELDS = tuple(f for f in Hour.model_fields if f != "condition")
+_DAY_FIELDS = tuple(f for f in Day.model_fields if f != "condition")
+_CURRENT_FIELDS = tuple(
+    f for f in Current.model_fields if f not in ("condition", "air_quality")
+)
+_ASTRO_FIELDS = tuple(Astro.model_fields)
+_ALERT_FIELDS = tuple(Alert.model_fields)
+
+
+def weather_api_forecast_data_to_forecast_description(
+    src: dict[str, Any],
+) -> ForecastDescription:
+    """
+    Transform a raw WeatherAPI forecast JSON payload into a lean domain model.
+
+    Fast path for `weather_api_forecast_response_to_forecast_description`: the
+    needed fields are picked from the decoded JSON in a single pass and
+    validated once by `ForecastDescription`, without validating the full
+    `GetForecastResponse` tree (imperial units, epochs, icons, ...) first.
+    The result is equal to the one of the model-based transformation.
+
+    Args:
+        src: The decoded JSON of a WeatherAPI `/forecast.json` response.
+
+    Returns:
+        ForecastDescription: A simplified, domain-specific forecast object.
+    """
+
+    location = src["location"]
+    tz = ZoneInfo(location["tz_id"])
+    local_now = datetime.fromtimestamp(location["localtime_epoch"], tz)
+    today_iso = local_now.date().isoformat()
+
+    days = src["forecast"]["forecastday"]
+
+    hours_today: list[dict[str, Any]] = []
+    if days:
+        # find the forecast day matching 'today' in local tz
+        fd_today = next((d for d in days if d["date"] == today_iso), days[0])
+        for h in fd_today["hour"]:
+            h_dt = datetime.strptime(h["time"], "%Y-%m-%d %H:%M").replace(tzinfo=tz)
+            if h_dt >= local_now:
+                hour = {f: h[f] for f in _HOUR_FIELDS}
+                hour["condition"] = {"text": h["condition"]["text"]}
+                hours_today.append(hour)
+
+    astro_today = None
+    astro_tomorrow = None
+    if days:
+        astro_today = {f: days[0]["astro"][f] for f in _ASTRO_FIELDS}
+        if len(days) > 1:
+            astro_tomorrow = {f: days[1]["astro"][f] for f in _ASTRO_FIELDS}
+
+    days_overview: list[dict[str, Any]] = []
+    for d in days[:3]:
+        summary = {f: d["day"][f] for f in _DAY_FIELDS}
+        summary["condition"] = {"text": d["day"]["condition"]["text"]}
+        days_overview.append({"date": d["date"], "summary": summary})
+
+    alerts = [
+        {f: a.get(f) for f in _ALERT_FIELDS}
+        for a in ((src.get("alerts") or {}).get("alert") or [])
+    ]
+
+    cur = src["current"]
+    current = {f: cur[f] for f in _CURRENT_FIELDS}
+    current["condition"] = {"text": cur["condition"]["text"]}
+    aq = cur.get("air_quality")
+    if aq is not None:
+        current["air_quality"] = {
+            "co": aq["co"],
+            "no2": aq["no2"],
+            "o3": aq["o3"],
+            "so2": aq["so2"],
+            "pm2_5": aq["pm2_5"],
+            "pm10": aq["pm10"],
+            "us_epa_index": aq["us-epa-index"],
+            "gb_defra_index": aq["gb-defra-index"],
+        }
+
+    return ForecastDescription.model_validate(
+        {
+            "location": {
+                "name": location["name"],
+                "region": location["region"],
+                "country": location["country"],
+            },
+            "localtime": {
+                "tz_id": location["tz_id"],
+                "local_datetime": location["localtime"],
+                "local_weekday": local_now.strftime("%A"),
+            },
+            "alerts": alerts,
+            "astro_today": astro_today,
+            "astro_tomorrow": astro_tomorrow,
+            "hours_today": hours_today,
+            "days_overview": days_overview,
+            "current": current,
+        }
+    )
+
+
+# Priority-ordered trimming steps for the compact forecast serialization.
+# When a token budget is given, the steps are applied one after another
+# (lowest-priority data first) until the serialized forecast fits.
+_COMPACT_TRIM_STEPS: list[str] = [
+    "moon",
+    "air_quality_details",
+    "later_days",
+    "wide_hour_buckets",
+    "alert_details",
+    "hours",
+    "astro_tomorrow",
+]
+
+_HOUR_COLUMNS = [
+    "time",
+    "temp_c",
+    "feelslike_c",
+    "chance_of_rain",
+    "precip_mm",
+    "wind_kph",
+    "gust_kph",
+    "cloud",
+    "uv",
+    "condition",
+]
+
+_DAY_COLUMNS = [
+    "date",
+    "mintemp_c",
+    "maxtemp_c",
+    "totalprecip_mm",
+    "daily_chance_of_rain",
+    "maxwind_kph",
+    "uv",
+    "condition",
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Roughly estimate the number of LLM tokens for a text.
+
+    Compact JSON with German content averages about three characters per token;
+    the estimate intentionally errs on the high side.
+    """
+    return -(-len(text) // 3)
+
+
+def forecast_description_to_compact_json(
+    forecast: ForecastDescription,
+    *,
+    token_budget: int | None = None,
+    hour_bucket_size: int = 3,
+) -> str:
+    """
+    Serialize a forecast description into a compact, token-efficient JSON string.
+
+    Compared to `forecast.model_dump_json()` this:
+    - Emits hours and days as tables (`columns` + `rows`) instead of objects.
+    - Groups the remaining hours of today into buckets of `hour_bucket_size` hours.
+    - Drops None fields, empty lists and rarely relevant fields.
+
+    If a token budget is given, the lowest-priority data (moon data, air quality
+    details, later days, hourly detail, ...) is trimmed step by step until the
+    estimated token count fits the budget. Current conditions, the daily overview
+    for today and tomorrow and the alert headlines are always kept.
+
+    Args:
+        forecast: The forecast to serialize.
+        token_budget: Optional maximum number of (estimated) tokens.
+        hour_bucket_size: Number of hours aggregated into one row.
+
+    Returns:
+        str: The compact JSON string.
+    """
+    trims: set[str] = set()
+    text = _compact_forecast_json(forecast, trims, hour_bucket_size)
+
+    for step in _COMPACT_TRIM_STEPS:
+        if token_budget is None or estimate_tokens(text) <= token_budget:
+            break
+        trims.add(step)
+        text = _compact_forecast_json(forecast, trims, hour_bucket_size)
+
+    return text
+
+
+def _compact_forecast_json(
+    forecast: ForecastDescription, trims: set[str], hour_bucket_size: int
+) -> str:
+    current = _drop_empty(
+        forecast.current.model_dump(exclude={"condition", "air_quality"})
+    )
+    current["condition"] = forecast.current.condition.text
+    aq = forecast.current.air_quality
+    if aq is not None:
+        current["air_quality"] = (
+            {"us_epa_index": aq.us_epa_index, "gb_defra_index": aq.gb_defra_index}
+            if "air_quality_details" in trims
+            else _drop_empty(aq.model_dump())
+        )
+
+    data: dict = {
+        "location": ", ".join(
+            part
+            for part in (
+                forecast.location.name,
+                forecast.location.region,
+                forecast.location.country,
+            )
+            if part
+        ),
+        "localtime": forecast.localtime.local_datetime,
+        "tz_id": forecast.localtime.tz_id,
+        "current": current,
+    }
+
+    if forecast.alerts:
+        alert_fields = (
+            {"headline", "severity", "event", "effective", "expires"}
+            if "alert_details" in trims
+            else {"headline", "severity", "event", "effective", "expires", "desc", "instruction"}
+        )
+        data["alerts"] = [
+            _drop_empty(alert.model_dump(include=alert_fields))
+            for alert in forecast.alerts
+        ]
+
+    if forecast.hours_today and "hours" not in trims:
+        bucket_size = hour_bucket_size * 2 if "wide_hour_buckets" in trims else hour_bucket_size
+        data["hours_today"] = {
+            "columns": _HOUR_COLUMNS,
+            "rows": [
+                _hour_bucket_row(forecast.hours_today[i : i + bucket_size])
+                for i in range(0, len(forecast.hours_today), bucket_size)
+            ],
+        }
+
+    days = forecast.days_overview[:2] if "later_days" in trims else forecast.days_overview
+    if days:
+        data["days"] = {
+            "columns": _DAY_COLUMNS,
+            "rows": [
+                [
+                    d.date,
+                    _compact_number(d.summary.mintemp_c),
+                    _compact_number(d.summary.maxtemp_c),
+                    _compact_number(d.summary.totalprecip_mm),
+                    d.summary.daily_chance_of_rain,
+                    _compact_number(d.summary.maxwind_kph),
+                    _compact_number(d.summary.uv),
+                    d.summary.condition.text,
+                ]
+                for d in days
+            ],
+        }
+
+    astro: dict = {}
+    astros = [("today", forecast.astro_today)]
+    if "astro_tomorrow" not in trims:
+        astros.append(("tomorrow", forecast.astro_tomorrow))
+    for key, value in astros:
+        if value is None:
+            continue
+        astro[key] = (
+            {"sunrise": value.sunrise, "sunset": value.sunset}
+            if "moon" in trims
+            else _drop_empty(value.model_dump())
+        )
+    if astro:
+        data["astro"] = astro
+
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _hour_bucket_row(hours: list[Hour]) -> list:
+    """
+    Aggregate consecutive hours into one table row (extremes for temperature,
+    rain and wind, the most frequent condition).
+    """
+    first, last = hours[0], hours[-1]
+    time_range = (
+        first.time[-5:]
+        if len(hours) == 1
+        else f"{first.time[-5:]}-{last.time[-5:]}"
+    )
+    conditions = [h.condition.text for h in hours]
+
+    return [
+        time_range,
+        _compact_number(max(h.temp_c for h in hours)),
+        _compact_number(max(h.feelslike_c for h in hours)),
+        max(h.chance_of_rain for h in hours),
+        _compact_number(sum(h.precip_mm for h in hours)),
+        _compact_number(max(h.wind_kph for h in hours)),
+        _compact_number(max(h.gust_kph for h in hours)),
+        round(sum(h.cloud for h in hours) / len(hours)),
+        _compact_number(max(h.uv for h in hours)),
+        max(conditions, key=conditions.count),
+    ]
+
+
+def _compact_number(value: float) -> float | int:
+    value = round(value, 1)
+    return int(value) if value.is_integer() else value
+
+
+def _drop_empty(values: dict) -> dict:
+    return {
+        key: (_compact_number(value) if isinstance(value, float) else value)
+        for key, value in values.items()
+        if value is not None and value != "" and value != []
+    }
+
+
 # German month names from Contentful model -> month numbers
 _DE_MONTH_NAME_TO_NUMBER: dict[str, int] = {
     "Januar": 1,
@@ -0,0 +1,163 @@
+from datetime import datetime
+import json
+import os
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from botocore.exceptions import ClientError
+
+from api.next_actions.post.briefing import (
+    BUCKET_NAME,
+    BriefingError,
+    device_profiles,
+    generate_sentences,
+    s3_client,
+    save_prerender,
+)
+from api.next_actions.post.message_cache import TIME_PLACEHOLDER
+from utils.aws_clients import LazyClient
+from utils.device_profiles import DeviceProfile
+from utils.metrics import metrics
+from utils.speech import (
+    get_cached_audio,
+    put_cached_audio,
+    synthesize_speech,
+    upgrade_cached_audio,
+)
+from utils.usage_histogram import expected_presses, load_histograms
+from utils.warmup import WARMUP_EVENT
+
+# 'always': pre-render on every run; 'usage': only shortly before expected use
+PRERENDER_MODE = os.environ.get("PRERENDER_MODE", "always")
+PREWARM_LOOKAHEAD_MINUTES = int(os.environ.get("PREWARM_LOOKAHEAD_MINUTES", "30"))
+PREWARM_MIN_EXPECTED_PRESSES = float(
+    os.environ.get("PREWARM_MIN_EXPECTED_PRESSES", "0.5")
+)
+# Functions to keep warm while use is expected (comma-separated names)
+PREWARM_FUNCTION_NAMES = [
+    name for name in os.environ.get("PREWARM_FUNCTION_NAMES", "").split(",") if name
+]
+# Cached audio of the fast engine re-synthesized with TTS_ENGINE per run
+AUDIO_UPGRADES_PER_RUN = int(os.environ.get("AUDIO_UPGRADES_PER_RUN", "20"))
+
+lambda_client = LazyClient("lambda")
+
+
+def handler(event: dict[str, Any], context: Any) -> dict[str, Any]:
+    """
+    Scheduled job: pre-render the next-actions briefing and its audio.
+
+    For each device profile, the briefing is generated (or taken from the
+    message cache) and stored as the latest pre-render of the profile, which
+    `POST /next-actions` serves while it is fresh.
+    The audio of all sentences without the time placeholder is synthesized
+    into the audio cache, so that `GET /audio` can answer from S3. Sentences
+    with the clock time are short and synthesized on demand.
+
+    In 'usage' mode, this only happens for the profiles of devices that are
+    expected to be used soon according to their press-time histograms. The
+    API functions are then also pinged, so that their execution environments
+    are warm.
+
+    In every run, some audio that was synthesized on demand with the fast
+    engine is re-synthesized with TTS_ENGINE (see `upgrade_cached_audio`).
+    """
+    metrics.start("Prerender")
+    try:
+        result = _prerender()
+        result["upgraded"] = _upgrade_audio()
+        return result
+    finally:
+        metrics.flush()
+
+
+def _prerender() -> dict[str, Any]:
+    if PRERENDER_MODE == "usage":
+        profiles = _profiles_with_expected_use()
+        if not profiles:
+            print("[DEBUG] prerender: no use expected, skipping")
+            return {"status": "idle"}
+        _warm_up_functions()
+    else:
+        profiles = device_profiles.profiles()
+
+    return {
+        "status": "ok",
+        "profiles": {
+            profile.profile_id: _prerender_profile(profile) for profile in profiles
+        },
+    }
+
+
+def _prerender_profile(profile: DeviceProfile) -> dict[str, Any]:
+    now = datetime.now(ZoneInfo(profile.timezone))
+    try:
+        # A template briefing would replace the pre-rendered LLM briefing,
+        # so a failed or slow LLM call is not covered by the fallback here
+        sentences = generate_sentences(now, fallback=False, profile=profile)
+    except BriefingError as e:
+        print(f"[ERROR] {e.code}: {e}")
+        return {"status": "failed", "code": e.code}
+
+    if TIME_PLACEHOLDER not in " ".join(sentences):
+        # A fixed clock time would be wrong when the pre-render is served
+        print("[ERROR] PRERENDER_SKIPPED: no time placeholder in message")
+        return {"status": "skipped"}
+
+    save_prerender(sentences, profile.profile_id)
+
+    synthesized = 0
+    for sentence in sentences:
+        if TIME_PLACEHOLDER in sentence:
+            continue
+        try:
+            if get_cached_audio(sentence) is None:
+                put_cached_audio(sentence, synthesize_speech(sentence))
+                synthesized += 1
+        except (ClientError, RuntimeError) as e:
+            print(f"[ERROR] PRERENDER_AUDIO_FAILED: {repr(e)}")
+
+    print(
+        f"[DEBUG] prerender {profile.profile_id}: {len(sentences)} sentences, "
+        f"{synthesized} synthesized"
+    )
+    return {"status": "ok", "sentences": len(sentences), "synthesized": synthesized}
+
+
+def _profiles_with_expected_use() -> list[DeviceProfile]:
+    profiles: dict[str, DeviceProfile] = {}
+    scores = {}
+    for device_id, histogram in load_histograms(s3_client, BUCKET_NAME).items():
+        # Press times are recorded in the local time of the device
+        if histogram["profile_id"] is not None:
+            profile = device_profiles.get(histogram["profile_id"])
+        else:
+            profile = device_profiles.resolve(device_id)
+        now = datetime.now(ZoneInfo(profile.timezone))
+        scores[device_id] = expected_presses(
+            histogram["slots"], now, PREWARM_LOOKAHEAD_MINUTES
+        )
+        if scores[device_id] >= PREWARM_MIN_EXPECTED_PRESSES:
+            profiles[profile.profile_id] = profile
+    print("[DEBUG] expected presses:", scores)
+    return list(profiles.values())
+
+
+def _upgrade_audio() -> int:
+    try:
+        return upgrade_cached_audio(AUDIO_UPGRADES_PER_RUN)
+    except ClientError as e:
+        print(f"[ERROR] AUDIO_UPGRADE_FAILED: {repr(e)}")
+        return 0
+
+
+def _warm_up_functions() -> None:
+    for function_name in PREWARM_FUNCTION_NAMES:
+        try:
+            lambda_client.invoke(
+                FunctionName=function_name,
+                InvocationType="Event",
+                Payload=json.dumps(WARMUP_EVENT).encode("utf-8"),
+            )
+        except ClientError as e:
+            print(f"[ERROR] WARMUP_FAILED: {function_name}: {repr(e)}")
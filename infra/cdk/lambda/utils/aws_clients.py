@@ -0,0 +1,39 @@
+import threading
+from typing import Any
+
+
+class LazyClient:
+    """
+    A boto3 client that is only created (and boto3 only imported) on first use.
+
+    Creating clients takes a noticeable part of a cold start, and not every
+    invocation needs every client (e.g. warm-up pings, or a briefing served
+    from the pre-render without a Bedrock call).
+    """
+
+    def __init__(self, service_name: str, **kwargs: Any):
+        self._service_name = service_name
+        self._kwargs = kwargs
+        self._client = None
+        self._lock = threading.Lock()
+
+    def use(self, client: Any) -> None:
+        """
+        Use `client` instead of creating one, e.g. a stand-in for offline
+        benchmarks (see `benchmarks/replay.py`).
+        """
+        with self._lock:
+            self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_client(), name)
+
+    def _get_client(self) -> Any:
+        if self._client is None:
+            # Creating clients from the default session is not thread-safe
+            with self._lock:
+                if self._client is None:
+                    import boto3
+
+                    self._client = boto3.client(self._service_name, **self._kwargs)
+        return self._client
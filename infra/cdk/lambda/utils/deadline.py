@@ -0,0 +1,59 @@
+import math
+import time
+from typing import Any
+
+# Time kept back for sending the response (serialization, API Gateway)
+RESPONSE_MARGIN_SECONDS = 1.0
+
+
+class Deadline:
+    """
+    Time budget of a request, counted down from its creation.
+
+    A deadline without budget never expires, e.g. for scheduled jobs.
+    """
+
+    def __init__(self, budget_seconds: float | None):
+        self._expires_at = (
+            None if budget_seconds is None else time.monotonic() + budget_seconds
+        )
+
+    @classmethod
+    def from_event(
+        cls, event: dict[str, Any], context: Any, default_seconds: float
+    ) -> "Deadline":
+        """
+        Create the deadline of an API request.
+
+        The client sends its remaining wait time as relative `x-deadline-ms`
+        header (relative, so that the clocks need not be in sync). The budget
+        is further limited by the remaining Lambda execution time and, without
+        header, by `default_seconds`.
+        """
+        headers = (event or {}).get("headers") or {}
+        deadline_ms = next(
+            (value for key, value in headers.items() if key.lower() == "x-deadline-ms"),
+            None,
+        )
+        try:
+            budget_seconds = int(deadline_ms) / 1000
+        except (TypeError, ValueError):
+            budget_seconds = default_seconds
+
+        if context is not None and hasattr(context, "get_remaining_time_in_millis"):
+            budget_seconds = min(
+                budget_seconds, context.get_remaining_time_in_millis() / 1000
+            )
+
+        return cls(max(0.0, budget_seconds - RESPONSE_MARGIN_SECONDS))
+
+    def remaining(self) -> float:
+        """
+        Return the remaining seconds (infinite without budget, at least 0).
+        """
+        if self._expires_at is None:
+            return math.inf
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
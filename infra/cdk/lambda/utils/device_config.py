@@ -0,0 +1,137 @@
+import json
+import os
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from botocore.exceptions import ClientError
+
+from utils.metrics import metrics
+from utils.ttl_cache import TtlCache
+
+# Profiles of all devices, as one JSON object in the bucket:
+#   {"profiles": {"<profile ID>": {...}},
+#    "devices": {"<device ID>": "<profile ID>"},
+#    "api_keys": {"<API key ID>": "<profile ID>"}}
+DEVICE_PROFILES_KEY = os.environ.get("DEVICE_PROFILES_KEY", "profiles/devices.json")
+DEVICE_PROFILES_CACHE_TTL_SECONDS = int(
+    os.environ.get("DEVICE_PROFILES_CACHE_TTL_SECONDS", "300")
+)
+# Devices without an entry in "devices" get this profile
+DEFAULT_PROFILE_ID = "default"
+DEFAULT_TIMEZONE = "Europe/Berlin"
+
+# Profile fields by profile ID, profile IDs by device ID and by API key ID
+_Config = tuple[dict[str, dict[str, Any]], dict[str, str], dict[str, str]]
+
+
+class DeviceConfig:
+    """
+    The device profiles file as read from S3, with the profiles as plain
+    fields (validated by `DeviceProfiles`, which needs pydantic). Enough to
+    map a request to its profile ID and timezone, e.g. in the audio function.
+
+    Devices are mapped by the API key the request was authorized with, if the
+    key is bound to a profile ("api_keys"), otherwise by the device ID (see
+    `device_id_from_event`, "devices"). The API key takes precedence because
+    the `x-device-id` header is not authenticated.
+
+    The file is kept in memory for a few minutes, so that a change reaches all
+    warm environments without a deployment. If it cannot be read or parsed,
+    the contents read before are kept.
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket_name: str,
+        key: str = DEVICE_PROFILES_KEY,
+        ttl_seconds: float = DEVICE_PROFILES_CACHE_TTL_SECONDS,
+    ):
+        self._s3 = s3_client
+        self._bucket_name = bucket_name
+        self._key = key
+        self._memory = TtlCache(ttl_seconds=ttl_seconds, max_entries=1)
+
+    def profile_id(self, device_id: str, api_key_id: str | None = None) -> str:
+        _, devices, api_keys = self.load()
+        return api_keys.get(api_key_id or "") or devices.get(
+            device_id, DEFAULT_PROFILE_ID
+        )
+
+    def profile_fields(self, profile_id: str) -> dict[str, Any] | None:
+        """
+        Return the fields of a profile as in the file, or None if it is not
+        defined.
+        """
+        profiles, _, _ = self.load()
+        return profiles.get(profile_id)
+
+    def timezone(self, profile_id: str) -> str:
+        """
+        Return the timezone of a profile (or of the default profile if it is
+        not defined), or `DEFAULT_TIMEZONE` if it has none or an unknown one.
+        """
+        fields = (
+            self.profile_fields(profile_id)
+            or self.profile_fields(DEFAULT_PROFILE_ID)
+            or {}
+        )
+        timezone = fields.get("timezone") or DEFAULT_TIMEZONE
+        try:
+            ZoneInfo(timezone)
+        except (KeyError, ValueError, TypeError):
+            return DEFAULT_TIMEZONE
+        return timezone
+
+    def load(self) -> _Config:
+        config = self._memory.get(self._key)
+        if config is not None:
+            return config
+
+        try:
+            with metrics.timer("S3Get"):
+                obj = self._s3.get_object(Bucket=self._bucket_name, Key=self._key)
+                data = json.loads(obj["Body"].read())
+            config = (
+                _parse_profile_fields(data.get("profiles") or {}),
+                _parse_profile_ids(data.get("devices") or {}),
+                _parse_profile_ids(data.get("api_keys") or {}),
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] == "NoSuchKey":
+                config = ({}, {}, {})
+            else:
+                print(f"[ERROR] DEVICE_PROFILES_READ_FAILED: {repr(e)}")
+                return self._last_good()
+        except (ValueError, TypeError, AttributeError) as e:
+            # Malformed JSON or a wrong structure; retried after the TTL
+            print(f"[ERROR] DEVICE_PROFILES_INVALID: {repr(e)}")
+            config = self._last_good()
+
+        self._memory.put(self._key, config)
+        return config
+
+    def _last_good(self) -> _Config:
+        # Keep serving the profiles read before, rather than the default
+        stale = self._memory.get(self._key, max_age_seconds=float("inf"))
+        return stale if stale is not None else ({}, {}, {})
+
+
+def _parse_profile_fields(data: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    profiles = {}
+    for profile_id, fields in data.items():
+        if isinstance(fields, dict):
+            profiles[str(profile_id)] = fields
+        else:
+            # An invalid profile must not break the other devices
+            print(f"[ERROR] DEVICE_PROFILE_INVALID: {profile_id}: {fields!r}")
+    return profiles
+
+
+def _parse_profile_ids(data: dict[str, Any]) -> dict[str, str]:
+    # Device or API key ID -> profile ID
+    return {
+        str(key): profile_id
+        for key, profile_id in data.items()
+        if isinstance(profile_id, str)
+    }
@@ -0,0 +1,110 @@
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from pydantic import BaseModel, ValidationError, field_validator
+
+from utils.device_config import (
+    DEFAULT_PROFILE_ID,
+    DEFAULT_TIMEZONE,
+    DEVICE_PROFILES_CACHE_TTL_SECONDS,
+    DEVICE_PROFILES_KEY,
+    DeviceConfig,
+)
+
+
+class BirthdayCalendarSource(BaseModel):
+    contentful_space_id: str
+    contentful_access_token: str
+
+
+class DeviceProfile(BaseModel):
+    """
+    Where and for whom a clock speaks. Several devices (e.g. the clocks of
+    one household) can share a profile.
+    """
+
+    profile_id: str = DEFAULT_PROFILE_ID
+    # WeatherAPI location query ("lat,lon", city name or postcode)
+    location: str
+    timezone: str = DEFAULT_TIMEZONE
+    # Language of the WeatherAPI condition texts
+    language: str = "de"
+    # None: the briefing does not mention birthdays
+    birthday_calendar: BirthdayCalendarSource | None = None
+
+    @field_validator("timezone")
+    @classmethod
+    def _known_timezone(cls, value: str) -> str:
+        try:
+            ZoneInfo(value)
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"Unknown timezone: {value}") from e
+        return value
+
+
+class DeviceProfiles:
+    """
+    Resolves devices to their profiles, as mapped by `DeviceConfig`.
+
+    Devices without an entry get the "default" profile of the file, or
+    `default_profile` if the file has none (e.g. a single-device setup
+    configured by environment variables only).
+    """
+
+    def __init__(
+        self,
+        s3_client: Any,
+        bucket_name: str,
+        default_profile: DeviceProfile,
+        key: str = DEVICE_PROFILES_KEY,
+        ttl_seconds: float = DEVICE_PROFILES_CACHE_TTL_SECONDS,
+    ):
+        self.config = DeviceConfig(s3_client, bucket_name, key, ttl_seconds)
+        self._default_profile = default_profile
+        # (profile fields, validated profiles) of the last file read
+        self._parsed: tuple[dict[str, Any], dict[str, DeviceProfile]] | None = None
+
+    def resolve(self, device_id: str, api_key_id: str | None = None) -> DeviceProfile:
+        return self.get(self.config.profile_id(device_id, api_key_id))
+
+    def get(self, profile_id: str) -> DeviceProfile:
+        """
+        Return the profile with this ID, or the default profile if it is not
+        (or no longer) defined.
+        """
+        profiles = self._profiles()
+        profile = profiles.get(profile_id)
+        if profile is None:
+            if profile_id != DEFAULT_PROFILE_ID:
+                print(f"[ERROR] DEVICE_PROFILE_MISSING: {profile_id}")
+            return profiles.get(DEFAULT_PROFILE_ID, self._default_profile)
+        return profile
+
+    def profiles(self) -> list[DeviceProfile]:
+        """
+        Return all profiles, including the default profile.
+        """
+        profiles = self._profiles()
+        return list({DEFAULT_PROFILE_ID: self._default_profile, **profiles}.values())
+
+    def _profiles(self) -> dict[str, DeviceProfile]:
+        fields, _, _ = self.config.load()
+        parsed = self._parsed
+        # Validated once per file read
+        if parsed is None or parsed[0] is not fields:
+            parsed = (fields, _parse_profiles(fields))
+            self._parsed = parsed
+        return parsed[1]
+
+
+def _parse_profiles(data: dict[str, dict[str, Any]]) -> dict[str, DeviceProfile]:
+    profiles = {}
+    for profile_id, fields in data.items():
+        try:
+            profiles[profile_id] = DeviceProfile.model_validate(
+                {**fields, "profile_id": profile_id}
+            )
+        except ValidationError as e:
+            # An invalid profile must not break the other devices
+            print(f"[ERROR] DEVICE_PROFILE_INVALID: {profile_id}: {repr(e)}")
+    return profiles
@@ -0,0 +1,188 @@
+import gzip
+import http.client
+import math
+import random
+import threading
+import time
+from typing import Any
+import urllib.parse
+
+# Errors of a kept-alive connection that the server closed in the meantime
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class HttpResponse:
+    def __init__(
+        self,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        timing: dict[str, Any],
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        # e.g. {"attempts": 1, "reused": True, "connect_ms": 0.0, "total_ms": 85.2}
+        self.timing = timing
+
+
+class HttpTransport:
+    """
+    HTTP client for one base URL with kept-alive connections.
+
+    Connections live in the module scope of a Lambda function (like the
+    caches), so warm invocations reuse them and skip the TCP and TLS setup.
+    Responses may be gzip-compressed. Failed requests (connection errors,
+    timeouts, 429 and 5xx) are retried with jittered exponential backoff as
+    long as the time budget of the call allows.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 5.0,
+        max_attempts: int = 3,
+        backoff_seconds: float = 0.2,
+        max_backoff_seconds: float = 2.0,
+        headers: dict[str, str] | None = None,
+    ):
+        url = urllib.parse.urlsplit(base_url.rstrip("/"))
+        self._https = url.scheme == "https"
+        self._host = url.hostname
+        self._port = url.port
+        self._base_path = url.path
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self._headers = {"Accept-Encoding": "gzip", **(headers or {})}
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        path: str,
+        params: dict[str, Any] | None = None,
+        budget_seconds: float | None = None,
+    ) -> HttpResponse:
+        """
+        Send a GET request and return the (decompressed) response.
+
+        Responses with a retryable status are returned once the attempts or
+        the budget are used up; the caller checks the status.
+
+        Raises:
+            OSError, http.client.HTTPException: If no response could be
+                received within the attempts or the budget (e.g. `TimeoutError`).
+        """
+        url = self._base_path + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+
+        started_at = time.monotonic()
+        budget = math.inf if budget_seconds is None else budget_seconds
+
+        attempt = 0
+        while True:
+            attempt += 1
+            response, error = None, None
+            try:
+                response = self._send(url, budget - (time.monotonic() - started_at))
+            except (OSError, http.client.HTTPException) as e:
+                error = e
+            if response is not None and response.status not in _RETRY_STATUSES:
+                break
+
+            backoff = random.uniform(
+                0,
+                min(
+                    self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempt - 1)
+                ),
+            )
+            remaining = budget - (time.monotonic() - started_at)
+            if attempt >= self.max_attempts or remaining <= backoff:
+                if response is not None:
+                    break
+                raise error
+
+            print(
+                f"[DEBUG] http retry {attempt}/{self.max_attempts} "
+                f"in {backoff:.2f}s:",
+                repr(error) if error is not None else response.status,
+            )
+            time.sleep(backoff)
+
+        response.timing["attempts"] = attempt
+        response.timing["total_ms"] = round((time.monotonic() - started_at) * 1000, 1)
+        print(f"[DEBUG] http {self._host}{path}:", response.status, response.timing)
+        return response
+
+    def _send(self, url: str, budget_seconds: float) -> HttpResponse:
+        """
+        Send one request, on an idle connection if there is one. A stale idle
+        connection is replaced by a new one without counting as an attempt.
+        """
+        while True:
+            conn, reused = self._acquire()
+            started_at = time.monotonic()
+            try:
+                connect_ms = 0.0
+                if conn.sock is None:
+                    conn.timeout = max(0.01, min(self.connect_timeout, budget_seconds))
+                    conn.connect()
+                    connect_ms = (time.monotonic() - started_at) * 1000
+                conn.sock.settimeout(max(0.01, min(self.read_timeout, budget_seconds)))
+
+                conn.request("GET", url, headers=self._headers)
+                resp = conn.getresponse()
+                ttfb_ms = (time.monotonic() - started_at) * 1000
+                body = resp.read()
+            except _STALE_CONNECTION_ERRORS:
+                conn.close()
+                if reused:
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+
+            if resp.getheader("Content-Encoding", "").lower() == "gzip":
+                body = gzip.decompress(body)
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+
+            return HttpResponse(
+                status=resp.status,
+                headers={key.lower(): value for key, value in resp.getheaders()},
+                body=body,
+                timing={
+                    "reused": reused,
+                    "connect_ms": round(connect_ms, 1),
+                    "ttfb_ms": round(ttfb_ms, 1),
+                },
+            )
+
+    def _acquire(self) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        connection_class = (
+            http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+        )
+        return connection_class(self._host, self._port), False
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            self._idle.append(conn)
@@ -0,0 +1,128 @@
+from contextlib import contextmanager
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Iterator
+
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "VoicekitClock")
+# Share of invocations that also log verbose payloads (prompts, messages)
+METRICS_VERBOSE_SAMPLE_RATE = float(
+    os.environ.get("METRICS_VERBOSE_SAMPLE_RATE", "0.05")
+)
+
+# CloudWatch accepts at most 100 values per metric in one EMF record
+_MAX_VALUES_PER_METRIC = 100
+
+
+class Metrics:
+    """
+    Metrics of one invocation, emitted as a single CloudWatch embedded metric
+    format (EMF) log line.
+
+    Durations are recorded in milliseconds per stage (e.g. "WeatherFetch",
+    "Bedrock", "Polly", "S3Get"). Cache lookups are recorded as 1 (hit) or 0
+    (miss), so that the average of a cache metric is its hit ratio. Metrics
+    recorded from background threads of the invocation are included if they
+    are recorded before `flush`.
+    """
+
+    def __init__(self, namespace: str = METRICS_NAMESPACE):
+        self.namespace = namespace
+        self.verbose = False
+        self._function = "unknown"
+        self._values: dict[str, list[float]] = {}
+        self._units: dict[str, str] = {}
+        self._properties: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def start(self, function: str) -> None:
+        """
+        Start the metrics of a new invocation of `function` (the dimension).
+
+        Also decides whether verbose payloads are logged for this invocation
+        (see `METRICS_VERBOSE_SAMPLE_RATE`).
+        """
+        with self._lock:
+            self._function = function
+            self._values = {}
+            self._units = {}
+            self._properties = {}
+        self.verbose = random.random() < METRICS_VERBOSE_SAMPLE_RATE
+
+    def put(self, name: str, value: float, unit: str = "Count") -> None:
+        with self._lock:
+            values = self._values.setdefault(name, [])
+            if len(values) < _MAX_VALUES_PER_METRIC:
+                values.append(value)
+            self._units[name] = unit
+
+    def put_cache_lookup(self, name: str, hit: bool) -> None:
+        self.put(name, 1 if hit else 0)
+
+    def put_property(self, key: str, value: Any) -> None:
+        """
+        Add a searchable log property that is not a metric (e.g. a model ID).
+        """
+        with self._lock:
+            self._properties[key] = value
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Record the duration of the `with` block (also if it raises).
+        """
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put(
+                name,
+                round((time.perf_counter() - started_at) * 1000, 1),
+                "Milliseconds",
+            )
+
+    def log_verbose(self, label: str, payload: Any) -> None:
+        """
+        Log a verbose payload, only in sampled invocations.
+        """
+        if self.verbose:
+            print(f"[DEBUG] {label}:", payload)
+
+    def flush(self) -> None:
+        """
+        Print the EMF record of the invocation (if any metric was recorded).
+        """
+        with self._lock:
+            values, units = self._values, self._units
+            properties = self._properties
+            self._values, self._units, self._properties = {}, {}, {}
+        if not values:
+            return
+
+        record = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [["Function"]],
+                        "Metrics": [
+                            {"Name": name, "Unit": units[name]} for name in values
+                        ],
+                    }
+                ],
+            },
+            "Function": self._function,
+            **properties,
+            **{
+                name: samples[0] if len(samples) == 1 else samples
+                for name, samples in values.items()
+            },
+        }
+        print(json.dumps(record, ensure_ascii=False))
+
+
+# Shared by all modules of a Lambda function (one invocation at a time)
+metrics = Metrics()
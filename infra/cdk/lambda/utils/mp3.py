@@ -0,0 +1,90 @@
+"""
+Joining MP3 files at frame level, without decoding and re-encoding.
+
+MP3 is a sequence of self-contained frames, so the frames of several files
+with the same sample rate can be played back to back. Only the parts that
+describe a single file are dropped: ID3 tags and the Xing/Info frame (which
+holds the frame count of the first file and would make players stop early).
+"""
+
+# Bitrates in kbit/s by MPEG version (1 or 2/2.5) and bitrate index (Layer III)
+_BITRATES = {
+    1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Sample rates in Hz by MPEG version bits and sample rate index
+_SAMPLE_RATES = {
+    0b11: (44100, 48000, 32000),  # MPEG 1
+    0b10: (22050, 24000, 16000),  # MPEG 2
+    0b00: (11025, 12000, 8000),  # MPEG 2.5
+}
+_ID3V1_SIZE = 128
+
+
+def concat_mp3(parts: list[bytes]) -> bytes:
+    """
+    Join MP3 files (Layer III, e.g. from Polly) into one.
+
+    Args:
+        parts: The MP3 files in playback order; they should share the sample
+            rate and channel mode.
+
+    Returns:
+        bytes: The frames of all parts, without ID3 tags and Xing/Info frames.
+    """
+    if len(parts) == 1:
+        return parts[0]
+    return b"".join(_audio_frames(part) for part in parts)
+
+
+def _audio_frames(data: bytes) -> bytes:
+    start = _skip_id3v2(data)
+    end = len(data)
+    if end - start >= _ID3V1_SIZE and data[end - _ID3V1_SIZE : end - 125] == b"TAG":
+        end -= _ID3V1_SIZE
+
+    length = _frame_length(data, start)
+    if length is not None and _is_info_frame(data[start : start + length]):
+        start += length
+    return data[start:end]
+
+
+def _skip_id3v2(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    # Synchsafe integer: 7 bits per byte
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _frame_length(data: bytes, offset: int) -> int | None:
+    """
+    Return the length of the Layer III frame at `offset`, or None if there is
+    no valid frame header.
+    """
+    if len(data) < offset + 4:
+        return None
+    b1, b2 = data[offset + 1], data[offset + 2]
+    version_bits = (b1 >> 3) & 0b11
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0 or version_bits == 0b01:
+        return None
+    if (b1 >> 1) & 0b11 != 0b01:  # Layer III
+        return None
+    bitrate_index, sample_rate_index = b2 >> 4, (b2 >> 2) & 0b11
+    if bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 0b11
+    bitrate = _BITRATES[1 if mpeg1 else 2][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][sample_rate_index]
+    padding = (b2 >> 1) & 1
+    return (144 if mpeg1 else 72) * bitrate // sample_rate + padding
+
+
+def _is_info_frame(frame: bytes) -> bool:
+    # The tag follows the side information, whose size depends on the version
+    # and channel mode; checking the first bytes of the frame covers all cases
+    return b"Xing" in frame[:64] or b"Info" in frame[:64]
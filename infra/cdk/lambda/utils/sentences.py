@@ -0,0 +1,111 @@
+import re
+
+
+# Sentence-ending punctuation (optionally followed by closing quotes) and the
+# whitespace that separates it from the next sentence.
+_BOUNDARY_RE = re.compile(r"([.!?…]+[\"“”»«']?)(\s+)")
+_NEXT_WORD_RE = re.compile(r"\S+")
+_ORDINAL_RE = re.compile(r"\d{1,2}")
+
+_DE_MONTH_NAMES = {
+    "januar",
+    "februar",
+    "märz",
+    "april",
+    "mai",
+    "juni",
+    "juli",
+    "august",
+    "september",
+    "oktober",
+    "november",
+    "dezember",
+}
+
+# Common German abbreviations that end with a period but not a sentence
+_ABBREVIATIONS = {"ca", "bzw", "usw", "etc", "evtl", "ggf", "inkl", "nr", "dr", "st"}
+
+
+def split_sentences(text: str) -> list[str]:
+    """
+    Split a (German) text into sentences.
+
+    Date ordinals ("am 9. August") and common abbreviations ("z. B.", "ca.")
+    are not treated as sentence boundaries.
+
+    Args:
+        text: The text to split.
+
+    Returns:
+        list[str]: The stripped, non-empty sentences in order.
+    """
+    sentences, _ = pop_sentences(text, final=True)
+    return sentences
+
+
+def pop_sentences(buffer: str, final: bool = False) -> tuple[list[str], str]:
+    """
+    Take all complete sentences from the beginning of a growing text buffer.
+
+    Used for streamed model output: a boundary is only accepted once the
+    following word is complete, because the word after a period decides
+    whether it ends a sentence (e.g. "am 9. August").
+
+    Args:
+        buffer: Text received so far.
+        final: True if no more text will follow; the remainder is then
+            returned as the last sentence.
+
+    Returns:
+        tuple[list[str], str]: The complete sentences and the unconsumed rest.
+    """
+    sentences: list[str] = []
+    start = 0
+
+    for m in _BOUNDARY_RE.finditer(buffer):
+        following = buffer[m.end() :]
+        next_word = _NEXT_WORD_RE.match(following)
+        if not final and (next_word is None or next_word.end() == len(following)):
+            # the next word may still be incomplete -> wait for more text
+            break
+
+        head = buffer[start : m.start()]
+        if not _is_sentence_end(head, m.group(1), next_word.group() if next_word else ""):
+            continue
+
+        sentence = buffer[start : m.end(1)].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = m.end()
+
+    rest = buffer[start:]
+    if final:
+        if rest.strip():
+            sentences.append(rest.strip())
+        rest = ""
+
+    return sentences, rest
+
+
+def _is_sentence_end(head: str, punctuation: str, next_word: str) -> bool:
+    if punctuation != ".":
+        return True
+
+    tokens = head.split()
+    if not tokens:
+        return True
+    last_token = tokens[-1]
+
+    # "am 9. August", "der 29. November" or "den 3. des Monats"
+    if _ORDINAL_RE.fullmatch(last_token):
+        bare_next = next_word.strip(".,;:!?\"“”»«'").lower()
+        if bare_next in _DE_MONTH_NAMES or next_word[:1].islower():
+            return False
+
+    # "z. B.", "u. a." or "ca. 20 Grad"
+    if (len(last_token) == 1 and last_token.isalpha()) or (
+        last_token.lower() in _ABBREVIATIONS
+    ):
+        return False
+
+    return True
@@ -0,0 +1,286 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import re
+import time
+
+from botocore.exceptions import ClientError
+
+from utils.aws_clients import LazyClient
+from utils.metrics import metrics
+from utils.mp3 import concat_mp3
+from utils.sentences import split_sentences
+from utils.tts_router import EngineRouter
+
+s3 = LazyClient("s3")
+polly = LazyClient("polly")
+
+BUCKET_NAME = os.environ["BUCKET_NAME"]
+TTS_VOICE_ID = os.environ["TTS_VOICE_ID"]
+# Engine of the cached audio; other engines are upgraded to it (see below)
+TTS_ENGINE = os.environ["TTS_ENGINE"]
+# Faster engine for short and time-critical texts (optional, see `EngineRouter`)
+TTS_FAST_ENGINE = os.environ.get("TTS_FAST_ENGINE") or None
+TTS_FAST_ENGINE_MAX_TEXT_LENGTH = int(
+    os.environ.get("TTS_FAST_ENGINE_MAX_TEXT_LENGTH", "40")
+)
+TTS_LATENCY_BUDGET_SECONDS = float(os.environ.get("TTS_LATENCY_BUDGET_SECONDS", "2.5"))
+TTS_OUTPUT_FORMAT = os.environ["TTS_OUTPUT_FORMAT"]
+TTS_SAMPLE_RATE = os.environ["TTS_SAMPLE_RATE"]
+
+# Texts up to this length are stored in the audio cache when synthesized on
+# demand. Longer texts are usually unique, unless they were pre-rendered.
+MAX_ON_DEMAND_CACHE_TEXT_LENGTH = 100
+
+# Texts whose cached audio is from a faster engine than TTS_ENGINE
+UPGRADE_PREFIX = "polly-upgrades"
+
+# Lookups and Polly calls for the sentences of one text (Polly throttles
+# concurrent synthesis per account)
+sentence_executor = ThreadPoolExecutor(max_workers=4)
+
+engine_router = EngineRouter(
+    TTS_ENGINE,
+    TTS_FAST_ENGINE,
+    fast_max_text_length=TTS_FAST_ENGINE_MAX_TEXT_LENGTH,
+    latency_budget_seconds=TTS_LATENCY_BUDGET_SECONDS,
+)
+
+
+def audio_cache_key(text: str, engine: str = TTS_ENGINE) -> str:
+    """
+    Return the S3 key of the cached audio for a text.
+
+    Short texts use a readable key; longer ones are hashed to stay within the
+    S3 key length limit. Audio of engines other than TTS_ENGINE is kept apart.
+    """
+    if len(text) < MAX_ON_DEMAND_CACHE_TEXT_LENGTH:
+        cleaned_text = re.sub(r"[^a-zA-Z0-9]", "_", text)
+    else:
+        cleaned_text = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    engine_prefix = "" if engine == TTS_ENGINE else f"{engine}/"
+    return f"polly/{TTS_VOICE_ID}/{engine_prefix}{cleaned_text}.{TTS_OUTPUT_FORMAT}"
+
+
+def get_cached_audio(text: str, engine: str = TTS_ENGINE) -> bytes | None:
+    """
+    Return the cached audio of an engine for a text, or None if it is not
+    cached.
+
+    Raises:
+        ClientError: For S3 errors other than a missing key.
+    """
+    try:
+        with metrics.timer("S3Get"):
+            obj = s3.get_object(Bucket=BUCKET_NAME, Key=audio_cache_key(text, engine))
+            return obj["Body"].read()
+    except ClientError as e:
+        if e.response["Error"]["Code"] == "NoSuchKey":
+            return None
+        raise
+
+
+def find_cached_audio(
+    text: str, metric_name: str = "AudioCacheHit"
+) -> tuple[bytes, str] | None:
+    """
+    Return the cached audio for a text and its engine (best quality first),
+    or None if it is not cached.
+
+    Raises:
+        ClientError: For S3 errors other than a missing key.
+    """
+    for engine in engine_router.engines:
+        audio_bytes = get_cached_audio(text, engine)
+        if audio_bytes is not None:
+            metrics.put_cache_lookup(metric_name, True)
+            return audio_bytes, engine
+    metrics.put_cache_lookup(metric_name, False)
+    return None
+
+
+def find_cached_audio_engine(text: str) -> str | None:
+    """
+    Like `find_cached_audio`, but only returns the engine (without
+    downloading the audio).
+
+    Raises:
+        ClientError: For S3 errors other than a missing key.
+    """
+    for engine in engine_router.engines:
+        try:
+            with metrics.timer("S3Head"):
+                s3.head_object(Bucket=BUCKET_NAME, Key=audio_cache_key(text, engine))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+                continue
+            raise
+        metrics.put_cache_lookup("AudioCacheHit", True)
+        return engine
+    metrics.put_cache_lookup("AudioCacheHit", False)
+    return None
+
+
+def put_cached_audio(text: str, audio_bytes: bytes, engine: str = TTS_ENGINE) -> None:
+    """
+    Store the audio of a text. Audio of a faster engine is also queued for the
+    upgrade to TTS_ENGINE (see `upgrade_cached_audio`).
+    """
+    with metrics.timer("S3Put"):
+        s3.put_object(
+            Bucket=BUCKET_NAME,
+            Key=audio_cache_key(text, engine),
+            Body=audio_bytes,
+            ContentType="audio/mpeg",
+            CacheControl="public, max-age=31536000, immutable",
+        )
+    if engine == TTS_ENGINE:
+        return
+    with metrics.timer("S3Put"):
+        s3.put_object(
+            Bucket=BUCKET_NAME,
+            Key=_upgrade_key(text),
+            Body=json.dumps({"text": text}, ensure_ascii=False).encode("utf-8"),
+            ContentType="application/json",
+        )
+
+
+def synthesize_speech(text: str, engine: str = TTS_ENGINE) -> bytes:
+    """
+    Synthesize a text with Polly (without cache).
+
+    Raises:
+        ClientError: For Polly errors.
+        RuntimeError: If Polly returned no audio stream.
+    """
+    # Polly bills per synthesized character (at a different rate per engine)
+    metrics.put("PollyCharacters", len(text))
+    started_at = time.perf_counter()
+    with metrics.timer("Polly"):
+        res = polly.synthesize_speech(
+            Text=text,
+            TextType="text",
+            OutputFormat=TTS_OUTPUT_FORMAT,
+            SampleRate=TTS_SAMPLE_RATE,
+            VoiceId=TTS_VOICE_ID,
+            Engine=engine,
+        )
+        audio_stream = res.get("AudioStream")
+        if audio_stream is None:
+            raise RuntimeError("No audio stream from Polly.")
+
+        audio_bytes = audio_stream.read()
+    engine_router.record(engine, len(text), time.perf_counter() - started_at)
+    return audio_bytes
+
+
+def synthesize_routed(text: str, engines: list[str] | None = None) -> tuple[bytes, str]:
+    """
+    Synthesize a text with the engine chosen by `engine_router` (or the first
+    of `engines`), or with the next engine if that fails. Returns the audio
+    and its engine.
+
+    Raises:
+        ClientError: For Polly errors of the last engine.
+        RuntimeError: If Polly returned no audio stream.
+    """
+    if engines is None:
+        engines = _route(text)
+    for engine in engines[:-1]:
+        try:
+            return synthesize_speech(text, engine), engine
+        except ClientError as e:
+            print(f"[ERROR] POLLY_ENGINE_FAILED: {engine}: {repr(e)}")
+    return synthesize_speech(text, engines[-1]), engines[-1]
+
+
+def get_audio(text: str) -> tuple[bytes, str]:
+    """
+    Return the audio for a text and its engine, from the audio cache or
+    synthesized.
+
+    Texts that are not cached as a whole (e.g. pre-rendered) are split into
+    sentences, which repeat far more often than whole briefings. The audio of
+    each sentence is looked up or synthesized (and cached) in parallel, and
+    the MP3 frames are concatenated without re-encoding. The engine is chosen
+    once for the whole text, so that its sentences do not switch voices; it
+    is TTS_ENGINE only if all sentences are (a sentence falls back to the
+    other engine only if Polly fails).
+
+    Raises:
+        ClientError: For S3 or Polly errors.
+        RuntimeError: If Polly returned no audio stream.
+    """
+    cached_audio = find_cached_audio(text)
+    if cached_audio is not None:
+        return cached_audio
+
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return _synthesize_and_cache(text)
+
+    metrics.put("AudioSentences", len(sentences))
+    engines = _route(text)
+    parts = list(
+        sentence_executor.map(
+            lambda sentence: _get_sentence_audio(sentence, engines), sentences
+        )
+    )
+    engines = {engine for _, engine in parts}
+    engine = TTS_ENGINE if engines == {TTS_ENGINE} else (engines - {TTS_ENGINE}).pop()
+    return concat_mp3([audio_bytes for audio_bytes, _ in parts]), engine
+
+
+def upgrade_cached_audio(max_texts: int) -> int:
+    """
+    Re-synthesize cached audio of faster engines with TTS_ENGINE (e.g. in a
+    scheduled job), up to `max_texts` texts. Returns the number of upgraded
+    texts.
+    """
+    upgraded = 0
+    paginator = s3.get_paginator("list_objects_v2")
+    prefix = f"{UPGRADE_PREFIX}/{TTS_VOICE_ID}/"
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if upgraded >= max_texts:
+                return upgraded
+            try:
+                entry = s3.get_object(Bucket=BUCKET_NAME, Key=obj["Key"])
+                text = json.loads(entry["Body"].read())["text"]
+                if get_cached_audio(text) is None:
+                    put_cached_audio(text, synthesize_speech(text))
+                    upgraded += 1
+                s3.delete_object(Bucket=BUCKET_NAME, Key=obj["Key"])
+            except (ClientError, RuntimeError) as e:
+                print(f"[ERROR] AUDIO_UPGRADE_FAILED: {obj['Key']}: {repr(e)}")
+    return upgraded
+
+
+def _route(text: str) -> list[str]:
+    engines = engine_router.route(text)
+    metrics.put("FastEngine", 1 if engines[0] != TTS_ENGINE else 0)
+    return engines
+
+
+def _get_sentence_audio(sentence: str, engines: list[str]) -> tuple[bytes, str]:
+    # Only audio of the engine chosen for the text
+    audio_bytes = get_cached_audio(sentence, engines[0])
+    metrics.put_cache_lookup("AudioSentenceCacheHit", audio_bytes is not None)
+    if audio_bytes is not None:
+        return audio_bytes, engines[0]
+    return _synthesize_and_cache(sentence, engines)
+
+
+def _synthesize_and_cache(
+    text: str, engines: list[str] | None = None
+) -> tuple[bytes, str]:
+    audio_bytes, engine = synthesize_routed(text, engines)
+    if len(text) < MAX_ON_DEMAND_CACHE_TEXT_LENGTH:
+        put_cached_audio(text, audio_bytes, engine)
+    return audio_bytes, engine
+
+
+def _upgrade_key(text: str) -> str:
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{UPGRADE_PREFIX}/{TTS_VOICE_ID}/{digest}.json"
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Callable
+
+
+class TtlCache:
+    """
+    Small in-memory cache with a time-to-live per entry and LRU eviction.
+
+    Lives in the module scope of a Lambda function, so entries survive across
+    warm invocations of the same execution environment.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 64):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, max_age_seconds: float | None = None) -> Any | None:
+        """
+        Return the cached value, or None if it is missing or older than the TTL
+        (or `max_age_seconds`, if given).
+        """
+        max_age = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > max_age:
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key: str, load: Callable[[], Any]) -> Any:
+        """
+        Return the cached value or load, cache and return a fresh one.
+        """
+        value = self.get(key)
+        if value is None:
+            value = load()
+            self.put(key, value)
+        return value
@@ -0,0 +1,80 @@
+from collections import deque
+import threading
+
+
+class EngineRouter:
+    """
+    Chooses the Polly engine per text.
+
+    `quality_engine` (e.g. "generative") is the default. A `fast_engine`
+    (e.g. "neural") is used for short texts, which are mostly time-critical
+    (the time sentence, prompts like "OK"), and for longer texts while the
+    measured latency of the quality engine would exceed
+    `latency_budget_seconds` for a text of that length.
+
+    Latencies are kept per engine in the warm Lambda environment, as seconds
+    per character of the most recent calls.
+    """
+
+    def __init__(
+        self,
+        quality_engine: str,
+        fast_engine: str | None = None,
+        fast_max_text_length: int = 40,
+        latency_budget_seconds: float = 2.5,
+        min_samples: int = 5,
+        window: int = 50,
+    ):
+        self.quality_engine = quality_engine
+        self.fast_engine = fast_engine if fast_engine != quality_engine else None
+        self.fast_max_text_length = fast_max_text_length
+        self.latency_budget_seconds = latency_budget_seconds
+        self.min_samples = min_samples
+        self._seconds_per_char = {
+            engine: deque(maxlen=window) for engine in self.engines
+        }
+        self._lock = threading.Lock()
+
+    @property
+    def engines(self) -> list[str]:
+        """
+        All engines, best quality first (the order of cache lookups).
+        """
+        return [self.quality_engine] + ([self.fast_engine] if self.fast_engine else [])
+
+    def route(self, text: str) -> list[str]:
+        """
+        Return the engines in the order in which they are tried for `text`.
+        """
+        if self.fast_engine is None:
+            return [self.quality_engine]
+        fast_first = [self.fast_engine, self.quality_engine]
+        if len(text) <= self.fast_max_text_length:
+            return fast_first
+
+        quality_estimate = self.estimate(self.quality_engine, len(text))
+        fast_estimate = self.estimate(self.fast_engine, len(text))
+        if (
+            quality_estimate is not None
+            and quality_estimate > self.latency_budget_seconds
+            and (fast_estimate is None or fast_estimate < quality_estimate)
+        ):
+            return fast_first
+        return [self.quality_engine, self.fast_engine]
+
+    def record(self, engine: str, text_length: int, latency_seconds: float) -> None:
+        with self._lock:
+            samples = self._seconds_per_char.get(engine)
+            if samples is not None:
+                samples.append(latency_seconds / max(1, text_length))
+
+    def estimate(self, engine: str, text_length: int) -> float | None:
+        """
+        Return the median latency of `engine` scaled to `text_length`, or None
+        while there are fewer than `min_samples` calls.
+        """
+        with self._lock:
+            samples = sorted(self._seconds_per_char.get(engine) or [])
+        if len(samples) < self.min_samples:
+            return None
+        return samples[len(samples) // 2] * text_length
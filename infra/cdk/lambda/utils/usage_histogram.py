@@ -0,0 +1,201 @@
+from datetime import datetime
+import json
+import re
+import threading
+import time
+from typing import Any
+
+from botocore.exceptions import ClientError
+
+from utils.ttl_cache import TtlCache
+
+# Press times are counted in 96 quarter-hour slots of the (local) day
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# Older presses count less: a press loses half of its weight after two weeks
+HALF_LIFE_DAYS = 14
+
+USAGE_PREFIX = "usage"
+
+# Presses of a device within a minute count once (e.g. a retried request)
+_PRESS_DEDUPE_SECONDS = 60
+# Attempts of the conditional read-modify-write of a histogram
+_RECORD_ATTEMPTS = 3
+# S3 errors of a conditional write that lost against another write
+_WRITE_CONFLICT_CODES = ("PreconditionFailed", "ConditionalRequestConflict")
+_recent_presses = TtlCache(ttl_seconds=_PRESS_DEDUPE_SECONDS, max_entries=256)
+
+
+def device_id_from_event(event: dict[str, Any]) -> str:
+    """
+    Identify the calling device: the `x-device-id` header if sent, otherwise
+    the API key the request was authorized with.
+    """
+    headers = (event or {}).get("headers") or {}
+    device_id = next(
+        (value for key, value in headers.items() if key.lower() == "x-device-id"),
+        None,
+    )
+    if not device_id:
+        device_id = api_key_id_from_event(event) or "default"
+    return re.sub(r"[^a-zA-Z0-9_-]", "_", device_id)[:64]
+
+
+def is_press_event(event: dict[str, Any]) -> bool:
+    """
+    Return True if an `/audio` request was sent for a button press (the
+    device sets the `x-press` header), not for a sentence of a briefing that
+    next-actions already recorded or for a self-diagnosis probe.
+    """
+    headers = (event or {}).get("headers") or {}
+    return any(
+        key.lower() == "x-press" and value == "1" for key, value in headers.items()
+    )
+
+
+def api_key_id_from_event(event: dict[str, Any]) -> str | None:
+    """
+    Return the ID of the API key the request was authorized with (unlike the
+    `x-device-id` header, it cannot be chosen by the caller).
+    """
+    identity = ((event or {}).get("requestContext") or {}).get("identity") or {}
+    return identity.get("apiKeyId") or None
+
+
+def slot_of(now: datetime) -> int:
+    return (now.hour * 60 + now.minute) // SLOT_MINUTES
+
+
+def record_press_async(
+    s3_client: Any,
+    bucket_name: str,
+    device_id: str,
+    now: datetime,
+    profile_id: str | None = None,
+) -> threading.Thread | None:
+    """
+    Record a button press of a device in its usage histogram, in a background
+    thread that runs while the request is being handled. The caller joins the
+    thread before returning, because Lambda freezes the environment afterwards.
+
+    The histogram keeps the profile the device was resolved to (`profile_id`),
+    which the prerender job cannot resolve without the request.
+
+    Returns None if a press of this device was already recorded within the
+    last minute.
+    """
+    if _recent_presses.get(device_id) is not None:
+        return None
+    _recent_presses.put(device_id, True)
+
+    thread = threading.Thread(
+        target=_record_press,
+        args=(s3_client, bucket_name, device_id, now, profile_id),
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def load_histograms(s3_client: Any, bucket_name: str) -> dict[str, dict[str, Any]]:
+    """
+    Load the usage histograms of all devices, decayed to the current time.
+
+    Returns:
+        dict: Per device ID, the press counts per slot ("slots") and the
+        profile ID of the last press ("profile_id", None if not recorded).
+    """
+    histograms: dict[str, dict[str, Any]] = {}
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=f"{USAGE_PREFIX}/"):
+        for obj in page.get("Contents", []):
+            device_id = obj["Key"][len(USAGE_PREFIX) + 1 : -len(".json")]
+            histogram, _ = _load_histogram(s3_client, bucket_name, device_id)
+            if histogram is not None:
+                histograms[device_id] = {
+                    "slots": _decayed(histogram)["slots"],
+                    "profile_id": histogram.get("profile_id"),
+                }
+    return histograms
+
+
+def expected_presses(slots: list[float], now: datetime, lookahead_minutes: int) -> float:
+    """
+    Return the (decayed) number of past presses in the time window that starts
+    now and spans `lookahead_minutes`, i.e. how likely a press is soon.
+    """
+    first = slot_of(now)
+    count = max(1, -(-lookahead_minutes // SLOT_MINUTES))
+    return sum(slots[(first + i) % SLOTS_PER_DAY] for i in range(count))
+
+
+def _record_press(
+    s3_client: Any,
+    bucket_name: str,
+    device_id: str,
+    now: datetime,
+    profile_id: str | None,
+) -> None:
+    try:
+        # Conditional writes, so that concurrent environments (or functions)
+        # do not overwrite each other's presses; retried on a conflict
+        for attempt in range(_RECORD_ATTEMPTS):
+            histogram, etag = _load_histogram(s3_client, bucket_name, device_id)
+            histogram = _decayed(
+                histogram or {"slots": [0.0] * SLOTS_PER_DAY, "updated_at": time.time()}
+            )
+            histogram["slots"][slot_of(now)] += 1.0
+            condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+            try:
+                s3_client.put_object(
+                    Bucket=bucket_name,
+                    Key=_key(device_id),
+                    Body=json.dumps(
+                        {
+                            "slots": [round(v, 3) for v in histogram["slots"]],
+                            "updated_at": histogram["updated_at"],
+                            "profile_id": profile_id,
+                        }
+                    ).encode("utf-8"),
+                    ContentType="application/json",
+                    **condition,
+                )
+                return
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in _WRITE_CONFLICT_CODES:
+                    raise
+                print(f"[DEBUG] usage: write conflict (attempt {attempt + 1})")
+        print(f"[ERROR] USAGE_RECORD_CONFLICT: {device_id}")
+    except Exception as e:
+        # Usage statistics must never break a request
+        print(f"[ERROR] USAGE_RECORD_FAILED: {repr(e)}")
+
+
+def _load_histogram(
+    s3_client: Any, bucket_name: str, device_id: str
+) -> tuple[dict | None, str | None]:
+    """
+    Return the stored histogram of a device and its ETag, or (None, None).
+    """
+    try:
+        obj = s3_client.get_object(Bucket=bucket_name, Key=_key(device_id))
+    except ClientError as e:
+        if e.response["Error"]["Code"] != "NoSuchKey":
+            raise
+        return None, None
+    return json.loads(obj["Body"].read()), obj.get("ETag")
+
+
+def _decayed(histogram: dict) -> dict:
+    now = time.time()
+    elapsed_days = max(0.0, (now - histogram["updated_at"]) / 86400)
+    factor = 0.5 ** (elapsed_days / HALF_LIFE_DAYS)
+    return {
+        "slots": [v * factor for v in histogram["slots"]],
+        "updated_at": now,
+    }
+
+
+def _key(device_id: str) -> str:
+    return f"{USAGE_PREFIX}/{device_id}.json"
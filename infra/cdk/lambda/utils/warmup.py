@@ -0,0 +1,12 @@
+from typing import Any
+
+# Payload of scheduled invocations that only keep an execution environment warm
+WARMUP_EVENT = {"warmup": True}
+
+
+def is_warmup_event(event: Any) -> bool:
+    return isinstance(event, dict) and event.get("warmup") is True
+
+
+def warmup_response() -> dict[str, Any]:
+    return {"statusCode": 200, "body": "warm"}
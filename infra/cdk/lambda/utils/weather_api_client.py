@@ -1,9 +1,8 @@
 import json
 import os
 from typing import Any
-import urllib.parse
-import urllib.request
 
+from utils.http_transport import HttpTransport
 from utils.weather_api_client_models import GetForecastResponse
 
 
@@ -14,15 +13,21 @@ class WeatherApiClient:
     def __init__(self, api_key: str, lang: str):
         self._api_key = api_key
         self.lang = lang
+        # Kept-alive connections, reused across warm invocations
+        self._transport = HttpTransport(
+            WEATHER_API_BASE_URL, headers={"User-Agent": "weather-client/1.0"}
+        )
 
-    def _get(self, url_path: str, params: dict[str, Any]) -> dict[str, Any]:
-        qs = urllib.parse.urlencode(params)
-        url = f"{WEATHER_API_BASE_URL}{url_path}?{qs}"
-        req = urllib.request.Request(url, headers={"User-Agent": "weather-client/1.0"})
-        with urllib.request.urlopen(req, timeout=20) as resp:
-            if resp.status != 200:
-                raise RuntimeError(f"WeatherAPI HTTP {resp.status}")
-            return json.load(resp)
+    def _get(
+        self, url_path: str, params: dict[str, Any], timeout: float = 20
+    ) -> dict[str, Any]:
+        """
+        GET a WeatherAPI endpoint. `timeout` is the budget for all attempts.
+        """
+        resp = self._transport.get(url_path, params, budget_seconds=timeout)
+        if resp.status != 200:
+            raise RuntimeError(f"WeatherAPI HTTP {resp.status}")
+        return json.loads(resp.body)
 
     def get_forecast(
         self,
@@ -32,15 +37,35 @@ class WeatherApiClient:
         include_aqi: bool | None,
         include_alerts: bool | None,
     ) -> GetForecastResponse:
+        response_data = self.get_forecast_data(
+            q=q, days=days, include_aqi=include_aqi, include_alerts=include_alerts
+        )
+
+        # Validate and return
+        return GetForecastResponse.model_validate(response_data)
+
+    def get_forecast_data(
+        self,
+        *,
+        q: str,
+        days: int | None,
+        include_aqi: bool | None,
+        include_alerts: bool | None,
+        timeout: float = 20,
+        lang: str | None = None,
+    ) -> dict[str, Any]:
+        """
+        Like `get_forecast`, but returns the decoded JSON without validation.
+
+        Used by callers that only need a small subset of the response and
+        validate it themselves. `lang` overrides the language of the client.
+        """
         params = {
             "key": self._api_key,
             "q": q,
             "days": str(days),
             "aqi": "yes" if include_aqi else "no",
             "alerts": "yes" if include_alerts else "no",
-            "lang": self.lang,
+            "lang": lang or self.lang,
         }
-        response_data = self._get("/forecast.json", params)
-
-        # Validate and return
-        return GetForecastResponse.model_validate(response_data)
+        return self._get("/forecast.json", params, timeout=timeout)
@@ -3,13 +3,20 @@
 from pydantic import BaseModel, ConfigDict, Field
 
 
-class ConditionWa(BaseModel):
+class BaseModelWa(BaseModel):
+    # The full response tree is only validated by `WeatherApiClient.get_forecast`
+    # (the next-actions function parses the raw JSON), so its validators are
+    # built on first use instead of at import time.
+    model_config = ConfigDict(defer_build=True)
+
+
+class ConditionWa(BaseModelWa):
     text: str
     icon: str
     code: int
 
 
-class AirQualityWa(BaseModel):
+class AirQualityWa(BaseModelWa):
     co: float
     no2: float
     o3: float
@@ -24,7 +31,7 @@ class AirQualityWa(BaseModel):
     )
 
 
-class LocationWa(BaseModel):
+class LocationWa(BaseModelWa):
     name: str
     region: str
     country: str
@@ -35,7 +42,7 @@ class LocationWa(BaseModel):
     localtime: str
 
 
-class CurrentWa(BaseModel):
+class CurrentWa(BaseModelWa):
     last_updated_epoch: int
     last_updated: str
     temp_c: float
@@ -72,7 +79,7 @@ class CurrentWa(BaseModel):
     gti: float | None = None
 
 
-class DayWa(BaseModel):
+class DayWa(BaseModelWa):
     maxtemp_c: float
     maxtemp_f: float
     mintemp_c: float
@@ -96,7 +103,7 @@ class DayWa(BaseModel):
     air_quality: AirQualityWa | None = None
 
 
-class AstroWa(BaseModel):
+class AstroWa(BaseModelWa):
     sunrise: str
     sunset: str
     moonrise: str
@@ -107,7 +114,7 @@ class AstroWa(BaseModel):
     is_sun_up: int
 
 
-class HourWa(BaseModel):
+class HourWa(BaseModelWa):
     time_epoch: int
     time: str
     temp_c: float
@@ -149,7 +156,7 @@ class HourWa(BaseModel):
     gti: float | None = None
 
 
-class ForecastDayWa(BaseModel):
+class ForecastDayWa(BaseModelWa):
     date: str
     date_epoch: int
     day: DayWa
@@ -157,11 +164,11 @@ class ForecastDayWa(BaseModel):
     hour: list[HourWa]
 
 
-class ForecastWa(BaseModel):
+class ForecastWa(BaseModelWa):
     forecastday: list[ForecastDayWa]
 
 
-class AlertWa(BaseModel):
+class AlertWa(BaseModelWa):
     headline: str
     msgtype: str
     severity: str
@@ -177,11 +184,11 @@ class AlertWa(BaseModel):
     instruction: str
 
 
-class AlertsWa(BaseModel):
+class AlertsWa(BaseModelWa):
     alert: list[AlertWa]
 
 
-class GetForecastResponse(BaseModel):
+class GetForecastResponse(BaseModelWa):
     model_config = ConfigDict(
         validate_by_alias=True,  # accept incoming dashed keys
         validate_by_name=True,  # also allow field names
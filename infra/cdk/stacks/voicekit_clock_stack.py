@@ -1,8 +1,14 @@
 from aws_cdk import (
+    CfnOutput,
     Duration,
     RemovalPolicy,
     Stack,
     aws_apigateway as apigw,
+    aws_applicationautoscaling as appscaling,
+    aws_cloudfront as cloudfront,
+    aws_cloudfront_origins as origins,
+    aws_events as events,
+    aws_events_targets as events_targets,
     aws_iam as iam,
     aws_lambda as _lambda,
     aws_s3 as s3,
@@ -10,7 +16,10 @@ from aws_cdk import (
 from aws_cdk import aws_lambda_python_alpha as lambda_python
 from constructs import Construct
 from dotenv import load_dotenv
+import hashlib
+import json
 import os
+import re
 
 load_dotenv()
 
@@ -22,6 +31,61 @@ CONTENTFUL_SPACE_ID = os.environ["CONTENTFUL_SPACE_ID"]
 CONTENTFUL_ACCESS_TOKEN = os.environ["CONTENTFUL_ACCESS_TOKEN"]
 INCLUDE_BIRTHDAY_CALENDAR = os.environ["INCLUDE_BIRTHDAY_CALENDAR"]
 
+BEDROCK_REGION = "eu-central-1"
+# Primary and fallback LLM, invoked through their EU inference profiles
+LLM_MODEL_ID = "anthropic.claude-sonnet-4-20250514-v1:0"
+LLM_FALLBACK_MODEL_ID = "anthropic.claude-haiku-4-5-20251001-v1:0"
+# EU destinations the EU inference profiles route to
+LLM_DESTINATION_REGIONS = [
+    "eu-central-1",
+    "eu-west-1",
+    "eu-west-3",
+    "eu-north-1",
+    "eu-south-1",
+    "eu-south-2",
+]
+
+
+def lambda_asset_excludes(*paths: str) -> list[str]:
+    """
+    Asset exclude patterns that bundle only `paths` (files or directories,
+    relative to `lambda/`), so that each function gets a minimal code bundle.
+    """
+    patterns = ["*"]
+    for path in paths:
+        parts = path.split("/")
+        # Parent directories must be re-included explicitly
+        patterns += ["!" + "/".join(parts[: i + 1]) for i in range(len(parts))]
+        patterns.append(f"!{path}/**")
+    patterns.append("**/__pycache__")
+    return list(dict.fromkeys(patterns))
+
+
+# Payload of warm-up pings, recognized by the handlers (see utils/warmup.py)
+WARMUP_EVENT = {"warmup": True}
+
+# Viewer-request function of the `/audio` edge cache. Normalizes the whitespace
+# and encoding of `text` (neither changes the speech) and adds the fingerprint
+# of the synthesis parameters as `tts`, so that both are part of the cache key
+# and a new voice or engine does not serve stale audio. The Lambda ignores
+# `tts`.
+AUDIO_CACHE_KEY_FUNCTION = """
+function handler(event) {
+  var request = event.request;
+  var text = request.querystring.text;
+  if (text && text.value) {
+    try {
+      var decoded = decodeURIComponent(text.value.replace(/\\+/g, " "));
+      text.value = encodeURIComponent(decoded.trim().replace(/\\s+/g, " "));
+    } catch (e) {
+      // Malformed encoding: leave it to the origin
+    }
+  }
+  request.querystring.tts = { value: "__TTS_FINGERPRINT__" };
+  return request;
+}
+"""
+
 
 class VoicekitClockStack(Stack):
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
@@ -36,28 +100,67 @@ class VoicekitClockStack(Stack):
             removal_policy=RemovalPolicy.DESTROY,
             block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
             enforce_ssl=True,
+            lifecycle_rules=[
+                # Generated messages are keyed by a time bucket and are not
+                # reused once the bucket is over.
+                s3.LifecycleRule(
+                    prefix="next-actions/",
+                    expiration=Duration.days(1),
+                ),
+            ],
         )
 
+        tts_environment = {
+            "BUCKET_NAME": bucket.bucket_name,
+            # text-to-speech options tuned for German (focused on natural synthesis)
+            "TTS_VOICE_ID": "Daniel",  # 'Vicky' or 'Daniel' for generative engine
+            "TTS_ENGINE": "generative",  # 'standard', 'neural', 'long-form', or 'generative'
+            # faster engine for texts up to the max. length, and for longer
+            # texts while TTS_ENGINE is slower than the latency budget
+            "TTS_FAST_ENGINE": "neural",
+            "TTS_FAST_ENGINE_MAX_TEXT_LENGTH": "40",
+            "TTS_LATENCY_BUDGET_SECONDS": "2.5",
+            "TTS_OUTPUT_FORMAT": "mp3",
+            "TTS_SAMPLE_RATE": "24000",  # '8000', '16000', '22050', or '24000'
+        }
+        tts_fingerprint = hashlib.sha256(
+            json.dumps(
+                {k: v for k, v in tts_environment.items() if k.startswith("TTS_")},
+                sort_keys=True,
+            ).encode("utf-8")
+        ).hexdigest()[:12]
+
         # GET /audio
         audio_get_fn = _lambda.Function(
             self,
             "AudioGetHandler",
             handler="api.audio.get.index.handler",  # <file path>.<function name>
-            code=_lambda.Code.from_asset("lambda"),
+            code=_lambda.Code.from_asset(
+                "lambda",
+                exclude=lambda_asset_excludes(
+                    "api/audio",
+                    "utils/__init__.py",
+                    "utils/aws_clients.py",
+                    "utils/device_config.py",
+                    "utils/metrics.py",
+                    "utils/mp3.py",
+                    "utils/sentences.py",
+                    "utils/speech.py",
+                    "utils/ttl_cache.py",
+                    "utils/tts_router.py",
+                    "utils/usage_histogram.py",
+                    "utils/warmup.py",
+                ),
+            ),
             runtime=_lambda.Runtime.PYTHON_3_12,
             architecture=_lambda.Architecture.ARM_64,  # or X86_64; ARM is cheaper
             memory_size=256,
             timeout=Duration.seconds(15),
-            environment={
-                "BUCKET_NAME": bucket.bucket_name,
-                # text-to-speech options tuned for German (focused on natural synthesis)
-                "TTS_VOICE_ID": "Daniel",  # 'Vicky' or 'Daniel' for generative engine
-                "TTS_ENGINE": "generative",  # 'standard', 'neural', 'long-form', or 'generative'
-                "TTS_OUTPUT_FORMAT": "mp3",
-                "TTS_SAMPLE_RATE": "24000",  # '8000', '16000', '22050', or '24000'
-            },
+            environment=tts_environment,
         )
 
+        audio_get_target = self._add_warm_capacity(audio_get_fn, "audio")
+
         # Allow lambda to read/write S3 and synthesize with Polly
         bucket.grant_read_write(audio_get_fn)
         audio_get_fn.add_to_role_policy(
@@ -67,6 +170,37 @@ class VoicekitClockStack(Stack):
             )
         )
 
+        briefing_environment = {
+            "BEDROCK_REGION": BEDROCK_REGION,
+            "BEDROCK_MODEL_ID": f"eu.{LLM_MODEL_ID}",
+            # faster model for hedged requests (see LLM_HEDGE_PERCENTILE)
+            "BEDROCK_FALLBACK_MODEL_ID": f"eu.{LLM_FALLBACK_MODEL_ID}",
+            "LLM_HEDGE_PERCENTILE": "90",
+            "LLM_HEDGE_DEFAULT_DELAY_SECONDS": "6",
+            "WEATHER_API_BASE_URL": WEATHER_API_BASE_URL,
+            "WEATHER_API_KEY": WEATHER_API_KEY,
+            "WEATHER_API_LOCATION": WEATHER_API_LOCATION,
+            "WEATHER_API_LANG": "de",
+            "CONTENTFUL_SPACE_ID": CONTENTFUL_SPACE_ID,
+            "CONTENTFUL_ACCESS_TOKEN": CONTENTFUL_ACCESS_TOKEN,
+            "INCLUDE_BIRTHDAY_CALENDAR": INCLUDE_BIRTHDAY_CALENDAR,
+            # max. (estimated) prompt tokens for the compact forecast data
+            "FORECAST_TOKEN_BUDGET": "1200",
+            # cache for generated messages, keyed by their inputs
+            "BUCKET_NAME": bucket.bucket_name,
+            "MESSAGE_CACHE_BUCKET_MINUTES": "30",
+            "FORECAST_CACHE_TTL_SECONDS": "300",
+            # devices in the same grid cell share one forecast (see README)
+            "FORECAST_GRID_DEGREES": "0.05",
+            # 'llm' or 'template' (rule-based briefing, used as fallback for 'llm')
+            "BRIEFING_MODE": "llm",
+            "LLM_LATENCY_BUDGET_SECONDS": "12",
+            # cached forecasts up to this age are used if WeatherAPI is slow
+            "STALE_FORECAST_MAX_AGE_SECONDS": "10800",
+            # share of invocations that log prompts and messages
+            "METRICS_VERBOSE_SAMPLE_RATE": "0.05",
+        }
+
         # POST /next-actions
         next_actions_post_fn = lambda_python.PythonFunction(
             self,
@@ -74,70 +208,137 @@ class VoicekitClockStack(Stack):
             entry="lambda",
             index="api/next_actions/post/index.py",  # file name
             handler="handler",  # function name
+            bundling=lambda_python.BundlingOptions(
+                asset_excludes=lambda_asset_excludes(
+                    "api/next_actions", "utils", "requirements.txt"
+                ),
+            ),
             runtime=_lambda.Runtime.PYTHON_3_12,
             architecture=_lambda.Architecture.ARM_64,  # or X86_64; ARM is cheaper
             memory_size=256,
             timeout=Duration.seconds(60),
             environment={
-                "BEDROCK_REGION": "eu-central-1",
-                "BEDROCK_MODEL_ID": "eu.anthropic.claude-sonnet-4-20250514-v1:0",
-                "WEATHER_API_BASE_URL": WEATHER_API_BASE_URL,
-                "WEATHER_API_KEY": WEATHER_API_KEY,
-                "WEATHER_API_LOCATION": WEATHER_API_LOCATION,
-                "WEATHER_API_LANG": "de",
-                "CONTENTFUL_SPACE_ID": CONTENTFUL_SPACE_ID,
-                "CONTENTFUL_ACCESS_TOKEN": CONTENTFUL_ACCESS_TOKEN,
-                "INCLUDE_BIRTHDAY_CALENDAR": INCLUDE_BIRTHDAY_CALENDAR,
+                **briefing_environment,
+                # for `?audio=inline|url` (audio attached to the actions)
+                **tts_environment,
+                # serve pre-rendered briefings up to this age
+                "PRERENDER_MAX_AGE_SECONDS": "600",
+                # time budget of requests without x-deadline-ms header
+                "DEFAULT_DEADLINE_SECONDS": "25",
             },
         )
 
-        # Bedrock requires both inference profile and foundation model
-        # permissions. The profile defines routing and usage, while the models
-        # must be explicitly listed (often across regions).
-        #
-        # https://docs.aws.amazon.com/bedrock/latest/userguide/inference-profiles-support.html
+        next_actions_post_target = self._add_warm_capacity(
+            next_actions_post_fn, "nextActions"
+        )
 
-        # Allow invoking the EU Sonnet 4 inference profile
-        LLM_INFERENCE_PROFILE_ARN = f"arn:aws:bedrock:eu-central-1:{self.account}:inference-profile/eu.anthropic.claude-sonnet-4-20250514-v1:0"
+        # Allow lambda to read/write cached messages and audio, and to
+        # synthesize the audio attached to the actions with Polly
+        bucket.grant_read_write(next_actions_post_fn)
         next_actions_post_fn.add_to_role_policy(
             iam.PolicyStatement(
-                actions=[
-                    "bedrock:InvokeModel",
-                ],
-                resources=[LLM_INFERENCE_PROFILE_ARN],
+                actions=["polly:SynthesizeSpeech"],
+                resources=["*"],  # Polly SynthesizeSpeech generally requires '*'
             )
         )
 
-        # Allow invoking the routed foundation models
-        DEST_LLM_MODEL_ARNS = [
-            # EU destinations for the EU Claude Sonnet 4 profile
-            "arn:aws:bedrock:eu-central-1::foundation-model/anthropic.claude-sonnet-4-20250514-v1:0",
-            "arn:aws:bedrock:eu-west-1::foundation-model/anthropic.claude-sonnet-4-20250514-v1:0",
-            "arn:aws:bedrock:eu-west-3::foundation-model/anthropic.claude-sonnet-4-20250514-v1:0",
-            "arn:aws:bedrock:eu-north-1::foundation-model/anthropic.claude-sonnet-4-20250514-v1:0",
-            "arn:aws:bedrock:eu-south-1::foundation-model/anthropic.claude-sonnet-4-20250514-v1:0",
-            "arn:aws:bedrock:eu-south-2::foundation-model/anthropic.claude-sonnet-4-20250514-v1:0",
-        ]
-        next_actions_post_fn.add_to_role_policy(
+        # Scheduled pre-rendering of the briefing and its audio
+        prerender_fn = lambda_python.PythonFunction(
+            self,
+            "PrerenderJobHandler",
+            entry="lambda",
+            index="jobs/prerender/index.py",  # file name
+            bundling=lambda_python.BundlingOptions(
+                asset_excludes=lambda_asset_excludes(
+                    "api/next_actions", "jobs/prerender", "utils", "requirements.txt"
+                ),
+            ),
+            handler="handler",  # function name
+            runtime=_lambda.Runtime.PYTHON_3_12,
+            architecture=_lambda.Architecture.ARM_64,  # or X86_64; ARM is cheaper
+            memory_size=256,
+            timeout=Duration.seconds(120),
+            environment={
+                **briefing_environment,
+                **tts_environment,
+                # 'always' or 'usage' (only shortly before expected use,
+                # based on the per-device histogram of press times)
+                "PRERENDER_MODE": "usage",
+                "PREWARM_LOOKAHEAD_MINUTES": "30",
+                "PREWARM_MIN_EXPECTED_PRESSES": "0.5",
+                # fast-engine audio re-synthesized with TTS_ENGINE per run
+                "AUDIO_UPGRADES_PER_RUN": "20",
+                "PREWARM_FUNCTION_NAMES": ",".join(
+                    [
+                        next_actions_post_target.function_name,
+                        audio_get_target.function_name,
+                    ]
+                ),
+            },
+        )
+        bucket.grant_read_write(prerender_fn)
+        next_actions_post_target.grant_invoke(prerender_fn)
+        audio_get_target.grant_invoke(prerender_fn)
+        prerender_fn.add_to_role_policy(
             iam.PolicyStatement(
-                actions=[
-                    "bedrock:InvokeModel",
-                ],
-                resources=DEST_LLM_MODEL_ARNS,
-                conditions={
-                    "StringLike": {
-                        "bedrock:InferenceProfileArn": LLM_INFERENCE_PROFILE_ARN
-                    }
-                },
+                actions=["polly:SynthesizeSpeech"],
+                resources=["*"],  # Polly SynthesizeSpeech generally requires '*'
             )
         )
+        events.Rule(
+            self,
+            "PrerenderSchedule",
+            schedule=events.Schedule.rate(Duration.minutes(5)),
+            targets=[events_targets.LambdaFunction(prerender_fn, retry_attempts=0)],
+        )
+
+        # Bedrock requires both inference profile and foundation model
+        # permissions. The profile defines routing and usage, while the models
+        # must be explicitly listed (often across regions).
+        #
+        # https://docs.aws.amazon.com/bedrock/latest/userguide/inference-profiles-support.html
+
+        # Allow invoking the EU inference profiles of the primary (Sonnet 4)
+        # and the fallback model (Haiku 4.5), and their routed foundation models
+        for llm_model_id in (LLM_MODEL_ID, LLM_FALLBACK_MODEL_ID):
+            llm_inference_profile_arn = f"arn:aws:bedrock:{BEDROCK_REGION}:{self.account}:inference-profile/eu.{llm_model_id}"
+            dest_llm_model_arns = [
+                f"arn:aws:bedrock:{region}::foundation-model/{llm_model_id}"
+                for region in LLM_DESTINATION_REGIONS
+            ]
+            for fn in (next_actions_post_fn, prerender_fn):
+                fn.add_to_role_policy(
+                    iam.PolicyStatement(
+                        actions=[
+                            "bedrock:InvokeModel",
+                            "bedrock:InvokeModelWithResponseStream",
+                        ],
+                        resources=[llm_inference_profile_arn],
+                    )
+                )
+                fn.add_to_role_policy(
+                    iam.PolicyStatement(
+                        actions=[
+                            "bedrock:InvokeModel",
+                            "bedrock:InvokeModelWithResponseStream",
+                        ],
+                        resources=dest_llm_model_arns,
+                        conditions={
+                            "StringLike": {
+                                "bedrock:InferenceProfileArn": llm_inference_profile_arn
+                            }
+                        },
+                    )
+                )
 
         # GET /health
         health_get_fn = _lambda.Function(
             self,
             "HealthGetHandler",
             handler="api.health.get.index.handler",  # <file path>.<function name>
-            code=_lambda.Code.from_asset("lambda"),
+            code=_lambda.Code.from_asset(
+                "lambda", exclude=lambda_asset_excludes("api/health")
+            ),
             runtime=_lambda.Runtime.PYTHON_3_12,
             architecture=_lambda.Architecture.ARM_64,  # or X86_64; ARM is cheaper
             memory_size=128,
@@ -160,14 +361,14 @@ class VoicekitClockStack(Stack):
         audio_res = api.root.add_resource("audio")
         audio_res.add_method(
             http_method="GET",
-            integration=apigw.LambdaIntegration(audio_get_fn),
+            integration=apigw.LambdaIntegration(audio_get_target),
             api_key_required=True,
         )
 
         next_actions_res = api.root.add_resource("next-actions")
         next_actions_res.add_method(
             http_method="POST",
-            integration=apigw.LambdaIntegration(next_actions_post_fn),
+            integration=apigw.LambdaIntegration(next_actions_post_target),
             api_key_required=True,
         )
 
@@ -188,3 +389,191 @@ class VoicekitClockStack(Stack):
         )
         plan.add_api_key(api_key)
         plan.add_api_stage(stage=api.deployment_stage)
+        self._add_household_api_keys(api, plan)
+
+        self._add_audio_edge_cache(api, tts_fingerprint)
+
+    def _add_household_api_keys(
+        self, api: apigw.RestApi, plan: apigw.UsagePlan
+    ) -> None:
+        """
+        Create one API key per entry of the `households` context (see README),
+        so that profiles can be bound to the key ID in `devices.json` instead
+        of the unauthenticated `x-device-id` header.
+        """
+        for household in self.node.try_get_context("households") or []:
+            name = "".join(
+                part.capitalize() for part in re.split(r"[^A-Za-z0-9]+", household)
+            )
+            key = api.add_api_key(f"{name}ApiKey")
+            plan.add_api_key(key)
+            # For "api_keys" in devices.json; the key value is in the console
+            CfnOutput(self, f"{name}ApiKeyId", value=key.key_id)
+
+    def _add_audio_edge_cache(self, api: apigw.RestApi, tts_fingerprint: str) -> None:
+        """
+        Put a CloudFront distribution in front of the API, as configured in the
+        `audioEdgeCache` context (see README).
+
+        `GET /audio` responses are cached at the edge, keyed by the normalized
+        text, the synthesis parameters and the `x-api-key` header. The API key
+        is forwarded, so API Gateway still checks it on every cache miss, and a
+        request only hits responses cached for the same key. The `x-device-id`
+        and `x-press` headers are forwarded on a miss but not part of the key,
+        so that the usage of the device is recorded (hits are not). All other
+        routes pass through uncached.
+
+        Modes:
+        - "off": no distribution (default).
+        - "cloudfront": distribution with the `priceClass` (default
+          "PRICE_CLASS_100", North America and Europe).
+        """
+        config = self.node.try_get_context("audioEdgeCache") or {}
+        mode = config.get("mode", "off")
+
+        if mode == "off":
+            return
+        if mode != "cloudfront":
+            raise ValueError(f"Unknown audio edge cache mode: {mode}")
+
+        audio_cache_policy = cloudfront.CachePolicy(
+            self,
+            "AudioCachePolicy",
+            comment="GET /audio by normalized text, synthesis parameters, API key",
+            # `/audio` responses are immutable (Cache-Control max-age of a year)
+            default_ttl=Duration.days(30),
+            min_ttl=Duration.seconds(0),
+            max_ttl=Duration.days(365),
+            query_string_behavior=cloudfront.CacheQueryStringBehavior.allow_list(
+                "text", "tts"
+            ),
+            header_behavior=cloudfront.CacheHeaderBehavior.allow_list("x-api-key"),
+            cookie_behavior=cloudfront.CacheCookieBehavior.none(),
+        )
+        # For the usage histogram of the device; not in the cache key
+        audio_origin_request_policy = cloudfront.OriginRequestPolicy(
+            self,
+            "AudioOriginRequestPolicy",
+            comment="GET /audio: device headers for the usage histogram",
+            header_behavior=cloudfront.OriginRequestHeaderBehavior.allow_list(
+                "x-device-id", "x-press"
+            ),
+            query_string_behavior=cloudfront.OriginRequestQueryStringBehavior.none(),
+            cookie_behavior=cloudfront.OriginRequestCookieBehavior.none(),
+        )
+        audio_cache_key_fn = cloudfront.Function(
+            self,
+            "AudioCacheKeyFunction",
+            runtime=cloudfront.FunctionRuntime.JS_2_0,
+            code=cloudfront.FunctionCode.from_inline(
+                AUDIO_CACHE_KEY_FUNCTION.replace("__TTS_FINGERPRINT__", tts_fingerprint)
+            ),
+        )
+
+        api_origin = origins.RestApiOrigin(api)
+        distribution = cloudfront.Distribution(
+            self,
+            "AudioEdgeCache",
+            comment="Edge cache for GET /audio of the voicekit-clock-api",
+            price_class=cloudfront.PriceClass[
+                config.get("priceClass", "PRICE_CLASS_100")
+            ],
+            # Everything else is passed to the API as is
+            default_behavior=cloudfront.BehaviorOptions(
+                origin=api_origin,
+                allowed_methods=cloudfront.AllowedMethods.ALLOW_ALL,
+                cache_policy=cloudfront.CachePolicy.CACHING_DISABLED,
+                origin_request_policy=(
+                    cloudfront.OriginRequestPolicy.ALL_VIEWER_EXCEPT_HOST_HEADER
+                ),
+                viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.HTTPS_ONLY,
+            ),
+            additional_behaviors={
+                "/audio": cloudfront.BehaviorOptions(
+                    origin=api_origin,
+                    allowed_methods=cloudfront.AllowedMethods.ALLOW_GET_HEAD,
+                    cached_methods=cloudfront.CachedMethods.CACHE_GET_HEAD,
+                    cache_policy=audio_cache_policy,
+                    origin_request_policy=audio_origin_request_policy,
+                    viewer_protocol_policy=cloudfront.ViewerProtocolPolicy.HTTPS_ONLY,
+                    # MP3 does not compress
+                    compress=False,
+                    function_associations=[
+                        cloudfront.FunctionAssociation(
+                            function=audio_cache_key_fn,
+                            event_type=cloudfront.FunctionEventType.VIEWER_REQUEST,
+                        )
+                    ],
+                ),
+            },
+        )
+
+        # Base URL for the device (AUDIO_BASE_URL)
+        CfnOutput(
+            self,
+            "AudioCdnUrl",
+            value=f"https://{distribution.distribution_domain_name}",
+        )
+
+    def _add_warm_capacity(self, fn: _lambda.Function, name: str) -> _lambda.IFunction:
+        """
+        Keep `fn` warm as configured in the `warmCapacity.<name>` context
+        (see README), and return the function or alias to invoke.
+
+        Modes:
+        - "off": on-demand only (default).
+        - "pings": invoke the function with a warm-up event on `schedule`.
+        - "provisioned": provisioned concurrency of `concurrency` environments
+          on a "live" alias, scaled up at `start` and down to zero at `stop`.
+
+        Schedules are EventBridge / Application Auto Scaling expressions in UTC,
+        e.g. "cron(0/5 4-7 * * ? *)".
+        """
+        config = (self.node.try_get_context("warmCapacity") or {}).get(name, {})
+        mode = config.get("mode", "off")
+
+        if mode == "off":
+            return fn
+
+        if mode == "pings":
+            events.Rule(
+                self,
+                f"{fn.node.id}WarmupSchedule",
+                schedule=events.Schedule.expression(config["schedule"]),
+                targets=[
+                    events_targets.LambdaFunction(
+                        fn,
+                        event=events.RuleTargetInput.from_object(WARMUP_EVENT),
+                        retry_attempts=0,
+                    )
+                ],
+            )
+            return fn
+
+        if mode == "provisioned":
+            concurrency = int(config.get("concurrency", 1))
+            alias = _lambda.Alias(
+                self,
+                f"{fn.node.id}LiveAlias",
+                alias_name="live",
+                version=fn.current_version,
+                # Provisioned from the deployment until the next `stop`, then
+                # managed by the scheduled scaling below
+                provisioned_concurrent_executions=concurrency,
+            )
+            scaling = alias.add_auto_scaling(min_capacity=0, max_capacity=concurrency)
+            scaling.scale_on_schedule(
+                "ScheduledWarmUp",
+                schedule=appscaling.Schedule.expression(config["start"]),
+                min_capacity=concurrency,
+                max_capacity=concurrency,
+            )
+            scaling.scale_on_schedule(
+                "ScheduledCoolDown",
+                schedule=appscaling.Schedule.expression(config["stop"]),
+                min_capacity=0,
+                max_capacity=0,
+            )
+            return alias
+
+        raise ValueError(f"Unknown warm capacity mode for {name}: {mode}")
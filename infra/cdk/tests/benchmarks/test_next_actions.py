@@ -0,0 +1,188 @@
+"""
+Benchmarks of the next-actions pipeline, offline: WeatherAPI, Contentful and
+Bedrock are replayed from the recorded fixtures and S3 is held in memory (see
+`benchmarks/replay.py`).
+
+Besides the timings of pytest-benchmark, the tests check the prompt size
+against the token budgets and the median latencies against generous upper
+bounds, so that a regression fails the run. Compare against a saved run with
+`--benchmark-compare-fail` for finer checks (see README).
+"""
+
+from contextlib import redirect_stdout
+from datetime import datetime
+import io
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from common import load_fixture
+from replay import (
+    CONTENTFUL_FIXTURE,
+    WEATHER_FIXTURE,
+    contentful_entries,
+    install_replay,
+)
+
+from api.next_actions.post import briefing, index
+from api.next_actions.post.forecast_cache import ForecastCache
+from api.next_actions.post.message_cache import MessageCache
+from api.next_actions.post.models import (
+    estimate_tokens,
+    forecast_description_to_compact_json,
+    map_contentful_birthday_items,
+    weather_api_forecast_data_to_forecast_description,
+    weather_api_forecast_response_to_forecast_description,
+)
+from utils.ttl_cache import TtlCache
+from utils.weather_api_client_models import GetForecastResponse
+
+EVENT = {"headers": {"Accept": "application/x-ndjson"}}
+
+
+def assert_median_below(benchmark: Any, max_ms: float) -> None:
+    # No timings with --benchmark-disable
+    if benchmark.stats is not None:
+        assert benchmark.stats.stats.median * 1000 < max_ms
+
+
+@pytest.fixture(scope="module")
+def stand_ins() -> dict[str, Any]:
+    return install_replay()
+
+
+@pytest.fixture(scope="module")
+def forecast_data() -> dict[str, Any]:
+    return load_fixture(WEATHER_FIXTURE)
+
+
+@pytest.fixture(scope="module")
+def forecast(forecast_data: dict[str, Any]) -> Any:
+    return weather_api_forecast_data_to_forecast_description(forecast_data)
+
+
+@pytest.fixture(scope="module")
+def birthdays() -> list[Any]:
+    return [
+        item
+        for item in map_contentful_birthday_items(
+            contentful_entries(CONTENTFUL_FIXTURE)
+        )
+        if 0 <= item.days_until_birthday <= 14
+    ]
+
+
+def clear_caches(s3: Any) -> None:
+    briefing.forecast_cache = ForecastCache(
+        s3,
+        briefing.BUCKET_NAME,
+        ttl_seconds=briefing.FORECAST_CACHE_TTL_SECONDS,
+        max_age_seconds=briefing.STALE_FORECAST_MAX_AGE_SECONDS,
+    )
+    briefing.birthday_calendar_cache = TtlCache(
+        ttl_seconds=briefing.BIRTHDAY_CALENDAR_CACHE_TTL_SECONDS
+    )
+    briefing.message_cache = MessageCache(
+        s3,
+        briefing.BUCKET_NAME,
+        ttl_seconds=briefing.MESSAGE_CACHE_BUCKET_MINUTES * 60,
+    )
+    s3.objects.clear()
+
+
+def test_forecast_response_to_description(benchmark, forecast_data, forecast):
+    response = GetForecastResponse.model_validate(forecast_data)
+
+    result = benchmark(weather_api_forecast_response_to_forecast_description, response)
+
+    assert result == forecast
+    assert_median_below(benchmark, 20)
+
+
+def test_forecast_data_to_description(benchmark, forecast_data, forecast):
+    result = benchmark(weather_api_forecast_data_to_forecast_description, forecast_data)
+
+    assert result == forecast
+    assert_median_below(benchmark, 20)
+
+
+def test_map_contentful_birthday_items(benchmark):
+    entries = contentful_entries(CONTENTFUL_FIXTURE)
+
+    items = benchmark(map_contentful_birthday_items, entries)
+
+    assert len(items) == len(entries)
+    assert_median_below(benchmark, 5)
+
+
+@pytest.mark.parametrize(
+    "token_budget, max_tokens",
+    [
+        (briefing.FORECAST_TOKEN_BUDGET, briefing.FORECAST_TOKEN_BUDGET),
+        # Current conditions, today, tomorrow and alerts are always kept
+        (briefing.FORECAST_TOKEN_BUDGET_REDUCED, 300),
+    ],
+)
+def test_forecast_serialization(benchmark, forecast, token_budget, max_tokens):
+    text = benchmark(
+        forecast_description_to_compact_json, forecast, token_budget=token_budget
+    )
+
+    assert estimate_tokens(text) <= max_tokens
+    assert estimate_tokens(text) < estimate_tokens(forecast.model_dump_json())
+    assert_median_below(benchmark, 5)
+
+
+def test_prompt_assembly(benchmark, forecast, birthdays):
+    datetime_hints = briefing._get_local_datetime_hints(
+        datetime.now(ZoneInfo("Europe/Berlin"))
+    )
+
+    def assemble() -> tuple[Any, Any]:
+        return (
+            briefing._build_system_prompt(),
+            briefing._build_messages(datetime_hints, forecast, birthdays),
+        )
+
+    system, messages = benchmark(assemble)
+
+    # The per-request part of the prompt stays within the forecast budget
+    # plus the date hints and birthdays
+    user_prompt = messages[0]["content"][0]["text"]
+    assert estimate_tokens(user_prompt) <= briefing.FORECAST_TOKEN_BUDGET + 400
+    # The static system prompt is cached by Bedrock from 1024 tokens on
+    assert sum(estimate_tokens(block.get("text", "")) for block in system) >= 1024
+    assert_median_below(benchmark, 10)
+
+
+def test_handler_warm(benchmark, stand_ins):
+    clear_caches(stand_ins["s3"])
+    # The debug output and EMF records of the handler would drown the results
+    with redirect_stdout(io.StringIO()):
+        index.handler(EVENT, None)
+        calls = stand_ins["bedrock"].calls
+
+        response = benchmark(index.handler, EVENT, None)
+
+    assert response["statusCode"] == 200
+    # Answered from the message cache
+    assert stand_ins["bedrock"].calls == calls
+    assert_median_below(benchmark, 20)
+
+
+def test_handler_cold(benchmark, stand_ins):
+    def handler_cold() -> dict[str, Any]:
+        clear_caches(stand_ins["s3"])
+        return index.handler(EVENT, None)
+
+    with redirect_stdout(io.StringIO()):
+        calls = stand_ins["bedrock"].calls
+
+        response = benchmark(handler_cold)
+
+    assert response["statusCode"] == 200
+    assert response["headers"]["Content-Type"].startswith("application/x-ndjson")
+    # Not answered from the message cache
+    assert stand_ins["bedrock"].calls > calls
+    assert_median_below(benchmark, 100)
@@ -0,0 +1,47 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable
+
+import pytest
+
+CDK_DIR = Path(__file__).resolve().parent.parent
+
+# Placeholders for the stack configuration that is read from `.env`
+STACK_ENV = {
+    "WEATHER_API_BASE_URL": "https://api.weatherapi.com/v1",
+    "WEATHER_API_KEY": "test",
+    "WEATHER_API_LOCATION": "52.52,13.41",
+    "CONTENTFUL_SPACE_ID": "test",
+    "CONTENTFUL_ACCESS_TOKEN": "test",
+    "INCLUDE_BIRTHDAY_CALENDAR": "True",
+}
+
+
+@pytest.fixture
+def synth() -> Callable[..., Any]:
+    """
+    Return a function that synthesizes the stack with the context of
+    `cdk.json`, updated by the given context values, and returns its
+    `aws_cdk.assertions.Template`.
+    """
+    for key, value in STACK_ENV.items():
+        os.environ.setdefault(key, value)
+    # Asset paths (e.g. "lambda") are relative to the CDK app
+    os.chdir(CDK_DIR)
+
+    import aws_cdk as cdk
+    from aws_cdk.assertions import Template
+
+    from stacks.voicekit_clock_stack import VoicekitClockStack
+
+    def synth_template(**context: Any) -> Template:
+        with open(CDK_DIR / "cdk.json", encoding="utf-8") as f:
+            app_context = json.load(f)["context"]
+        app_context.update(context)
+        # No Docker bundling of the Python functions
+        app_context["aws:cdk:bundling-stacks"] = []
+        app = cdk.App(context=app_context)
+        return Template.from_stack(VoicekitClockStack(app, "TestStack"))
+
+    return synth_template
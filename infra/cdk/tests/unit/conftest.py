@@ -0,0 +1,11 @@
+import sys
+from pathlib import Path
+
+CDK_DIR = Path(__file__).resolve().parent.parent.parent
+
+# The Lambda helpers are imported like in the benchmarks (see README)
+sys.path.insert(0, str(CDK_DIR / "benchmarks"))
+
+from common import setup_lambda_env  # noqa: E402
+
+setup_lambda_env()
@@ -0,0 +1,50 @@
+import pytest
+
+from common import load_fixture
+from replay import WEATHER_FIXTURE
+
+from api.next_actions.post.message_cache import message_fingerprint
+from api.next_actions.post.models import (
+    BirthdayCalendarItem,
+    weather_api_forecast_data_to_forecast_description,
+)
+
+BUCKET = "2026-10-19T07:00"
+
+
+@pytest.fixture(scope="module")
+def forecast():
+    return weather_api_forecast_data_to_forecast_description(
+        load_fixture(WEATHER_FIXTURE)
+    )
+
+
+def with_current(forecast, **fields):
+    current = forecast.current.model_copy(update=fields)
+    return forecast.model_copy(update={"current": current})
+
+
+def test_fingerprint_ignores_small_changes(forecast):
+    warm = with_current(forecast, temp_c=26.8)
+    slightly_warmer = with_current(forecast, temp_c=26.9)
+    # The exact local time of the forecast is not part of the message
+    localtime = warm.localtime.model_copy(update={"local_datetime": "07:59"})
+    later = warm.model_copy(update={"localtime": localtime})
+
+    fingerprint = message_fingerprint(warm, [], BUCKET)
+    assert message_fingerprint(slightly_warmer, [], BUCKET) == fingerprint
+    assert message_fingerprint(later, [], BUCKET) == fingerprint
+
+
+def test_fingerprint_changes_with_inputs(forecast):
+    fingerprint = message_fingerprint(forecast, [], BUCKET)
+    birthday = BirthdayCalendarItem(
+        name="Oma", date="2026-10-21", days_until_birthday=2, age=90
+    )
+
+    warmer = with_current(forecast, temp_c=forecast.current.temp_c + 2)
+
+    assert message_fingerprint(warmer, [], BUCKET) != fingerprint
+    assert message_fingerprint(forecast, [birthday], BUCKET) != fingerprint
+    assert message_fingerprint(forecast, [], "2026-10-19T07:15") != fingerprint
+    assert message_fingerprint(forecast, [], BUCKET, "Europe/Vienna") != fingerprint
@@ -0,0 +1,42 @@
+from utils.mp3 import concat_mp3
+
+# 144-byte MPEG 2 Layer III frames (48 kbit/s, 24 kHz)
+HEADER = b"\xff\xf3\x64\xc4"
+FRAME_A = HEADER + b"a" * 140
+FRAME_B = HEADER + b"b" * 140
+# Xing/Info frame after the side information
+XING_FRAME = HEADER + bytes(17) + b"Xing" + bytes(119)
+INFO_FRAME = HEADER + bytes(17) + b"Info" + bytes(119)
+
+
+def id3v2(body: bytes, footer: bool = False) -> bytes:
+    # Size as synchsafe integer (7 bits per byte)
+    size = bytes((len(body) >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    flags = 0x10 if footer else 0
+    return (
+        b"ID3\x04\x00" + bytes([flags]) + size + body + (bytes(10) if footer else b"")
+    )
+
+
+def id3v1() -> bytes:
+    return b"TAG" + bytes(125)
+
+
+def test_concat_mp3_strips_tags_and_info_frames():
+    parts = [
+        id3v2(b"TIT2" + bytes(200)) + XING_FRAME + FRAME_A + FRAME_A + id3v1(),
+        id3v2(b"TIT2" + bytes(20), footer=True) + INFO_FRAME + FRAME_B,
+    ]
+
+    assert concat_mp3(parts) == FRAME_A + FRAME_A + FRAME_B
+
+
+def test_concat_mp3_keeps_audio_frames():
+    # Without tags, the first frame is audio and must be kept
+    assert concat_mp3([FRAME_A, FRAME_B + FRAME_B]) == FRAME_A + FRAME_B + FRAME_B
+
+
+def test_concat_mp3_single_part_unchanged():
+    part = id3v2(b"TIT2" + bytes(20)) + XING_FRAME + FRAME_A
+
+    assert concat_mp3([part]) == part
@@ -0,0 +1,96 @@
+import importlib.util
+from pathlib import Path
+import threading
+
+import pytest
+
+DEVICE_DIR = Path(__file__).resolve().parents[4] / "src" / "voicekit-clock"
+
+# The device code has a `utils` package of its own, so the module is loaded
+# from its file
+_spec = importlib.util.spec_from_file_location(
+    "multi_event_detector", DEVICE_DIR / "utils" / "multi_event_detector.py"
+)
+multi_event_detector = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(multi_event_detector)
+MultiEventDetector = multi_event_detector.MultiEventDetector
+
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Gestures:
+    def __init__(self):
+        self.counts = []
+        self.dispatched = threading.Event()
+
+    def __call__(self, count: int) -> None:
+        self.counts.append(count)
+        self.dispatched.set()
+
+
+def test_dispatches_gesture_after_debounce_delay():
+    clock = FakeClock(100.0)
+    gestures = Gestures()
+    detector = MultiEventDetector(gestures, debounce_delay=0.1, clock=clock)
+
+    for now in (100.0, 100.05, 100.1):
+        clock.now = now
+        detector.handle_event()
+
+    assert gestures.dispatched.wait(timeout=2)
+    assert gestures.counts == [3]
+
+
+def test_dispatches_at_max_count_without_waiting():
+    clock = FakeClock(100.0)
+    gestures = Gestures()
+    detector = MultiEventDetector(gestures, debounce_delay=30, max_count=3, clock=clock)
+
+    for _ in range(3):
+        detector.handle_event()
+
+    assert gestures.dispatched.wait(timeout=2)
+    assert gestures.counts == [3]
+
+
+def test_waits_only_for_the_rest_of_the_delay_after_the_event():
+    # A kernel timestamp from before the debounce delay: dispatched right away
+    gestures = Gestures()
+    detector = MultiEventDetector(gestures, debounce_delay=30, clock=FakeClock(100.0))
+
+    detector.handle_event(69.0)
+
+    assert gestures.dispatched.wait(timeout=2)
+    assert gestures.counts == [1]
+
+
+def test_adaptive_debounce_follows_the_press_cadence():
+    # All timers are due right away, the gestures do not matter here
+    detector = MultiEventDetector(
+        lambda count: None,
+        debounce_delay=0.5,
+        adaptive_range=(0.3, 0.8),
+        clock=FakeClock(1000.0),
+    )
+
+    # Too few intervals
+    for i in range(4):
+        detector.handle_event(i * 0.1)
+    assert detector.debounce_delay == 0.5
+
+    # Fast presses: 1.5 x 0.1 s, limited to the minimum
+    for i in range(4, 6):
+        detector.handle_event(i * 0.1)
+    assert detector.debounce_delay == pytest.approx(0.3)
+
+    # A pause is a separate gesture and no interval; slower presses let the
+    # delay grow again
+    for i in range(20):
+        detector.handle_event(10.0 + i * 0.5)
+    assert detector.debounce_delay == pytest.approx(0.75)
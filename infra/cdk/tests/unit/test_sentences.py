@@ -0,0 +1,59 @@
+from utils.sentences import pop_sentences, split_sentences
+
+
+def test_split_sentences():
+    assert split_sentences("Es ist 7 Uhr. Heute wird es sonnig! Regnet es?") == [
+        "Es ist 7 Uhr.",
+        "Heute wird es sonnig!",
+        "Regnet es?",
+    ]
+
+
+def test_split_sentences_keeps_date_ordinals():
+    assert split_sentences("Am 9. August hat Oma Geburtstag. Schön.") == [
+        "Am 9. August hat Oma Geburtstag.",
+        "Schön.",
+    ]
+    # A lower-case word after the number continues the sentence
+    assert split_sentences("Der 3. des Monats ist frei.") == [
+        "Der 3. des Monats ist frei."
+    ]
+
+
+def test_split_sentences_ends_sentence_after_number():
+    assert split_sentences("Es werden bis zu 20. Morgen regnet es.") == [
+        "Es werden bis zu 20.",
+        "Morgen regnet es.",
+    ]
+
+
+def test_split_sentences_keeps_abbreviations():
+    assert split_sentences(
+        "Es wird ca. 20 Grad warm, z. B. am Nachmittag. Danach Regen."
+    ) == ["Es wird ca. 20 Grad warm, z. B. am Nachmittag.", "Danach Regen."]
+
+
+def test_split_sentences_keeps_closing_quotes():
+    assert split_sentences("Sie sagte: „Guten Morgen.“ Dann ging sie.") == [
+        "Sie sagte: „Guten Morgen.“",
+        "Dann ging sie.",
+    ]
+
+
+def test_pop_sentences_waits_for_the_next_word():
+    # "Mor" may still become "Morgen" or, after "9.", a month
+    assert pop_sentences("Es ist warm. Mor") == ([], "Es ist warm. Mor")
+    assert pop_sentences("Am 9. Aug") == ([], "Am 9. Aug")
+    assert pop_sentences("Es ist warm. Morgen ") == (["Es ist warm."], "Morgen ")
+
+
+def test_pop_sentences_streamed():
+    chunks = ["Am 9. ", "August hat ", "Oma Geburtstag. ", "Es wird ", "warm."]
+    sentences, buffer = [], ""
+    for chunk in chunks:
+        popped, buffer = pop_sentences(buffer + chunk)
+        sentences += popped
+    popped, buffer = pop_sentences(buffer, final=True)
+
+    assert sentences + popped == ["Am 9. August hat Oma Geburtstag.", "Es wird warm."]
+    assert buffer == ""
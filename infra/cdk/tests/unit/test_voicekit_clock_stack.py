@@ -0,0 +1,233 @@
+from aws_cdk.assertions import Match
+
+
+def warm_capacity(audio=None, next_actions=None):
+    return {
+        "warmCapacity": {
+            "audio": audio or {"mode": "off"},
+            "nextActions": next_actions or {"mode": "off"},
+        }
+    }
+
+
+def test_warm_capacity_off(synth):
+    template = synth(**warm_capacity())
+
+    template.resource_count_is("AWS::Lambda::Alias", 0)
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalableTarget", 0)
+    # Only the prerender schedule
+    template.resource_count_is("AWS::Events::Rule", 1)
+    template.has_resource_properties(
+        "AWS::Events::Rule", {"ScheduleExpression": "rate(5 minutes)"}
+    )
+
+
+def test_warm_capacity_pings(synth):
+    template = synth(
+        **warm_capacity(
+            audio={"mode": "pings", "schedule": "cron(0/5 4-7 * * ? *)"},
+        )
+    )
+
+    template.resource_count_is("AWS::Lambda::Alias", 0)
+    template.has_resource_properties(
+        "AWS::Events::Rule",
+        {
+            "ScheduleExpression": "cron(0/5 4-7 * * ? *)",
+            "Targets": [
+                Match.object_like(
+                    {
+                        "Arn": {
+                            "Fn::GetAtt": [
+                                Match.string_like_regexp("AudioGetHandler"),
+                                "Arn",
+                            ]
+                        },
+                        # Recognized by utils/warmup.py
+                        "Input": '{"warmup":true}',
+                        "RetryPolicy": {"MaximumRetryAttempts": 0},
+                    }
+                )
+            ],
+        },
+    )
+
+
+def test_warm_capacity_provisioned(synth):
+    template = synth(
+        **warm_capacity(
+            next_actions={
+                "mode": "provisioned",
+                "concurrency": 2,
+                "start": "cron(45 3 * * ? *)",
+                "stop": "cron(0 8 * * ? *)",
+            },
+        )
+    )
+
+    template.resource_count_is("AWS::Lambda::Alias", 1)
+    template.has_resource_properties(
+        "AWS::Lambda::Alias",
+        {
+            "Name": "live",
+            "FunctionName": {"Ref": Match.string_like_regexp("NextActionsPostHandler")},
+            "ProvisionedConcurrencyConfig": {"ProvisionedConcurrentExecutions": 2},
+        },
+    )
+    template.has_resource_properties(
+        "AWS::ApplicationAutoScaling::ScalableTarget",
+        {
+            "ScalableDimension": "lambda:function:ProvisionedConcurrency",
+            "MinCapacity": 0,
+            "MaxCapacity": 2,
+            "ScheduledActions": Match.array_with(
+                [
+                    {
+                        "ScheduledActionName": "ScheduledWarmUp",
+                        "Schedule": "cron(45 3 * * ? *)",
+                        "ScalableTargetAction": {"MinCapacity": 2, "MaxCapacity": 2},
+                    },
+                    {
+                        "ScheduledActionName": "ScheduledCoolDown",
+                        "Schedule": "cron(0 8 * * ? *)",
+                        "ScalableTargetAction": {"MinCapacity": 0, "MaxCapacity": 0},
+                    },
+                ]
+            ),
+        },
+    )
+    # The API invokes the alias
+    template.has_resource_properties(
+        "AWS::Lambda::Permission",
+        {
+            "FunctionName": {
+                "Ref": Match.string_like_regexp("NextActionsPostHandlerLiveAlias")
+            },
+            "Principal": "apigateway.amazonaws.com",
+        },
+    )
+
+
+def test_audio_edge_cache_off(synth):
+    template = synth(audioEdgeCache={"mode": "off"})
+
+    template.resource_count_is("AWS::CloudFront::Distribution", 0)
+    template.resource_count_is("AWS::CloudFront::CachePolicy", 0)
+    template.resource_count_is("AWS::CloudFront::OriginRequestPolicy", 0)
+    template.resource_count_is("AWS::CloudFront::Function", 0)
+    assert "AudioCdnUrl" not in template.to_json().get("Outputs", {})
+
+
+def test_audio_edge_cache_cloudfront(synth):
+    template = synth(
+        audioEdgeCache={"mode": "cloudfront", "priceClass": "PRICE_CLASS_ALL"}
+    )
+
+    template.has_resource_properties(
+        "AWS::CloudFront::CachePolicy",
+        {
+            "CachePolicyConfig": Match.object_like(
+                {
+                    "ParametersInCacheKeyAndForwardedToOrigin": Match.object_like(
+                        {
+                            "QueryStringsConfig": {
+                                "QueryStringBehavior": "whitelist",
+                                "QueryStrings": ["text", "tts"],
+                            },
+                            "HeadersConfig": {
+                                "HeaderBehavior": "whitelist",
+                                "Headers": ["x-api-key"],
+                            },
+                            "CookiesConfig": {"CookieBehavior": "none"},
+                        }
+                    ),
+                }
+            )
+        },
+    )
+    # The device headers reach the origin without splitting the cache
+    template.has_resource_properties(
+        "AWS::CloudFront::OriginRequestPolicy",
+        {
+            "OriginRequestPolicyConfig": Match.object_like(
+                {
+                    "HeadersConfig": {
+                        "HeaderBehavior": "whitelist",
+                        "Headers": ["x-device-id", "x-press"],
+                    },
+                    "QueryStringsConfig": {"QueryStringBehavior": "none"},
+                }
+            )
+        },
+    )
+    template.has_resource_properties(
+        "AWS::CloudFront::Function",
+        {
+            "FunctionConfig": Match.object_like({"Runtime": "cloudfront-js-2.0"}),
+            # The fingerprint of the synthesis parameters is filled in
+            "FunctionCode": Match.string_like_regexp(
+                r'tts = \{ value: "[0-9a-f]{12}" \}'
+            ),
+        },
+    )
+
+    template.resource_count_is("AWS::CloudFront::Distribution", 1)
+    distribution = next(
+        iter(template.find_resources("AWS::CloudFront::Distribution").values())
+    )
+    config = distribution["Properties"]["DistributionConfig"]
+    assert config["PriceClass"] == "PriceClass_All"
+
+    # Both behaviors go to the API stage
+    (origin,) = config["Origins"]
+    assert "execute-api" in str(origin["DomainName"])
+    assert config["DefaultCacheBehavior"]["TargetOriginId"] == origin["Id"]
+
+    (audio_behavior,) = config["CacheBehaviors"]
+    assert audio_behavior["PathPattern"] == "/audio"
+    assert audio_behavior["TargetOriginId"] == origin["Id"]
+    assert audio_behavior["AllowedMethods"] == ["GET", "HEAD"]
+    assert audio_behavior["CachePolicyId"] == {
+        "Ref": next(iter(template.find_resources("AWS::CloudFront::CachePolicy")))
+    }
+    assert audio_behavior["OriginRequestPolicyId"] == {
+        "Ref": next(
+            iter(template.find_resources("AWS::CloudFront::OriginRequestPolicy"))
+        )
+    }
+    (association,) = audio_behavior["FunctionAssociations"]
+    assert association["EventType"] == "viewer-request"
+    assert association["FunctionARN"] == {
+        "Fn::GetAtt": [
+            next(iter(template.find_resources("AWS::CloudFront::Function"))),
+            "FunctionARN",
+        ]
+    }
+
+    template.has_output(
+        "AudioCdnUrl",
+        {
+            "Value": {
+                "Fn::Join": [
+                    "",
+                    [
+                        "https://",
+                        {"Fn::GetAtt": [Match.any_value(), "DomainName"]},
+                    ],
+                ]
+            }
+        },
+    )
+
+
+def test_household_api_keys(synth):
+    template = synth(households=["grandma", "summer-house"])
+
+    # The client key and one per household, all on the usage plan
+    template.resource_count_is("AWS::ApiGateway::ApiKey", 3)
+    template.resource_count_is("AWS::ApiGateway::UsagePlanKey", 3)
+    for name in ("Grandma", "SummerHouse"):
+        template.has_output(
+            f"{name}ApiKeyId",
+            {"Value": {"Ref": Match.string_like_regexp(f"{name}ApiKey")}},
+        )
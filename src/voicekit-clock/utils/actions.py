@@ -1,21 +1,41 @@
 import json
 import logging
 import os
-import urllib.request
+import urllib.parse
+from typing import Optional
 
+from utils.http_transport import request
 
-def get_next_action():
+# Time the backend has to answer a next-actions request. It is sent along as
+# relative deadline, so that the backend degrades instead of running late.
+NEXT_ACTIONS_DEADLINE_SECONDS = float(
+    os.environ.get("NEXT_ACTIONS_DEADLINE_SECONDS", "20")
+)
+# Extra wait time for the network on top of the deadline
+NETWORK_MARGIN_SECONDS = 5
+
+
+def get_next_actions(audio: Optional[str] = None):
     """
-    Request a next action from the backend.
+    Request the next actions from the backend.
 
     This function calls the `/next-actions` endpoint of the Voice Kit Clock API
-    using a POST request. The backend determines what the voice clock should
-    do next (e.g., announce the time, read the weather forecast, etc.).
+    using a POST request and asks for newline-delimited JSON (NDJSON). The
+    backend then returns one action per sentence, so that each sentence can be
+    synthesized and spoken on its own. The response is not streamed: API
+    Gateway delivers the whole body at once, and the lines are parsed after it
+    was read. Backends that only answer with a single JSON object are
+    supported as well.
+
+    Args:
+        audio: "inline" or "url" to let the backend attach the synthesized
+            audio to the actions (as base64 `audio` or presigned `audio_url`),
+            which saves one `/audio` request per action.
 
-    Returns:
-        dict: Parsed JSON response describing the next action.
+    Yields:
+        dict: Parsed JSON objects describing the next actions, in order.
     """
-    logging.info("❓ determine next action")
+    logging.info("❓ determine next actions")
 
     api_base = os.environ.get("API_BASE_URL", "").rstrip("/")
     if not api_base:
@@ -25,17 +45,35 @@ def get_next_action():
     if not api_key:
         raise RuntimeError("Missing environment variable: API_KEY")
 
+    headers = {
+        "Accept": "application/x-ndjson, application/json;q=0.9",
+        "x-api-key": api_key,
+        "x-deadline-ms": str(int(NEXT_ACTIONS_DEADLINE_SECONDS * 1000)),
+    }
+    # Selects the profile of the clock, unless its API key is bound to one
+    device_id = os.environ.get("DEVICE_ID", "")
+    if device_id:
+        headers["x-device-id"] = device_id
+
     url = api_base + "/next-actions"
-    req = urllib.request.Request(
+    if audio:
+        url += "?" + urllib.parse.urlencode({"audio": audio})
+    resp = request(
+        "POST",
         url,
-        method="POST",
-        headers={
-            "Accept": "application/json",
-            "x-api-key": api_key,
-        },
+        headers=headers,
+        timeout=NEXT_ACTIONS_DEADLINE_SECONDS + NETWORK_MARGIN_SECONDS,
+        budget_seconds=NEXT_ACTIONS_DEADLINE_SECONDS + NETWORK_MARGIN_SECONDS,
     )
+    if resp.status != 200:
+        raise Exception(f"Server error {resp.status}")
+
+    ct = resp.headers.get("content-type", "")
+    if not ct.lower().startswith("application/x-ndjson"):
+        yield json.loads(resp.body.decode("utf-8"))
+        return
 
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        if resp.status != 200:
-            raise Exception(f"Server error {resp.status}")
-        return json.load(resp)
+    for line in resp.body.splitlines():
+        line = line.strip()
+        if line:
+            yield json.loads(line.decode("utf-8"))
@@ -1,9 +1,20 @@
-import contextlib
+import base64
 import logging
 import os
+import queue
 import subprocess
+import threading
 import urllib.parse
-import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from utils.http_transport import Response, request
+
+# Cloud audio requests of `synthesize_text_raced`. A lost request keeps running
+# in the background until its timeout (`CLOUD_AUDIO_TIMEOUT_SECONDS`).
+_race_executor = ThreadPoolExecutor(max_workers=4)
+# Local synthesis, separate so that it never waits behind hung cloud requests
+_local_executor = ThreadPoolExecutor(max_workers=1)
 
 
 def play_audio(mp3_path: str, content: str) -> None:
@@ -47,19 +58,171 @@ def play_audio(mp3_path: str, content: str) -> None:
             logging.warning(f"Remove temp wav file failed: {e}")
 
 
-def synthesize_text(content: str) -> None:
+def synthesize_text_raced(
+    content: str,
+    lang: str = "de-DE",
+    budget_seconds: Optional[float] = None,
+    timeout_seconds: Optional[float] = None,
+    press: bool = False,
+) -> None:
     """
-    Generate and play back speech audio for the given text.
+    Play back speech for the given text, from the backend or synthesized
+    locally, whichever is ready first.
 
-    The method requests an MP3 audio stream from the backend
-    and plays it via `play_audio`.
+    The audio is requested from the backend. If it has not arrived within
+    `budget_seconds` (or the request failed), the text is also synthesized
+    locally with pico2wave, and the first result is played. The time to
+    speech is thus bounded by the budget plus the local synthesis time, even
+    on a flaky connection. The backend request is given up after
+    `timeout_seconds`, so that a lost request does not keep a worker busy.
 
     Args:
         content: The text to be synthesized.
+        lang: The language of the local synthesis.
+        budget_seconds: Time for the backend before local synthesis starts
+            (default: `CLOUD_AUDIO_BUDGET_SECONDS`, 0.8 s).
+        timeout_seconds: Total time for the backend request (default:
+            `CLOUD_AUDIO_TIMEOUT_SECONDS`, 3 s).
+        press: Whether the text answers a button press of its own (see
+            `fetch_audio_response`).
+
+    Raises:
+        Exception: If both the backend and the local synthesis failed.
+    """
+    if budget_seconds is None:
+        budget_seconds = float(os.environ.get("CLOUD_AUDIO_BUDGET_SECONDS", "0.8"))
+    if timeout_seconds is None:
+        timeout_seconds = float(os.environ.get("CLOUD_AUDIO_TIMEOUT_SECONDS", "3"))
+
+    cloud = _race_executor.submit(fetch_audio, content, timeout_seconds, press)
+    wait([cloud], timeout=budget_seconds)
+    if cloud.done() and cloud.exception() is None:
+        play_audio_data(cloud.result(), content)
+        return
+
+    local = _local_executor.submit(_synthesize_local, content, lang)
+    pending = {cloud, local}  # type: set
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                logging.warning("Speech source failed: %s", future.exception())
+                continue
+            if future is cloud:
+                play_audio_data(cloud.result(), content)
+            else:
+                logging.info("Cloud audio not ready, playing local speech")
+                _play_wav(local.result(), content)
+            return
+    raise Exception("Cloud and local speech synthesis failed")
+
+
+def speak_actions(actions: Iterable[Dict[str, Any]]) -> None:
+    """
+    Play back the "say" actions of the backend.
+
+    The audio that the backend attached to an action is used (see
+    `get_next_actions(audio=...)`); only actions without audio are synthesized
+    with a separate `/audio` request. The actions are read in a background
+    thread and the audio of the next action is retrieved while the current one
+    is playing.
+
+    Args:
+        actions: The actions, in playback order. May be a lazy iterator.
+
+    Raises:
+        Exception: If reading the actions or an audio request fails.
+    """
+    _play_pipelined(
+        (action["text"], action_audio, action)
+        for action in actions
+        if action["action_type"] == "say"
+    )
+
+
+def action_audio(action: Dict[str, Any]) -> bytes:
+    """
+    Return the MP3 audio of a "say" action.
+
+    Args:
+        action: The action, optionally with base64 `audio` or an `audio_url`.
+
+    Returns:
+        bytes: The MP3 audio data.
+    """
+    if action.get("audio"):
+        return base64.b64decode(action["audio"])
+    if action.get("audio_url"):
+        resp = request("GET", action["audio_url"], timeout=15, budget_seconds=15)
+        if resp.status == 200 and resp.body:
+            return resp.body
+        logging.warning("Audio URL failed with status %s", resp.status)
+    return fetch_audio(action["text"])
+
+
+def _play_pipelined(items: Iterable[Tuple[str, Callable[[Any], bytes], Any]]) -> None:
+    """
+    Play `(content, get_audio, arg)` items in order, while the audio of the
+    next items is retrieved (`get_audio(arg)`) in the background.
+    """
+    pending = queue.Queue()  # type: queue.Queue
+
+    def produce() -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for content, get_audio, arg in items:
+                    pending.put((content, executor.submit(get_audio, arg)))
+        except Exception as e:
+            pending.put((None, e))
+            return
+        pending.put(None)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    while True:
+        item = pending.get()
+        if item is None:
+            break
+        content, result = item
+        if isinstance(result, Exception):
+            raise result
+        play_audio_data(result.result(), content)
+
+    producer.join()
+
+
+def fetch_audio(
+    content: str, timeout_seconds: float = 15, press: bool = False
+) -> bytes:
+    """
+    Request synthesized MP3 audio for the given text from the backend.
+
+    Args:
+        content: The text to be synthesized.
+        timeout_seconds: Total time for the request, including retries.
+        press: Whether the text answers a button press of its own, which the
+            backend then records in the usage histogram of the clock (not for
+            the sentences of a briefing or for probes).
+
+    Returns:
+        bytes: The MP3 audio data.
+    """
+    return fetch_audio_response(content, timeout_seconds, press).body
+
+
+def fetch_audio_response(
+    content: str, timeout_seconds: float = 15, press: bool = False
+) -> Response:
+    """
+    Like `fetch_audio`, but return the response (e.g. for its `timing`).
     """
     logging.info(f'🔤 -> 💿  "{content}"')
 
-    api_base = os.environ.get("API_BASE_URL", "").rstrip("/")
+    # The edge cache in front of `/audio`, if deployed (see infra/cdk/README.md)
+    api_base = (
+        os.environ.get("AUDIO_BASE_URL") or os.environ.get("API_BASE_URL", "")
+    ).rstrip("/")
     if not api_base:
         raise RuntimeError("Missing environment variable: API_BASE_URL")
 
@@ -67,30 +230,82 @@ def synthesize_text(content: str) -> None:
     if not api_key:
         raise RuntimeError("Missing environment variable: API_KEY")
 
+    headers = {
+        "Accept": "audio/mpeg",
+        "x-api-key": api_key,
+    }
+    # Selects the profile of the clock, unless its API key is bound to one
+    device_id = os.environ.get("DEVICE_ID", "")
+    if device_id:
+        headers["x-device-id"] = device_id
+    if press:
+        headers["x-press"] = "1"
+
     url = api_base + "/audio?" + urllib.parse.urlencode({"text": content})
-    req = urllib.request.Request(
-        url,
-        headers={
-            "Accept": "audio/mpeg",
-            "x-api-key": api_key,
-        },
-    )
 
     # Perform synthesis request and validate response
     try:
-        with contextlib.closing(urllib.request.urlopen(req, timeout=15)) as resp:
-            ct = resp.info().get("Content-Type", "")
-            # Some gateways return "audio/mpeg" or "audio/mpeg; charset=binary"
-            if not ct.lower().startswith("audio/mpeg"):
-                raise Exception(f"Unexpected Content-Type: {ct}")
+        resp = request(
+            "GET",
+            url,
+            headers=headers,
+            timeout=timeout_seconds,
+            budget_seconds=timeout_seconds,
+        )
+        if resp.status != 200:
+            raise Exception(f"Server error {resp.status}")
+
+        ct = resp.headers.get("content-type", "")
+        # Some gateways return "audio/mpeg" or "audio/mpeg; charset=binary"
+        if not ct.lower().startswith("audio/mpeg"):
+            raise Exception(f"Unexpected Content-Type: {ct}")
 
-            data = resp.read()
-            if not data:
-                raise Exception("Empty audio payload from API")
+        if not resp.body:
+            raise Exception("Empty audio payload from API")
 
     except Exception as e:
         raise Exception(f"Synthesis request failed: {e}")
 
+    return resp
+
+
+def _synthesize_local(content: str, lang: str) -> str:
+    """
+    Synthesize the text with pico2wave (like `aiy.voice.tts.say`, but without
+    playing it) and return the path of the WAV file.
+    """
+    wav_path = "voicekit_clock_local.wav"
+    markup = (
+        "<volume level='60'><pitch level='130'><speed level='100'>"
+        "{}</speed></pitch></volume>".format(content)
+    )
+    subprocess.run(
+        ["pico2wave", "--wave", wav_path, "--lang", lang, markup], check=True
+    )
+    return wav_path
+
+
+def _play_wav(wav_path: str, content: str) -> None:
+    logging.info(f'🔈  "{content}"')
+    try:
+        subprocess.run(["aplay", "-q", wav_path], check=True)
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Playback with aplay failed: {e}")
+    finally:
+        try:
+            subprocess.run(["rm", wav_path], check=True)
+        except subprocess.CalledProcessError as e:
+            logging.warning(f"Remove temp wav file failed: {e}")
+
+
+def play_audio_data(data: bytes, content: str) -> None:
+    """
+    Play MP3 audio data that is held in memory.
+
+    Args:
+        data: The MP3 audio data.
+        content: The text that was synthesized (logged for traceability).
+    """
     # Write to a temp mp3 file and play it
     mp3_path = "voicekit_clock_audio.mp3"
     try:
@@ -0,0 +1,149 @@
+import base64
+import datetime
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import List, Optional, Tuple
+
+# The current time in a text of the backend (e.g. "Es ist jetzt 07:15." or
+# "es ist 7:15 Uhr"), which is outdated when a stored briefing is played again
+_CURRENT_TIME_RE = re.compile(r"(\bes ist(?:\s+jetzt)?\s+)(\d{1,2}:\d{2})\b", re.I)
+
+
+class StoredBriefing:
+    def __init__(self, generated_at: float, sentences: List[Tuple[str, bytes]]):
+        self.generated_at = generated_at
+        # (text, MP3 audio) per sentence, in playback order
+        self.sentences = sentences
+
+    @property
+    def age_seconds(self) -> float:
+        return time.time() - self.generated_at
+
+    def sentences_at(self, now: datetime.datetime) -> List[Tuple[str, Optional[bytes]]]:
+        """
+        Return the sentences with the current time filled in. Sentences whose
+        time changed have no audio (None) and must be synthesized again; the
+        rest of their text is kept.
+        """
+        sentences = []  # type: List[Tuple[str, Optional[bytes]]]
+        for text, audio in self.sentences:
+            current = _CURRENT_TIME_RE.sub(
+                lambda match: match.group(1) + "{:%H:%M}".format(now), text
+            )
+            sentences.append((text, audio) if current == text else (current, None))
+        return sentences
+
+
+class BriefingStore:
+    """
+    Keeps the last successful briefing (text and MP3 audio per sentence) on
+    disk, so that it can be played while the backend is slow or unreachable
+    (also after a restart).
+
+    A briefing is fresh for `fresh_seconds` after it was received. Older
+    briefings are stale: until `max_stale_seconds` they are still played
+    right away (marked as such) while a new one is fetched, and until
+    `max_age_seconds` only if the backend fails. After that they are evicted.
+    """
+
+    def __init__(
+        self,
+        path: str = "briefing_store.json",
+        fresh_seconds: float = 900,
+        max_stale_seconds: float = 3600,
+        max_age_seconds: float = 6 * 3600,
+    ):
+        self.path = path
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._briefing = None  # type: Optional[StoredBriefing]
+        self._loaded = False
+
+    def load(self) -> Optional[StoredBriefing]:
+        """
+        Return the stored briefing, or None if there is none or it is older
+        than `max_age_seconds` (it is then evicted).
+        """
+        with self._lock:
+            if not self._loaded:
+                self._briefing = self._read()
+                self._loaded = True
+            briefing = self._briefing
+            if briefing is not None and briefing.age_seconds > self.max_age_seconds:
+                logging.info("Evicting briefing from %.0f", briefing.generated_at)
+                self._briefing = None
+                self._remove()
+                return None
+            return briefing
+
+    def is_fresh(self, briefing: StoredBriefing) -> bool:
+        return briefing.age_seconds <= self.fresh_seconds
+
+    def is_servable(self, briefing: StoredBriefing) -> bool:
+        """
+        Return True if the briefing may be played without waiting for the
+        backend (it is fresh or at most `max_stale_seconds` old).
+        """
+        return briefing.age_seconds <= self.max_stale_seconds
+
+    def save(
+        self, sentences: List[Tuple[str, bytes]], generated_at: Optional[float] = None
+    ) -> None:
+        """
+        Replace the stored briefing.
+
+        Args:
+            sentences: (text, MP3 audio) per sentence, in playback order.
+            generated_at: When the briefing was received (default: now).
+        """
+        briefing = StoredBriefing(
+            generated_at if generated_at is not None else time.time(), sentences
+        )
+        data = {
+            "generated_at": briefing.generated_at,
+            "sentences": [
+                {"text": text, "audio": base64.b64encode(audio).decode("ascii")}
+                for text, audio in sentences
+            ],
+        }
+        with self._lock:
+            self._briefing = briefing
+            self._loaded = True
+            # Write a temp file first, so that a power loss does not leave a
+            # truncated store behind
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logging.warning("Saving the briefing failed: %s", e)
+
+    def _read(self) -> Optional[StoredBriefing]:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            return StoredBriefing(
+                data["generated_at"],
+                [
+                    (sentence["text"], base64.b64decode(sentence["audio"]))
+                    for sentence in data["sentences"]
+                ],
+            )
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning("Reading the stored briefing failed: %s", e)
+            return None
+
+    def _remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
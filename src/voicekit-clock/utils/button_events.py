@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+try:
+    # libgpiod bindings (`sudo apt install python3-libgpiod`)
+    import gpiod
+except ImportError:
+    gpiod = None
+
+# Button of the Voice HAT (BCM numbering), pulled up and low while pressed
+BUTTON_GPIO = 23
+# Edges within this time after a press are contact bounce
+BOUNCE_SECONDS = 0.05
+
+
+def watch_button_presses(
+    on_press: Callable[[float], None],
+    line_offset: int = BUTTON_GPIO,
+    chip_name: str = "gpiochip0",
+) -> Optional[threading.Thread]:
+    """
+    Call `on_press(timestamp)` for each press of the button, from a
+    background thread.
+
+    The presses are read as GPIO edge events, which the kernel timestamps
+    when the interrupt occurs. The timestamps are converted to
+    `time.monotonic()`, so that they do not depend on when the thread is
+    scheduled.
+
+    Args:
+        on_press: Called with the monotonic time of each press.
+        line_offset: The GPIO line of the button.
+        chip_name: The GPIO chip of the line.
+
+    Returns:
+        threading.Thread: The reader thread, or None if GPIO edge events are
+        not available (the caller then falls back to polling the button). The
+        thread ends if reading the events fails, after releasing the line.
+    """
+    if gpiod is None:
+        logging.info("gpiod is not installed, polling the button")
+        return None
+    if not hasattr(gpiod, "LINE_REQ_EV_FALLING_EDGE"):
+        # libgpiod 2 has a different API (`gpiod.request_lines`)
+        logging.info("gpiod has no libgpiod 1 API, polling the button")
+        return None
+    try:
+        line = gpiod.Chip(chip_name).get_line(line_offset)
+        line.request(
+            consumer="voicekit-clock",
+            type=gpiod.LINE_REQ_EV_FALLING_EDGE,
+            flags=getattr(gpiod, "LINE_REQ_FLAG_BIAS_PULL_UP", 0),
+        )
+    except (OSError, TypeError, AttributeError) as e:
+        logging.warning("Requesting GPIO edge events failed: %s", e)
+        return None
+
+    def read_events() -> None:
+        last_press = None  # type: Optional[float]
+        try:
+            while True:
+                event = line.event_read()
+                timestamp = _to_monotonic(event.sec + event.nsec / 1e9)
+                if last_press is not None and timestamp - last_press < BOUNCE_SECONDS:
+                    continue
+                last_press = timestamp
+                try:
+                    on_press(timestamp)
+                except Exception:
+                    logging.exception("Handling a button press failed")
+        except Exception as e:
+            logging.error("Reading GPIO edge events failed: %s", e)
+        finally:
+            # Free the line, so that the caller can poll the button instead
+            try:
+                line.release()
+            except Exception as e:
+                logging.warning("Releasing the GPIO line failed: %s", e)
+
+    thread = threading.Thread(target=read_events, daemon=True)
+    thread.start()
+    return thread
+
+
+def _to_monotonic(timestamp: float) -> float:
+    # Older kernels timestamp GPIO events with the realtime clock
+    now_realtime, now_monotonic = time.time(), time.monotonic()
+    if abs(now_realtime - timestamp) < abs(now_monotonic - timestamp):
+        return timestamp - now_realtime + now_monotonic
+    return timestamp
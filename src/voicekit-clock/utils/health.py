@@ -1,6 +1,7 @@
 import json
 import os
-import urllib.request
+
+from utils.http_transport import Response, request
 
 
 def get_health():
@@ -13,6 +14,13 @@ def get_health():
     Returns:
         dict: Parsed JSON response from the `/health` endpoint.
     """
+    return json.loads(get_health_response().body.decode("utf-8"))
+
+
+def get_health_response() -> Response:
+    """
+    Like `get_health`, but return the response (e.g. for its `timing`).
+    """
     api_base = os.environ.get("API_BASE_URL", "").rstrip("/")
     if not api_base:
         raise RuntimeError("Missing environment variable: API_BASE_URL")
@@ -22,15 +30,16 @@ def get_health():
         raise RuntimeError("Missing environment variable: API_KEY")
 
     url = api_base + "/health"
-    req = urllib.request.Request(
+    resp = request(
+        "GET",
         url,
         headers={
             "Accept": "application/json",
             "x-api-key": api_key,
         },
+        timeout=5,
+        budget_seconds=5,
     )
-
-    with urllib.request.urlopen(req, timeout=5) as resp:
-        if resp.status != 200:
-            raise Exception(f"Server error {resp.status}")
-        return json.load(resp)
+    if resp.status != 200:
+        raise Exception(f"Server error {resp.status}")
+    return resp
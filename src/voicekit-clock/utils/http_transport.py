@@ -0,0 +1,178 @@
+import gzip
+import http.client
+import logging
+import random
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+# Errors of a kept-alive connection that the server closed in the meantime
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CONNECT_TIMEOUT_SECONDS = 5
+BACKOFF_SECONDS = 0.2
+MAX_BACKOFF_SECONDS = 2.0
+
+# Idle connections per (scheme, host, port), shared by all requests
+_ConnectionKey = Tuple[str, str, Optional[int]]
+_idle: Dict[_ConnectionKey, List[http.client.HTTPConnection]] = {}
+_lock = threading.Lock()
+
+
+class Response:
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str],
+        body: bytes,
+        timing: Dict[str, object],
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.timing = timing
+
+
+def request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 10.0,
+    budget_seconds: Optional[float] = None,
+    max_attempts: int = 3,
+) -> Response:
+    """
+    Send an HTTP request over a kept-alive connection.
+
+    Connections to the backend are reused between button presses, so that
+    only the first request has to set up TCP and TLS. Responses may be
+    gzip-compressed. Connection errors, timeouts, 429 and 5xx responses are
+    retried with jittered exponential backoff while the budget allows.
+
+    Args:
+        method: The HTTP method, e.g. "GET".
+        url: The absolute URL.
+        headers: Additional request headers.
+        timeout: Read timeout of each attempt in seconds.
+        budget_seconds: Total time for all attempts and backoffs (optional).
+        max_attempts: Maximum number of attempts.
+
+    Returns:
+        Response: Status, headers (lower-case names), decompressed body and
+        timing (e.g. attempts, reused connection, time to first byte and
+        total milliseconds).
+
+    Raises:
+        OSError, http.client.HTTPException: If no response was received.
+    """
+    parts = urllib.parse.urlsplit(url)
+    key = (parts.scheme, parts.hostname, parts.port)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    all_headers = {"Accept-Encoding": "gzip"}
+    all_headers.update(headers or {})
+
+    started_at = time.monotonic()
+    budget = float("inf") if budget_seconds is None else budget_seconds
+
+    attempt = 0
+    while True:
+        attempt += 1
+        response, error = None, None
+        try:
+            remaining = budget - (time.monotonic() - started_at)
+            response = _send(key, method, path, all_headers, min(timeout, remaining))
+        except (OSError, http.client.HTTPException) as e:
+            error = e
+        if response is not None and response.status not in _RETRY_STATUSES:
+            break
+
+        backoff = random.uniform(
+            0, min(MAX_BACKOFF_SECONDS, BACKOFF_SECONDS * 2 ** (attempt - 1))
+        )
+        remaining = budget - (time.monotonic() - started_at)
+        if attempt >= max_attempts or remaining <= backoff:
+            if response is not None:
+                break
+            raise error
+
+        logging.warning(
+            "Request failed (%s), retrying in %.2fs",
+            repr(error) if error is not None else response.status,
+            backoff,
+        )
+        time.sleep(backoff)
+
+    response.timing["attempts"] = attempt
+    response.timing["total_ms"] = round((time.monotonic() - started_at) * 1000, 1)
+    logging.debug("%s %s: %s %s", method, parts.path, response.status, response.timing)
+    return response
+
+
+def _send(
+    key: _ConnectionKey,
+    method: str,
+    path: str,
+    headers: Dict[str, str],
+    timeout: float,
+) -> Response:
+    while True:
+        conn, reused = _acquire(key)
+        started_at = time.monotonic()
+        try:
+            if conn.sock is None:
+                conn.timeout = max(0.01, min(CONNECT_TIMEOUT_SECONDS, timeout))
+                conn.connect()
+            conn.sock.settimeout(max(0.01, timeout))
+
+            conn.request(method, path, headers=headers)
+            resp = conn.getresponse()
+            # Time to the response headers (before the body is read)
+            ttfb_ms = round((time.monotonic() - started_at) * 1000, 1)
+            body = resp.read()
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            if reused:
+                continue
+            raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if (resp.getheader("Content-Encoding") or "").lower() == "gzip":
+            body = gzip.decompress(body)
+
+        if resp.will_close:
+            conn.close()
+        else:
+            with _lock:
+                _idle.setdefault(key, []).append(conn)
+
+        return Response(
+            status=resp.status,
+            headers={name.lower(): value for name, value in resp.getheaders()},
+            body=body,
+            timing={
+                "reused": reused,
+                "ttfb_ms": ttfb_ms,
+                "ms": round((time.monotonic() - started_at) * 1000, 1),
+            },
+        )
+
+
+def _acquire(key: _ConnectionKey) -> Tuple[http.client.HTTPConnection, bool]:
+    with _lock:
+        connections = _idle.get(key)
+        if connections:
+            return connections.pop(), True
+    scheme, host, port = key
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, port), False
+    return http.client.HTTPConnection(host, port), False
@@ -1,24 +1,52 @@
 import time
 import threading
-from typing import Callable, Optional
+from collections import deque
+from typing import Callable, Optional, Tuple
 
 
 class MultiEventDetector:
+    """
+    Counts events (button presses) that follow each other within the debounce
+    delay and calls `multi_event_callback(count, ...)` once per gesture.
+
+    With `max_count`, a gesture is dispatched right away when it reaches that
+    count, since no longer gesture can follow. With `adaptive_range`, the
+    debounce delay follows the measured press cadence of the user: it is
+    1.5 times the 90th percentile of the recent intervals between presses,
+    limited to `(min, max)` seconds. All intervals up to the maximum delay
+    count, including those that split a gesture because they exceeded the
+    current delay, so that the delay can also grow again for a slower user.
+
+    Timestamps are taken from `clock` unless passed to `handle_event` (e.g.
+    kernel timestamps of GPIO edge events, which must use the same clock).
+    """
+
     def __init__(
         self,
         multi_event_callback: Callable[..., None],
         debounce_delay: float = 0.3,
+        max_count: Optional[int] = None,
+        adaptive_range: Optional[Tuple[float, float]] = None,
+        clock: Callable[[], float] = time.time,
+        min_samples: int = 5,
     ) -> None:
         self.multi_event_callback = multi_event_callback
         self.debounce_delay = debounce_delay
+        self.max_count = max_count
+        self.adaptive_range = adaptive_range
+        self.clock = clock
+        self.min_samples = min_samples
+        self._intervals = deque(maxlen=20)  # type: deque
         self._lock = threading.Lock()
         self._last_event_time = None
+        # Unlike `_last_event_time`, kept when a gesture is dispatched
+        self._last_press_time = None  # type: Optional[float]
         self._count = 0
         self._timer = None
 
     def handle_event(self, timestamp: Optional[float] = None, *args, **kwargs) -> None:
         if timestamp is None:
-            timestamp = time.time()
+            timestamp = self.clock()
 
         with self._lock:
             if (
@@ -29,18 +57,41 @@ class MultiEventDetector:
                 if self._timer:
                     self._timer.cancel()
                     self._timer = None
+            if self._last_press_time is not None:
+                self._record_interval(timestamp - self._last_press_time)
 
             self._count += 1
             self._last_event_time = timestamp
+            self._last_press_time = timestamp
 
-            # Start a new timer
-            self._timer = threading.Timer(
-                self.debounce_delay, self._handle_multi_event, args, kwargs
-            )
+            # Start a new timer, for the rest of the debounce delay after the
+            # event (or none at the maximum count)
+            if self.max_count is not None and self._count >= self.max_count:
+                delay = 0.0
+            else:
+                delay = max(0.0, self.debounce_delay - (self.clock() - timestamp))
+            self._timer = threading.Timer(delay, self._handle_multi_event, args, kwargs)
             self._timer.start()
 
+    def _record_interval(self, interval: float) -> None:
+        if self.adaptive_range is None:
+            return
+        min_delay, max_delay = self.adaptive_range
+        if interval > max_delay:
+            # A separate gesture
+            return
+        self._intervals.append(interval)
+        if len(self._intervals) < self.min_samples:
+            return
+        intervals = sorted(self._intervals)
+        p90 = intervals[min(len(intervals) - 1, int(len(intervals) * 0.9))]
+        self.debounce_delay = min(max_delay, max(min_delay, 1.5 * p90))
+
     def _handle_multi_event(self, *args, **kwargs) -> None:
         with self._lock:
+            # A timer that was cancelled while waiting for the lock
+            if threading.current_thread() is not self._timer:
+                return
             self.multi_event_callback(self._count, *args, **kwargs)
             self._count = 0
             self._last_event_time = 0
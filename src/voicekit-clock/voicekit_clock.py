@@ -1,25 +1,51 @@
 #!/usr/bin/env python3
 import datetime
+import json
 import logging
+import os
 import socket
 import subprocess
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 from aiy.board import Board, Led
 from aiy.voice.tts import say
 
 
-from utils.actions import get_next_action
-from utils.audio import play_audio, synthesize_text
-from utils.health import get_health
+from utils.actions import get_next_actions
+from utils.audio import (
+    action_audio,
+    fetch_audio_response,
+    play_audio,
+    play_audio_data,
+    speak_actions,
+    synthesize_text_raced,
+)
+from utils.briefing_store import BriefingStore, StoredBriefing
+from utils.button_events import watch_button_presses
+from utils.health import get_health, get_health_response
 from utils.load_dotenv import load_dotenv
 from utils.multi_event_detector import MultiEventDetector
 
 load_dotenv()
 
+# The last briefing, played right away on the next press while a new one is
+# fetched in the background
+briefing_store = BriefingStore(
+    fresh_seconds=float(os.environ.get("BRIEFING_FRESH_SECONDS", "900")),
+    max_stale_seconds=float(os.environ.get("BRIEFING_MAX_STALE_SECONDS", "3600")),
+    max_age_seconds=float(os.environ.get("BRIEFING_MAX_AGE_SECONDS", "21600")),
+)
+_refresh_lock = threading.Lock()
+
 
 def button_press_callback(count: int, *, board: Board) -> None:
-    if count <= 5:
+    if count == 1:
+        # No connection checks: the race falls back to local speech on its own
+        _advanced_actions(count)
+    elif count <= 5:
         if not _is_connected() or not _is_server_up():
             _fallback_actions(count)
         else:
@@ -43,20 +69,13 @@ def _advanced_actions(count: int) -> None:
     if count == 1:
         current_time_sentence = "Es ist jetzt {:%H:%M}.".format(datetime.datetime.now())
         try:
-            synthesize_text(current_time_sentence)
+            # Local speech if the cloud audio is late (CLOUD_AUDIO_BUDGET_SECONDS)
+            synthesize_text_raced(current_time_sentence, lang="de-DE", press=True)
         except Exception:
             say(current_time_sentence, lang="de-DE")
     elif count == 2 or count == 3 or count == 4:
         # For multi-press events of count 2-4, let the server decide for the action
-        try:
-            action = get_next_action()
-            if action["action_type"] == "say":
-                synthesize_text(action["text"])
-        except Exception:
-            play_audio(
-                "./assets/de-DE/error.mp3",
-                "Technischer Fehler. Bitte später erneut probieren.",
-            )
+        _speak_briefing()
 
     elif count == 5:
         play_audio(
@@ -65,10 +84,101 @@ def _advanced_actions(count: int) -> None:
         )
 
 
+def _speak_briefing() -> None:
+    stored = briefing_store.load()
+    if stored is not None and briefing_store.is_servable(stored):
+        # Play the stored briefing right away (with its time if it is stale)
+        # and fetch a new one for the next press (stale-while-revalidate)
+        threading.Thread(target=_refresh_briefing, daemon=True).start()
+        _speak_stored_briefing(stored)
+        return
+
+    actions = []
+    try:
+        # The audio is attached to the actions (one request instead of
+        # one per sentence)
+        speak_actions(_recorded(get_next_actions(audio="inline"), actions))
+    except Exception as e:
+        # The stored briefing (marked as stale), unless the new one has
+        # already started playing
+        if stored is None or actions:
+            _play_error()
+            return
+        logging.warning("Requesting the briefing failed: %s", e)
+        _speak_stored_briefing(stored)
+        return
+    threading.Thread(target=_store_briefing, args=(actions,), daemon=True).start()
+
+
+def _speak_stored_briefing(stored: StoredBriefing) -> None:
+    now = datetime.datetime.now()
+    sentences = stored.sentences_at(now)
+    intro = []
+    if all(audio is not None for _, audio in sentences):
+        # The briefing does not tell the time
+        intro.append("Es ist jetzt {:%H:%M}.".format(now))
+    if not briefing_store.is_fresh(stored):
+        generated_at = datetime.datetime.fromtimestamp(stored.generated_at)
+        intro.append("Stand von {:%H:%M} Uhr:".format(generated_at))
+
+    for text, audio in ([(" ".join(intro), None)] if intro else []) + sentences:
+        if audio is not None:
+            play_audio_data(audio, text)
+            continue
+        try:
+            synthesize_text_raced(text, lang="de-DE")
+        except Exception:
+            say(text, lang="de-DE")
+
+
+def _play_error() -> None:
+    play_audio(
+        "./assets/de-DE/error.mp3",
+        "Technischer Fehler. Bitte später erneut probieren.",
+    )
+
+
+def _recorded(actions, recorded: list):
+    for action in actions:
+        recorded.append(action)
+        yield action
+
+
+def _refresh_briefing() -> None:
+    # One refresh at a time, even if the button is pressed again meanwhile
+    if not _refresh_lock.acquire(blocking=False):
+        return
+    try:
+        _store_briefing(list(get_next_actions(audio="inline")))
+    except Exception as e:
+        logging.warning("Refreshing the briefing failed: %s", e)
+    finally:
+        _refresh_lock.release()
+
+
+def _store_briefing(actions: list) -> None:
+    try:
+        sentences = [
+            (action["text"], action_audio(action))
+            for action in actions
+            if action["action_type"] == "say"
+        ]
+    except Exception as e:
+        logging.warning("Storing the briefing failed: %s", e)
+        return
+    if sentences:
+        briefing_store.save(sentences)
+
+
 def _fallback_actions(count: int) -> None:
     if count == 1:
         current_time_sentence = "Es ist jetzt {:%H:%M}.".format(datetime.datetime.now())
         say(current_time_sentence, lang="de-DE")
+    elif count == 2 or count == 3 or count == 4:
+        # Offline: the stored briefing (marked as stale if it is not fresh)
+        stored = briefing_store.load()
+        if stored is not None:
+            _speak_stored_briefing(stored)
     elif count == 5:
         play_audio(
             "./assets/de-DE/instructions_fallback.mp3",
@@ -77,39 +187,80 @@ def _fallback_actions(count: int) -> None:
 
 
 def run_self_diagnosis(verbose: bool = True):
-    if not verbose:
+    # All probes start right away and run while the prompts are playing, so
+    # that the diagnosis takes about as long as its audio
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        connected = executor.submit(_is_connected)
+        server_round_trip = executor.submit(_measure_server_round_trip)
+        if not verbose:
+            # Check internet connection
+            if not connected.result():
+                play_audio(
+                    "./assets/de-DE/connection_error.mp3",
+                    "Keine Internetverbindung gefunden.",
+                )
+            # Check server health
+            if server_round_trip.result() is None:
+                play_audio(
+                    "./assets/de-DE/server_down.mp3",
+                    "Der Server ist gerade nicht erreichbar.",
+                )
+            return
+
+        audio_first_byte = executor.submit(_measure_audio_first_byte)
+
         # Check internet connection
-        if not _is_connected():
+        play_audio("./assets/de-DE/connection.mp3", "Internetverbindung:")
+        if connected.result():
+            play_audio("./assets/de-DE/ok.mp3", "OK")
+        else:
             play_audio(
                 "./assets/de-DE/connection_error.mp3",
                 "Keine Internetverbindung gefunden.",
             )
         # Check server health
-        if not _is_server_up():
+        play_audio("./assets/de-DE/server.mp3", "Server-Verbindung:")
+        round_trip_ms = server_round_trip.result()
+        if round_trip_ms is None:
             play_audio(
                 "./assets/de-DE/server_down.mp3",
                 "Der Server ist gerade nicht erreichbar.",
             )
-        return
-
-    # Check internet connection
-    play_audio("./assets/de-DE/connection.mp3", "Internetverbindung:")
-    if _is_connected():
+            return
         play_audio("./assets/de-DE/ok.mp3", "OK")
-    else:
-        play_audio(
-            "./assets/de-DE/connection_error.mp3",
-            "Keine Internetverbindung gefunden.",
-        )
-    # Check server health
-    play_audio("./assets/de-DE/server.mp3", "Server-Verbindung:")
-    if _is_server_up():
-        play_audio("./assets/de-DE/ok.mp3", "OK")
-    else:
-        play_audio(
-            "./assets/de-DE/server_down.mp3",
-            "Der Server ist gerade nicht erreichbar.",
-        )
+
+        # Report the latencies (spoken locally, they are not cached)
+        latencies = "Antwortzeit {:.0f} Millisekunden.".format(round_trip_ms)
+        first_byte_ms = audio_first_byte.result()
+        if first_byte_ms is not None:
+            latencies += " Sprachausgabe {:.0f} Millisekunden.".format(first_byte_ms)
+        logging.info("Diagnosis: %s", latencies)
+        say(latencies, lang="de-DE")
+
+
+def _measure_server_round_trip() -> Optional[float]:
+    """
+    Returns the round-trip time of a health check in milliseconds, or None if
+    the server is not up.
+    """
+    try:
+        resp = get_health_response()
+        if json.loads(resp.body.decode("utf-8"))["status"] != "up":
+            return None
+        return resp.timing["total_ms"]
+    except Exception:
+        return None
+
+
+def _measure_audio_first_byte() -> Optional[float]:
+    """
+    Returns the time to the first byte of an `/audio` response (a short,
+    usually cached text) in milliseconds, or None if the request failed.
+    """
+    try:
+        return fetch_audio_response("OK").timing["ttfb_ms"]
+    except Exception:
+        return None
 
 
 def _is_connected(timeout: float = 3.0) -> bool:
@@ -139,7 +290,15 @@ def _is_server_up() -> bool:
 
 
 def main():
-    detector = MultiEventDetector(button_press_callback, debounce_delay=0.5)
+    detector = MultiEventDetector(
+        button_press_callback,
+        debounce_delay=0.5,
+        # 7 presses (shutdown) is the longest gesture
+        max_count=7,
+        # Adapted to the press cadence of the user
+        adaptive_range=(0.3, 0.8),
+        clock=time.monotonic,
+    )
     with Board() as board:
         logging.info("🕰️  VoiceKit Clock - Detecting button press events ...")
         play_audio("./assets/de-DE/starting.mp3", "...starte Sprachuhr.")
@@ -147,13 +306,22 @@ def main():
         # on startup, check for internet connection and server health
         run_self_diagnosis(verbose=False)
 
+        def on_press(timestamp: float) -> None:
+            # Switch the LED on before the debounce time for the button events
+            # has ended to give a more immediate feedback to the user.
+            board.led.state = Led.ON
+            detector.handle_event(timestamp, board=board)
+
+        # Interrupt-driven with kernel timestamps if GPIO edge events are
+        # available (`board.button` must not be used then, it claims the line)
+        reader = watch_button_presses(on_press)
+        if reader is not None:
+            reader.join()
+            logging.warning("GPIO edge events stopped, polling the button")
+
         while True:
             if board.button.wait_for_press():
-                # Switch the LED on before the debounce time for the button events
-                # has ended to give a more immediate feedback to the user.
-                board.led.state = Led.ON
-
-                detector.handle_event(None, board=board)
+                on_press(time.monotonic())
                 # small debounce delay
                 time.sleep(0.01)
 